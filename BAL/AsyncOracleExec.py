@@ -0,0 +1,205 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from oracledb import AsyncConnection, AsyncConnectionPool
+from BAL.RowShapes import apply_row_factory
+from BAL.QueryStats import QUERY_STATS, QueryStats
+
+class AsyncOracleExec:
+    def __init__(self, source: AsyncConnection | AsyncConnectionPool, stats: QueryStats = None):
+        # giống OracleExec nhưng dùng API asyncio của python-oracledb; với pool,
+        # các coroutine chạy song song sẽ mượn các session khác nhau
+        if isinstance(source, AsyncConnectionPool):
+            self.pool = source
+            self.conn = None
+        else:
+            self.pool = None
+            self.conn = source
+        self._pinned = ContextVar(f"pinned_{id(self)}", default=None)
+        self.row_shape = "record"
+        # xem OracleExec.identity
+        self.identity = None
+        # cùng bộ đo với OracleExec; không lấy số liệu V$MYSTAT (truy vấn đồng bộ) nên
+        # round trip được ước lượng từ số dòng, arraysize và prefetchrows
+        self.stats = stats or QUERY_STATS
+
+    @asynccontextmanager
+    async def _acquire(self):
+        pinned = self._pinned.get()
+        if pinned is not None:
+            yield pinned
+        elif self.pool is None:
+            yield self.conn
+        else:
+            conn = await self.pool.acquire()
+            try:
+                yield conn
+            finally:
+                await self.pool.release(conn)
+
+    # giữ một kết nối cho cả một nhóm lệnh trong cùng task
+    @asynccontextmanager
+    async def session(self):
+        pinned = self._pinned.get()
+        if pinned is not None:
+            yield pinned
+            return
+        async with self._acquire() as conn:
+            token = self._pinned.set(conn)
+            try:
+                yield conn
+            finally:
+                self._pinned.reset(token)
+
+    def reset_identity(self):
+        self.identity = None
+
+    async def close(self):
+        self.identity = None
+        if self.pool is not None:
+            await self.pool.close(force=True)
+        else:
+            await self.conn.close()
+
+    def _row_factory(self, cursor, shape=None):
+        apply_row_factory(cursor, shape or self.row_shape)
+
+    def _tune(self, cursor, arraysize=None, prefetchrows=None):
+        if arraysize:
+            cursor.arraysize = arraysize
+        if prefetchrows is not None:
+            cursor.prefetchrows = prefetchrows
+
+    def _measure(self, statement: str, arraysize=None, prefetchrows=None):
+        return self.stats.measure(statement, None, arraysize, prefetchrows)
+
+    async def fetch_all(self, query: str, params=None, arraysize=None, prefetchrows=None) -> list:
+        async with self._acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                with self._measure(query, arraysize, prefetchrows) as op:
+                    self._tune(cursor, arraysize, prefetchrows)
+                    await cursor.execute(query, params or {})
+                    self._row_factory(cursor)
+                    rows = await cursor.fetchall()
+                    op.rows = len(rows)
+                    return rows
+            finally:
+                cursor.close()
+
+    async def fetch_iter(self, query: str, params=None, batch_size=None, arraysize=None, prefetchrows=None):
+        arraysize = arraysize or batch_size or 500
+        async with self._acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                with self._measure(query, arraysize, prefetchrows) as op:
+                    self._tune(cursor, arraysize, prefetchrows)
+                    await cursor.execute(query, params or {})
+                    self._row_factory(cursor)
+                    while True:
+                        rows = await cursor.fetchmany(batch_size or arraysize)
+                        if not rows:
+                            break
+                        op.rows += len(rows)
+                        if batch_size:
+                            yield rows
+                        else:
+                            for row in rows:
+                                yield row
+            finally:
+                cursor.close()
+
+    async def fetch_one(self, query: str, params=None) -> dict:
+        async with self._acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                with self._measure(query) as op:
+                    await cursor.execute(query, params or {})
+                    self._row_factory(cursor)
+                    row = await cursor.fetchone()
+                    op.rows = 0 if row is None else 1
+                    return row
+            finally:
+                cursor.close()
+
+    # commit=False cho lệnh không ghi dữ liệu (ví dụ đặt context FGAC)
+    async def execute(self, query: str, params=None, commit: bool = True) -> int:
+        async with self._acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                with self._measure(query) as op:
+                    await cursor.execute(query, params or {})
+                    op.rows = max(cursor.rowcount, 0)
+                    op.round_trips = 2 if commit else 1
+                    if commit:
+                        await conn.commit()
+                return cursor.rowcount
+            except Exception as e:
+                await conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    async def execute_many(self, query: str, param_list: list) -> int:
+        async with self._acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                with self._measure(query) as op:
+                    await cursor.executemany(query, param_list)
+                    op.rows = max(cursor.rowcount, 0)
+                    op.round_trips = 2
+                    await conn.commit()
+                return cursor.rowcount
+            except Exception as e:
+                await conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    async def execute_with_returning(self, query: str, params=None, returning_param: str = "id") -> int:
+        async with self._acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                returning_var = cursor.var(int)
+                if params is None:
+                    params = {}
+                params[returning_param] = returning_var
+
+                with self._measure(query) as op:
+                    await cursor.execute(query, params)
+                    op.rows = max(cursor.rowcount, 0)
+                    op.round_trips = 2
+                    await conn.commit()
+                return returning_var.getvalue()
+            except Exception as e:
+                await conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    # giống OracleExec.execute_plsql: một khối PL/SQL, mảng bind và biến OUT, commit kèm lệnh execute
+    async def execute_plsql(self, block: str, params=None, arrays=None, out=None) -> dict:
+        async with self._acquire() as conn:
+            cursor = conn.cursor()
+            autocommit = conn.autocommit
+            try:
+                binds = dict(params or {})
+                for name, (typ, values) in (arrays or {}).items():
+                    binds[name] = cursor.arrayvar(typ, list(values))
+                out_vars = {}
+                for name, typ in (out or {}).items():
+                    if isinstance(typ, tuple):
+                        out_vars[name] = cursor.arrayvar(typ[0], typ[1])
+                    else:
+                        out_vars[name] = cursor.var(typ)
+                binds.update(out_vars)
+
+                conn.autocommit = True
+                with self._measure(block):
+                    await cursor.execute(block, binds)
+                return {name: var.getvalue() for name, var in out_vars.items()}
+            except Exception as e:
+                await conn.rollback()
+                raise e
+            finally:
+                conn.autocommit = autocommit
+                cursor.close()
@@ -0,0 +1,227 @@
+from oracledb import DatabaseError
+from BAL.AsyncOracleExec import AsyncOracleExec
+from BAL.ProductService import (PRODUCT_SEARCH, PRODUCT_INSERT_QUERY, PRODUCT_UPDATE_QUERY,
+                                PRODUCT_DEACTIVATE_QUERY, product_params)
+from BAL.ProductCatalog import PRODUCT_CATALOG
+from BAL.OrderService import ORDER_SEARCH, ORDER_DETAIL_QUERY, CHECKOUT_BLOCK, checkout_binds, checkout_result
+from BAL.CustomerService import (CUSTOMER_CACHE, CUSTOMER_SEARCH, CUSTOMER_BY_PHONE_QUERY, CUSTOMER_INSERT_QUERY,
+                                 SET_CONTEXT_BLOCK, is_fgac_restricted)
+from BAL.UserService import (SessionIdentity, EMPLOYEE_SEARCH, EMPLOYEE_SELF, SESSION_IDENTITY_QUERY,
+                             EMPLOYEE_UPDATE_QUERY, ACCOUNT_STATUS_SYNC, SYNC_ACCOUNT_STATUS_QUERY,
+                             CREATE_EMPLOYEES_BLOCK, SET_ACCOUNTS_LOCKED_BLOCK, create_employees_binds,
+                             create_employees_result, set_accounts_locked_binds, employee_changed, logger)
+from BAL.AuditSerice import USER_AUDIT_QUERY
+from models.CustomerModel import CustomerModel
+from models.EmployeeModel import EmployeeModel
+
+# Các service bản async: dùng chung câu SQL (hằng số của module bản đồng bộ) nhưng không kế thừa
+# service đồng bộ, nên chỉ có các hàm dưới đây, hàm nào cũng là coroutine và có thể chạy song song
+# bằng asyncio.gather. Các hàm ghi PRODUCTS chỉ báo PRODUCT_CATALOG lấy delta ở lần đọc sau.
+
+
+class AsyncProductService:
+    def __init__(self, oracleExec: AsyncOracleExec):
+        self.oracleExec = oracleExec
+
+    async def get_all_products(self, keyword="", type_search=None):
+        try:
+            return await PRODUCT_SEARCH.fetch_async(self.oracleExec, type_search, keyword)
+        except DatabaseError as e:
+            raise ValueError("Cannot get product info" ,e)
+
+    async def create_product(self, product):
+        try:
+            await self.oracleExec.execute(PRODUCT_INSERT_QUERY, product_params(product))
+        except DatabaseError as e:
+            raise DatabaseError(f"Error creating product {product.name}: {e}")
+        PRODUCT_CATALOG.invalidate()
+
+    async def update_product(self, product):
+        try:
+            await self.oracleExec.execute(PRODUCT_UPDATE_QUERY, {**product_params(product), "product_id": product.id})
+        except DatabaseError as e:
+            raise DatabaseError (f"Error updating product ID {product.id} ",e)
+        PRODUCT_CATALOG.invalidate()
+
+    async def deactivate_product(self, product_id: int):
+        try:
+            await self.deactivate_products([product_id])
+        except DatabaseError as e:
+            raise DatabaseError (f"Error deactivating product ID {product_id} ",e)
+
+    async def deactivate_products(self, product_ids: list) -> int:
+        if not product_ids:
+            return 0
+        try:
+            count = await self.oracleExec.execute_many(PRODUCT_DEACTIVATE_QUERY,
+                                                       [{"product_id": product_id} for product_id in product_ids])
+        except DatabaseError as e:
+            raise DatabaseError (f"Error deactivating {len(product_ids)} products ",e)
+        PRODUCT_CATALOG.invalidate()
+        return count
+
+    # cùng câu tìm kiếm với PRODUCT_SEARCH (tên qua name_key), giới hạn số dòng phía server
+    async def get_product_for_order(self, keyword : str="", limit: int=None):
+        try:
+            return await PRODUCT_SEARCH.fetch_async(self.oracleExec, "name" if keyword else None, keyword, limit=limit)
+        except DatabaseError as e:
+            raise ValueError("Cannot get product info" ,e)
+
+
+class AsyncOrderService:
+    def __init__(self, oracleExec: AsyncOracleExec):
+        self.oracleExec = oracleExec
+
+    async def load_orders(self, keyword="", type_search=None):
+        try:
+            return await ORDER_SEARCH.fetch_async(self.oracleExec, type_search, keyword)
+        except DatabaseError as e:
+            raise ValueError("Cannot get order info", e)
+
+    async def load_orders_detail(self, order_id):
+        try:
+            return await self.oracleExec.fetch_all(ORDER_DETAIL_QUERY,{"order_id":order_id})
+        except DatabaseError as e:
+            raise ValueError(f"Can't get order detail of {order_id}")
+
+    # cùng khối CHECKOUT_BLOCK với OrderService.checkout: một lệnh nguyên tử, một round trip
+    async def checkout(self, cart: list, customer_phone: str, customer_name: str):
+        try:
+            result = await self.oracleExec.execute_plsql(CHECKOUT_BLOCK,
+                                                         *checkout_binds(cart, customer_phone, customer_name))
+        except DatabaseError as e:
+            raise DatabaseError(f"Error during checkout: {e}")
+        PRODUCT_CATALOG.invalidate()
+        CUSTOMER_CACHE.customer_saved(customer_phone)
+        return checkout_result(cart, result)
+
+
+class AsyncCustomerService:
+    def __init__(self, oracleExec: AsyncOracleExec):
+        self.oracleExec = oracleExec
+
+    async def get_all_customers(self, keyword=None, type_search=None) -> list:
+        try:
+            return await CUSTOMER_SEARCH.fetch_async(self.oracleExec, type_search, keyword)
+        except DatabaseError as e:
+            raise ValueError("Can not get customers info ",e)
+
+    async def get_customer_by_phone(self,phonenumber: str, username: str) -> dict|None:
+        async with self.oracleExec.session():
+            if is_fgac_restricted(username):
+                await self.set_context(phonenumber)
+            try:
+                return await self.oracleExec.fetch_one(CUSTOMER_BY_PHONE_QUERY,{"phonenumber":phonenumber})
+            except DatabaseError as e:
+                raise ValueError("Can not get customer info ",e)
+
+    async def create_customer(self, customer: CustomerModel):
+        try:
+            return await self.oracleExec.execute_with_returning(CUSTOMER_INSERT_QUERY,{"name":customer.name,
+                                           "phonenumber":customer.phonenumber})
+        except DatabaseError as e:
+            raise ValueError(f"Can't insert customer with phone number: {customer.phonenumber} ", e)
+
+    # set_phonenumber không ghi dữ liệu nên không commit
+    async def set_context(self, phone_number: str):
+        try:
+            await self.oracleExec.execute(SET_CONTEXT_BLOCK, {"fgac_phone": phone_number}, commit=False)
+        except Exception as e:
+            raise ValueError(f"Can't set context for phone number: {phone_number}", e)
+
+
+class AsyncUserService:
+    def __init__(self, oracleExec: AsyncOracleExec):
+        self.oracleExec = oracleExec
+
+    async def create_employee(self, employee: EmployeeModel):
+        employee_id, error = (await self.create_employees([employee]))[0]
+        if error is not None:
+            raise DatabaseError(f"Error creating employee {employee.username}: {error}")
+        return employee_id
+
+    # cùng khối PL/SQL với UserService.create_employees (tên user qua DBMS_ASSERT)
+    async def create_employees(self, employees: list) -> list:
+        if not employees:
+            return []
+        try:
+            result = await self.oracleExec.execute_plsql(CREATE_EMPLOYEES_BLOCK, **create_employees_binds(employees))
+        except DatabaseError as e:
+            raise DatabaseError(f"Error creating employees: {e}")
+        return create_employees_result(result)
+
+    async def update_employee(self, employee: EmployeeModel):
+        try:
+            await self.oracleExec.execute(EMPLOYEE_UPDATE_QUERY,{
+                                           "address":employee.address,
+                                           "phone_number":employee.phonenumber,
+                                           "email":employee.email,
+                                           "employee_id":employee.id})
+        except DatabaseError as e:
+            raise DatabaseError (f"Error updating employee {employee.username} ",e)
+        employee_changed(self.oracleExec, employee.id)
+
+    async def deactive_employee(self, username: str):
+        error = (await self.set_accounts_locked([username]))[0]
+        if error is not None:
+            raise DatabaseError(f"Error LOCKED user {username} ", error)
+
+    async def set_accounts_locked(self, usernames: list, locked: bool = True) -> list:
+        if not usernames:
+            return []
+        try:
+            result = await self.oracleExec.execute_plsql(SET_ACCOUNTS_LOCKED_BLOCK,
+                                                         **set_accounts_locked_binds(usernames, locked))
+        except DatabaseError as e:
+            raise DatabaseError(f"Error {'LOCKED' if locked else 'UNLOCKED'} users ", e)
+        return result["errors"]
+
+    async def sync_account_status(self, force=False):
+        if not ACCOUNT_STATUS_SYNC.claim(force):
+            return
+        try:
+            await self.oracleExec.execute(SYNC_ACCOUNT_STATUS_QUERY)
+        except DatabaseError as e:
+            logger.warning("Cannot sync EMPLOYEES.account_status: %s", e)
+
+    # identity là None cho tới khi get_identity() chạy lần đầu
+    @property
+    def identity(self) -> SessionIdentity:
+        return self.oracleExec.identity
+
+    async def get_identity(self) -> SessionIdentity:
+        identity = self.oracleExec.identity
+        if identity is None:
+            try:
+                row = await self.oracleExec.fetch_one(SESSION_IDENTITY_QUERY, {})
+            except DatabaseError as e:
+                raise ValueError("Can't get session user ", e)
+            identity = self.oracleExec.identity = SessionIdentity.from_row(row)
+        return identity
+
+    async def get_user_session(self)-> dict:
+        return {"username": (await self.get_identity()).username}
+
+    async def get_user(self):
+        return (await self.get_identity()).employee
+
+    async def get_all_employee_info(self, keyword="", type_search=None):
+        try:
+            if (await self.get_identity()).is_emp:
+                return await EMPLOYEE_SELF.fetch_async(self.oracleExec)
+            await self.sync_account_status()
+            return await EMPLOYEE_SEARCH.fetch_async(self.oracleExec, type_search, keyword)
+        except DatabaseError as e:
+            raise ValueError("Cannot get employee info", e)
+
+
+class AsyncAuditService:
+    def __init__(self, oracleExec: AsyncOracleExec):
+        self.oracleExec=oracleExec
+
+    async def get_user_audit(self, username: str) -> list:
+        try:
+            return await self.oracleExec.fetch_all(USER_AUDIT_QUERY, {"username": username.upper()})
+        except Exception as e:
+            raise Exception(f"Lỗi truy vấn Audit: {str(e)}")
+
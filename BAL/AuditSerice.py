@@ -1,13 +1,7 @@
 from BAL.OracleExec import OracleExec
 from oracledb import DatabaseError
 
-class AuditService:
-    def __init__(self, oracleExec: OracleExec):
-        self.oracleExec=oracleExec
-        
-    def get_user_audit(self, username: str) -> list:
-        try:
-            query = f"""SELECT
+USER_AUDIT_QUERY = """SELECT
                         dbusername as username,
                         event_timestamp,
                         action_name,
@@ -16,9 +10,23 @@ class AuditService:
                     FROM unified_audit_trail 
                     WHERE object_schema = 'APP_SERVICE'
                     AND object_name IN ('ORDERS', 'ORDERDETAILS') 
-                    AND dbusername = '{username.upper()}'
+                    AND dbusername = :username
                     ORDER BY event_timestamp DESC"""
-            
-            return self.oracleExec.fetch_all(query, {})
+
+class AuditService:
+    def __init__(self, oracleExec: OracleExec):
+        self.oracleExec=oracleExec
+        
+    def get_user_audit(self, username: str) -> list:
+        try:
+            return self.oracleExec.fetch_all(USER_AUDIT_QUERY, {"username": username.upper()})
+        except Exception as e:
+            raise Exception(f"Lỗi truy vấn Audit: {str(e)}")
+        
+    # đọc audit log theo từng lô để hiển thị dần, không nạp cả unified_audit_trail vào bộ nhớ
+    def iter_user_audit(self, username: str, batch_size: int = 200):
+        try:
+            yield from self.oracleExec.fetch_iter(USER_AUDIT_QUERY, {"username": username.upper()},
+                                                  batch_size=batch_size, prefetchrows=batch_size)
         except Exception as e:
-            raise Exception(f"Lỗi truy vấn Audit: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Lỗi truy vấn Audit: {str(e)}")
@@ -1,6 +1,148 @@
+import re
+import threading
+import time
+from collections import OrderedDict
 from oracledb import DatabaseError
 from BAL.OracleExec import OracleExec
 from models.CustomerModel import CustomerModel
+from BAL.SearchSpec import SearchSpec
+
+# các kiểu tìm kiếm khách hàng được phép (type_search -> cột), so khớp phân biệt hoa thường như trước;
+# tên khách hàng có index Oracle Text cho SEARCH_BACKEND = "text", ngoài ra tìm không dấu trên name_key
+CUSTOMER_SEARCH = SearchSpec(
+    "SELECT id, name, phoneNumber FROM APP_SERVICE.CUSTOMERS",
+    {"name": "name", "phonenumber": "phoneNumber"},
+    order_by="id", seek="id > :last_id", lower=False, text=["name"], keys={"name": "name_key"})
+
+# gợi ý theo tiền tố số điện thoại: INDEX RANGE SCAN trên IX_CUSTOMERS_PHONE
+# (DAL/migrations/007_customers_phone_index.sql), không bao giờ đọc quá :limit dòng
+PHONE_PREFIX_QUERY = """SELECT id, name, phoneNumber FROM APP_SERVICE.CUSTOMERS
+                         WHERE phoneNumber LIKE :prefix || '%'
+                         ORDER BY phoneNumber
+                         FETCH FIRST :limit ROWS ONLY"""
+CUSTOMER_BY_PHONE_QUERY = "SELECT * FROM APP_SERVICE.CUSTOMERS WHERE phoneNumber = :phonenumber"
+CUSTOMER_INSERT_QUERY = """INSERT INTO APP_SERVICE.CUSTOMERS (id, name, phoneNumber) 
+                   VALUES (APP_SERVICE.seq_customers.NEXTVAL, :name, :phonenumber)
+                   RETURNING id INTO :id"""
+
+SET_CONTEXT_BLOCK = """BEGIN
+    sec_mgr.fgac_ctx_pkg.set_phonenumber(:fgac_phone);
+END;"""
+
+# đặt context FGAC và mở truy vấn trong cùng một lần gọi; query là câu SQL cố định của module này
+CONTEXT_QUERY_BLOCK = """BEGIN
+    sec_mgr.fgac_ctx_pkg.set_phonenumber(:fgac_phone);
+    OPEN :rc FOR {query};
+END;"""
+
+
+def normalize_phone(phone) -> str:
+    return re.sub(r"\D", "", phone or "")
+
+
+# tài khoản nhân viên (EMP) bị chính sách FGAC giới hạn: chỉ thấy khách hàng có số điện thoại
+# đã đặt vào context, nên không được gợi ý theo tiền tố và cache phải tách theo context đó
+def is_fgac_restricted(username: str) -> bool:
+    return "emp" in (username or "").lower()
+
+
+class CustomerLookupCache:
+    """Cache LRU có TTL cho các lần tra khách hàng, dùng chung cho cả tiến trình.
+
+    Khoá gồm tài khoản đăng nhập và context FGAC (số điện thoại đã đặt cho tài khoản EMP),
+    nên một tài khoản không bao giờ nhận được dòng mà chính sách FGAC của nó không cho thấy.
+    Kết quả không tìm thấy (None) chỉ được giữ miss_ttl_s giây, vì khách hàng có thể vừa được
+    thêm từ phiên khác; create_customer/checkout của phiên này bỏ các bản đó ngay.
+    Gợi ý theo tiền tố số điện thoại được giữ theo (tài khoản, tiền tố) trong prefix_ttl_s giây,
+    mỗi tiền tố tối đa prefix_rows dòng lấy bằng PHONE_PREFIX_QUERY. Tiền tố đã lấy đủ
+    (ít hơn prefix_rows dòng) thì các tiền tố dài hơn được lọc từ đó, không hỏi lại DB.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl_s: float = 300, miss_ttl_s: float = 5,
+                 prefix_ttl_s: float = 60, prefix_rows: int = 50):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.miss_ttl_s = miss_ttl_s
+        self.prefix_ttl_s = prefix_ttl_s
+        self.prefix_rows = prefix_rows
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # {(tài khoản, tiền tố): (hết hạn, dòng, đã đủ)}
+        self._prefixes = OrderedDict()
+
+    @staticmethod
+    def scope(username: str, phone: str) -> tuple:
+        user = (username or "").upper()
+        return (user, phone if is_fgac_restricted(user) else None)
+
+    # trả về (True, dòng) nếu có trong cache và chưa hết hạn, ngược lại (False, None)
+    def get(self, username: str, phone: str):
+        key = (self.scope(username, phone), phone)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, username: str, phone: str, row):
+        key = (self.scope(username, phone), phone)
+        ttl_s = self.ttl_s if row is not None else self.miss_ttl_s
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_s, row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    # khách hàng mới hoặc vừa đổi: bỏ mọi bản cache của số này và các gợi ý theo tiền tố
+    def invalidate(self, phone: str = None):
+        with self._lock:
+            if phone is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1] == phone]:
+                    del self._entries[key]
+            self._prefixes.clear()
+
+    # sau checkout số này chắc chắn đã có khách hàng: chỉ bỏ các bản cache "không tìm thấy",
+    # khách quen vẫn trúng cache ở lần sau
+    def customer_saved(self, phone: str):
+        with self._lock:
+            known = False
+            for key in [key for key in self._entries if key[1] == phone]:
+                if self._entries[key][1] is None:
+                    del self._entries[key]
+                else:
+                    known = True
+            if not known:
+                self._prefixes.clear()
+
+    # khách hàng có số bắt đầu bằng prefix (đã chuẩn hoá); load(prefix, n) đọc tối đa n dòng từ DB
+    def by_prefix(self, username: str, prefix: str, limit: int, load) -> list:
+        user = (username or "").upper()
+        now = time.monotonic()
+        with self._lock:
+            for size in range(len(prefix), 0, -1):
+                key = (user, prefix[:size])
+                entry = self._prefixes.get(key)
+                if entry is None or entry[0] < now:
+                    self._prefixes.pop(key, None)
+                    continue
+                if size == len(prefix) or entry[2]:
+                    self._prefixes.move_to_end(key)
+                    rows = [row for row in entry[1] if normalize_phone(row["phonenumber"]).startswith(prefix)]
+                    return rows[:limit]
+        rows = load(prefix, self.prefix_rows)
+        with self._lock:
+            self._prefixes[(user, prefix)] = (time.monotonic() + self.prefix_ttl_s, rows,
+                                              len(rows) < self.prefix_rows)
+            while len(self._prefixes) > self.maxsize:
+                self._prefixes.popitem(last=False)
+        return rows[:limit]
+
+
+CUSTOMER_CACHE = CustomerLookupCache()
 
 class CustomerService:
     def __init__(self, oracleExec: OracleExec):
@@ -8,57 +150,95 @@ class CustomerService:
         
     def get_all_customers(self, keyword=None, type_search=None) -> list:
         try:
-            if type_search is None:
-                query="""SELECT id, name, phoneNumber FROM APP_SERVICE.CUSTOMERS ORDER BY id"""
-                
-                return self.oracleExec.fetch_all(query,{})
+            return CUSTOMER_SEARCH.fetch(self.oracleExec, type_search, keyword)
+        except DatabaseError as e:
+            raise ValueError("Can not get customers info ",e)
+    
+    # phân trang keyset theo id, trả về (rows, cursor); cursor None khi đã hết dữ liệu.
+    # Tài khoản EMP tìm theo số điện thoại: số đó được đặt làm context FGAC trong cùng lời gọi.
+    def get_customers_page(self, keyword=None, type_search=None, cursor=None, limit=200, username=None):
+        seek = None if cursor is None else {"last_id": cursor}
+        try:
+            if is_fgac_restricted(username) and type_search == "phonenumber":
+                query, params = CUSTOMER_SEARCH.statement(type_search, keyword, seek is not None, limit)
+                rows = self.fetch_in_context(keyword, query, {**params, **(seek or {})}, arraysize=limit)
             else:
-                query=f"""SELECT id, name, phoneNumber FROM APP_SERVICE.CUSTOMERS
-                                                WHERE {type_search} LIKE :keyword
-                                                ORDER BY id"""
-            
-                return self.oracleExec.fetch_all(query,{"keyword":f"%{keyword}%"})
-        
+                rows = CUSTOMER_SEARCH.fetch(self.oracleExec, type_search, keyword, seek=seek,
+                                             limit=limit, arraysize=limit)
         except DatabaseError as e:
             raise ValueError("Can not get customers info ",e)
+        return rows, (rows[-1]["id"] if len(rows) == limit else None)
         
+    # khách quen được trả từ CUSTOMER_CACHE, không cần set_context và truy vấn lại
     def get_customer_by_phone(self,phonenumber: str, username: str) -> dict|None:
-        
-        if "emp" in username.lower():
-            self.set_context(phonenumber)
+        cache = self.oracleExec.stats.cache("customer_by_phone")
+        found, customer = CUSTOMER_CACHE.get(username, phonenumber)
+        if found:
+            cache.hit()
+            return customer
+        cache.miss()
         
         try:
-            query="""SELECT * FROM APP_SERVICE.CUSTOMERS WHERE phoneNumber = :phonenumber"""
-            
-            return self.oracleExec.fetch_one(query,{"phonenumber":phonenumber})
+            if is_fgac_restricted(username):
+                rows = self.fetch_in_context(phonenumber, CUSTOMER_BY_PHONE_QUERY, {"phonenumber": phonenumber})
+                customer = rows[0] if rows else None
+            else:
+                customer = self.oracleExec.fetch_one(CUSTOMER_BY_PHONE_QUERY, {"phonenumber": phonenumber})
         except DatabaseError as e:
             raise ValueError("Can not get customer info ",e)
+        CUSTOMER_CACHE.put(username, phonenumber, customer)
+        return customer
+    
+    # gợi ý khách hàng theo tiền tố số điện thoại khi đang gõ; tài khoản bị FGAC giới hạn
+    # không được liệt kê khách hàng khác nên luôn nhận danh sách rỗng
+    def suggest_by_phone(self, prefix: str, username: str, limit: int = 10) -> list:
+        prefix = normalize_phone(prefix)
+        if is_fgac_restricted(username) or not prefix:
+            return []
+        try:
+            return CUSTOMER_CACHE.by_prefix(username, prefix, limit, lambda prefix, rows:
+                self.oracleExec.fetch_all(PHONE_PREFIX_QUERY, {"prefix": prefix, "limit": rows}, arraysize=rows))
+        except DatabaseError as e:
+            raise ValueError("Can not get customers info ",e)
         
         
     def create_customer(self, customer: CustomerModel):
         
         try:
-            query = """INSERT INTO APP_SERVICE.CUSTOMERS (id, name, phoneNumber) 
-                   VALUES (APP_SERVICE.seq_customers.NEXTVAL, :name, :phonenumber)
-                   RETURNING id INTO :id"""
-                        
-            return self.oracleExec.execute_with_returning(query,{"name":customer.name,
+            customer_id = self.oracleExec.execute_with_returning(CUSTOMER_INSERT_QUERY,{"name":customer.name,
                                            "phonenumber":customer.phonenumber})
         except DatabaseError as e:
             raise ValueError(f"Can't insert customer with phone number: {customer.phonenumber} ", e)
+        CUSTOMER_CACHE.invalidate(customer.phonenumber)
+        return customer_id
         
+    # context FGAC là trạng thái của session DB: bỏ qua nếu session đang giữ đã có đúng số này,
+    # không commit vì set_phonenumber không ghi dữ liệu
     def set_context(self, phone_number: str):
-        try:
-            query = """
-            BEGIN
-                sec_mgr.fgac_ctx_pkg.set_phonenumber(:phone_number);
-            END;
-            """
-            
-            self.oracleExec.execute(query, {"phone_number": phone_number})
-            
-        except Exception as e:
-            raise ValueError(f"Can't set context for phone number: {phone_number}", e)
+        with self.oracleExec.session():
+            state = self.oracleExec.session_state()
+            if state.get("fgac_phone") == phone_number:
+                return
+            try:
+                self.oracleExec.execute(SET_CONTEXT_BLOCK, {"fgac_phone": phone_number}, commit=False)
+            except Exception as e:
+                state.pop("fgac_phone", None)
+                raise ValueError(f"Can't set context for phone number: {phone_number}", e)
+            state["fgac_phone"] = phone_number
+    
+    # chạy query (SQL cố định, chỉ dùng bind) dưới context FGAC của phone_number. Session đã có
+    # đúng context thì chỉ chạy query; nếu không, đặt context và mở query bằng một khối PL/SQL
+    # trả về ref cursor, một round trip thay vì hai và không commit.
+    def fetch_in_context(self, phone_number: str, query: str, params=None, **fetch_args) -> list:
+        with self.oracleExec.session():
+            state = self.oracleExec.session_state()
+            if state.get("fgac_phone") == phone_number:
+                return self.oracleExec.fetch_all(query, params, **fetch_args)
+            state.pop("fgac_phone", None)
+            rows = self.oracleExec.fetch_cursor(CONTEXT_QUERY_BLOCK.format(query=query),
+                                                {**(params or {}), "fgac_phone": phone_number}, **fetch_args)
+            state["fgac_phone"] = phone_number
+            return rows
  
         
     
@@ -1,7 +1,53 @@
-from DAL.connectDB import get_connection
-from BAL.OracleExec import OracleExec
+from DAL.connectDB import create_pool, create_pool_async, init_session, SEARCH_BACKEND
+from BAL.OracleExec import OracleExec, forget_session
+from BAL.SearchSpec import SearchSpec
+from BAL.AsyncOracleExec import AsyncOracleExec
+from BAL.UserService import UserService
+
+# pool của các phiên đang đăng nhập; mỗi lần đăng nhập luôn xác thực lại với database
+# bằng một pool mới, pool được đóng khi đăng xuất
+_pools = set()
+
+# session mới chưa có context nào: bỏ trạng thái cũ có thể còn giữ cho cùng (sid, serial#)
+def _init_session(conn, requested_tag):
+    init_session(conn, requested_tag)
+    forget_session(conn)
 
 def login(username, password):
-    conn = get_connection(username, password)
-    oracleExec = OracleExec(conn)
-    return oracleExec
\ No newline at end of file
+    SearchSpec.backend = SEARCH_BACKEND
+    pool = create_pool(username, password, session_callback=_init_session)
+    try:
+        # mượn thử một kết nối để xác thực tài khoản ngay khi đăng nhập
+        pool.release(pool.acquire())
+        oracle_exec = _open_session(pool)
+    except Exception:
+        pool.close(force=True)
+        raise
+    _pools.add(pool)
+    return oracle_exec
+
+# mỗi lần đăng nhập là một OracleExec mới; danh tính và vai trò được nạp ngay một lần,
+# service và UI sau đó chỉ đọc lại oracleExec.identity
+def _open_session(pool):
+    oracle_exec = OracleExec(pool)
+    UserService(oracle_exec).identity
+    return oracle_exec
+
+# đóng pool của phiên: tài khoản bị khoá/đổi mật khẩu không dùng lại được session cũ
+def logout(oracle_exec: OracleExec):
+    _pools.discard(oracle_exec.pool)
+    oracle_exec.close()
+
+async def login_async(username, password):
+    pool = create_pool_async(username, password)
+    try:
+        await pool.release(await pool.acquire())
+    except Exception:
+        await pool.close(force=True)
+        raise
+    return AsyncOracleExec(pool)
+
+def close_all():
+    for pool in _pools:
+        pool.close(force=True)
+    _pools.clear()
@@ -0,0 +1,107 @@
+import heapq
+from BAL.TextNormalize import fold
+
+# chữ thường, bỏ dấu, gộp khoảng trắng: "Giày  Thể thao" và "giay the thao" khớp nhau
+def normalize(text) -> str:
+    return " ".join(fold(text).split())
+
+
+def ngrams(text: str, n: int) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    """Chỉ mục đảo n-gram (mặc định trigram) trên một cột văn bản, giữ trong bộ nhớ.
+
+    search(q) trả về các khoá có văn bản chứa q (giống LIKE '%q%' không phân biệt hoa thường và dấu):
+    giao các danh sách posting của n-gram trong q, bắt đầu từ danh sách ngắn nhất, rồi kiểm tra
+    lại bằng phép so khớp chuỗi con. Chuỗi q ngắn hơn n thì lấy hợp các posting của n-gram chứa q.
+    add/remove cập nhật từng khoá nên không phải dựng lại chỉ mục khi dữ liệu thay đổi.
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self.texts = {}
+        self.postings = {}
+        # văn bản ngắn hơn n không có n-gram nào, luôn được kiểm tra trực tiếp
+        self.short = set()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, key, text):
+        text = normalize(text)
+        if self.texts.get(key) == text:
+            return
+        self.remove(key)
+        self.texts[key] = text
+        grams = ngrams(text, self.n)
+        if not grams:
+            self.short.add(key)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        self.short.discard(key)
+        for gram in ngrams(text, self.n):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def clear(self):
+        self.texts.clear()
+        self.postings.clear()
+        self.short.clear()
+
+    def _candidates(self, query: str) -> set:
+        grams = ngrams(query, self.n)
+        if not grams:
+            candidates = set(self.short)
+            for gram, keys in self.postings.items():
+                if query in gram:
+                    candidates |= keys
+            return candidates
+        lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        if not lists[0]:
+            return set()
+        candidates = set(lists[0])
+        for keys in lists[1:]:
+            candidates &= keys
+            if not candidates:
+                break
+        return candidates
+
+    # các khoá khớp với query, chưa xếp hạng
+    def matches(self, query) -> set:
+        query = normalize(query)
+        if not query:
+            return set(self.texts)
+        texts = self.texts
+        return {key for key in self._candidates(query) if query in texts[key]}
+
+    # khoá khớp, xếp hạng: khớp đầu chuỗi > khớp đầu một từ > khớp giữa từ,
+    # sau đó vị trí khớp sớm hơn, văn bản ngắn hơn, rồi theo khoá
+    def search(self, query, limit: int = None) -> list:
+        query = normalize(query)
+        found = self.matches(query)
+        texts = self.texts
+
+        def rank(key):
+            text = texts[key]
+            position = text.find(query)
+            if position == 0:
+                tier = 0
+            elif text[position - 1] == " ":
+                tier = 1
+            else:
+                tier = 2
+            return (tier, position, len(text), key)
+
+        if limit is not None and limit < len(found):
+            return heapq.nsmallest(limit, found, key=rank)
+        return sorted(found, key=rank)
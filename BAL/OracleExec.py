@@ -1,72 +1,388 @@
-from oracledb import Connection
+import threading
+import time
+from contextlib import contextmanager
+from oracledb import Connection, ConnectionPool
+from BAL.RowShapes import apply_row_factory, columns_of, TupleResult, ColumnarResult
+from BAL.QueryStats import QUERY_STATS, QueryStats
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# trạng thái phía server của từng session DB (ví dụ context FGAC đã đặt), theo (session_id, serial_num).
+# Session mới mở trong pool được xoá trạng thái qua forget_session() trong session_callback.
+_session_state = {}
+_session_state_lock = threading.Lock()
+
+def _session_key(conn):
+    session_id = getattr(conn, "session_id", None)
+    return None if session_id is None else (session_id, getattr(conn, "serial_num", None))
+
+def forget_session(conn):
+    key = _session_key(conn)
+    if key is not None:
+        with _session_state_lock:
+            _session_state.pop(key, None)
+
 class OracleExec:
-    def __init__(self, conn: Connection):
-        self.conn = conn
-    
-    # hỗ trợ chuyển đổi kết quả truy vấn thành dict
-    def _dict_factory(self,cursor):
-        if cursor.description:
-            columns = [col[0].lower() for col in cursor.description]
-            cursor.rowfactory = lambda *args: dict(zip(columns, args))
-    
-    # thường dùng cho truy vấn loại: SELECT MANY
-    def fetch_all(self, query: str, params=None) -> list:
-        cursor = self.conn.cursor()
+    def __init__(self, source: Connection | ConnectionPool, stats: QueryStats = None):
+        # nhận một kết nối đơn lẻ hoặc một pool; với pool, mỗi lời gọi mượn
+        # một kết nối rồi trả lại, trừ khi đang ở trong session()
+        if isinstance(source, ConnectionPool):
+            self.pool = source
+            self.conn = None
+        else:
+            self.pool = None
+            self.conn = source
+        self._local = threading.local()
+        # kết nối đơn lẻ không được dùng đồng thời từ nhiều thread
+        self._conn_lock = threading.RLock()
+        # kết nối đang chạy câu lệnh ({id(conn): số lệnh lồng nhau}) và kết nối đã bị interrupt();
+        # chỉ được đọc/ghi khi giữ self._running_lock
+        self._running = {}
+        self._interrupted = set()
+        self._running_lock = threading.Lock()
+        # dạng dòng mặc định, xem BAL/RowShapes.py
+        self.row_shape = "record"
+        # thời gian, số dòng, round trip của từng câu lệnh, xem BAL/QueryStats.py
+        self.stats = stats or QUERY_STATS
+        # danh tính của phiên đăng nhập (BAL/UserService.SessionIdentity), nạp một lần
+        # sau khi đăng nhập và bỏ đi khi đăng xuất/kết nối lại
+        self.identity = None
+
+    # mượn kết nối cho một lời gọi; ưu tiên kết nối đang được giữ bởi session()
+    @contextmanager
+    def _acquire(self):
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            yield pinned
+        elif self.pool is None:
+            with self._conn_lock:
+                yield self.conn
+        else:
+            conn = self.pool.acquire()
+            try:
+                yield conn
+            finally:
+                with self._running_lock:
+                    interrupted = id(conn) in self._interrupted
+                    self._interrupted.discard(id(conn))
+                # break gửi tới session có thể còn treo lại cho lệnh sau (ORA-01013):
+                # không trả kết nối đã bị interrupt() về pool cho lời gọi khác
+                if interrupted:
+                    self.pool.drop(conn)
+                else:
+                    self.pool.release(conn)
+
+    # giữ một kết nối cho cả một nhóm lệnh (unit of work), ví dụ set_context rồi truy vấn
+    @contextmanager
+    def session(self):
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            yield pinned
+            return
+        with self._acquire() as conn:
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+
+    # gom nhiều lệnh vào một giao dịch, chỉ commit một lần khi ra khỏi khối with ngoài cùng.
+    # Khối lồng nhau dùng SAVEPOINT: lỗi trong khối con chỉ rollback phần của khối con.
+    @contextmanager
+    def transaction(self):
+        with self.session() as conn:
+            depth = getattr(self._local, "tx_depth", 0)
+            savepoint = None
+            if depth:
+                savepoint = f"sp_{depth}"
+                self._run(conn, f"SAVEPOINT {savepoint}")
+            self._local.tx_depth = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                if savepoint:
+                    self._run(conn, f"ROLLBACK TO SAVEPOINT {savepoint}")
+                else:
+                    conn.rollback()
+                raise
+            else:
+                if not savepoint:
+                    with self._measure(conn, "COMMIT") as op:
+                        op.round_trips = 0
+                        self._timed_commit(conn, op)
+            finally:
+                self._local.tx_depth = depth
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "tx_depth", 0) > 0
+
+    # dict trạng thái của session DB đang được giữ bởi session(); ngoài session() không có
+    # kết nối cố định nên trả về dict rỗng dùng một lần (caller luôn phải làm lại từ đầu)
+    def session_state(self) -> dict:
+        conn = getattr(self._local, "conn", None)
+        key = None if conn is None else _session_key(conn)
+        if key is None:
+            return {}
+        with _session_state_lock:
+            return _session_state.setdefault(key, {})
+
+    def _run(self, conn, statement: str):
+        cursor = conn.cursor()
         try:
-            cursor.execute(query, params or {})
-            self._dict_factory(cursor)
-            return cursor.fetchall()
+            cursor.execute(statement)
         finally:
             cursor.close()
-    
+
+    # đo một câu lệnh: thời gian, số dòng (op.rows), round trip, lỗi -> self.stats (QueryStats.measure).
+    # Trong khối này kết nối được đánh dấu đang chạy lệnh để interrupt() biết có thể ngắt
+    @contextmanager
+    def _measure(self, conn, statement: str, arraysize=None, prefetchrows=None):
+        with self.stats.measure(statement, conn, arraysize, prefetchrows) as op:
+            with self._running_lock:
+                self._running[id(conn)] = self._running.get(id(conn), 0) + 1
+            try:
+                yield op
+            finally:
+                with self._running_lock:
+                    count = self._running.pop(id(conn)) - 1
+                    if count:
+                        self._running[id(conn)] = count
+
+    # ngắt câu lệnh đang chạy trên conn (Connection.cancel()); kết nối đang rảnh thì không gửi
+    # break, vì break đó sẽ làm hỏng lệnh kế tiếp của bất kỳ ai mượn lại kết nối từ pool
+    def interrupt(self, conn) -> bool:
+        with self._running_lock:
+            if id(conn) not in self._running:
+                return False
+            if self.pool is not None:
+                self._interrupted.add(id(conn))
+            conn.cancel()
+            return True
+
+    def _timed_commit(self, conn, op):
+        started = time.perf_counter()
+        conn.commit()
+        op.commit_ms = (time.perf_counter() - started) * 1000
+        op.round_trips += 1
+
+    # trong transaction() thì việc commit/rollback do khối with quyết định
+    def _commit(self, conn, op=None):
+        if not self.in_transaction():
+            if op is None:
+                conn.commit()
+            else:
+                self._timed_commit(conn, op)
+
+    def _rollback(self, conn):
+        if not self.in_transaction():
+            conn.rollback()
+
+    def pool_status(self) -> dict:
+        if self.pool is None:
+            return {"opened": 1, "busy": 0, "max": 1}
+        return {"opened": self.pool.opened, "busy": self.pool.busy, "max": self.pool.max}
+
+    def reset_identity(self):
+        self.identity = None
+
+    def close(self):
+        self.identity = None
+        if self.pool is not None:
+            self.pool.close(force=True)
+        else:
+            self.conn.close()
+
+    # chọn dạng dòng cho cursor; "tuple" và "columns" giữ nguyên tuple của driver
+    def _row_factory(self, cursor, shape=None):
+        apply_row_factory(cursor, shape or self.row_shape)
+
+    # arraysize: số dòng mỗi lần fetch; prefetchrows: số dòng trả về ngay cùng lệnh execute
+    def _tune(self, cursor, arraysize=None, prefetchrows=None):
+        if arraysize:
+            cursor.arraysize = arraysize
+        if prefetchrows is not None:
+            cursor.prefetchrows = prefetchrows
+
+    # thường dùng cho truy vấn loại: SELECT MANY
+    def fetch_all(self, query: str, params=None, arraysize=None, prefetchrows=None, shape=None) -> list:
+        shape = shape or self.row_shape
+        with self._acquire() as conn, self._measure(conn, query, arraysize, prefetchrows) as op:
+            cursor = conn.cursor()
+            try:
+                self._tune(cursor, arraysize, prefetchrows)
+                cursor.execute(query, params or {})
+                if shape == "tuple":
+                    result = TupleResult(columns_of(cursor), cursor.fetchall())
+                elif shape == "columns":
+                    result = ColumnarResult.from_rows(columns_of(cursor), cursor.fetchall())
+                else:
+                    self._row_factory(cursor, shape)
+                    result = cursor.fetchall()
+                op.rows = len(result)
+                return result
+            finally:
+                cursor.close()
+
+    # đọc dần kết quả bằng fetchmany thay vì nạp toàn bộ vào bộ nhớ;
+    # batch_size=None thì yield từng dòng, ngược lại yield từng lô batch_size dòng.
+    # Kết nối được giữ cho tới khi duyệt hết hoặc generator bị đóng
+    # (thời gian đo được gồm cả thời gian bên gọi xử lý từng lô).
+    def fetch_iter(self, query: str, params=None, batch_size=None, arraysize=None, prefetchrows=None, shape=None):
+        arraysize = arraysize or batch_size or 500
+        with self._acquire() as conn, self._measure(conn, query, arraysize, prefetchrows) as op:
+            cursor = conn.cursor()
+            try:
+                self._tune(cursor, arraysize, prefetchrows)
+                cursor.execute(query, params or {})
+                self._row_factory(cursor, shape)
+                while True:
+                    rows = cursor.fetchmany(batch_size or arraysize)
+                    if not rows:
+                        break
+                    op.rows += len(rows)
+                    if batch_size:
+                        yield rows
+                    else:
+                        yield from rows
+            finally:
+                cursor.close()
+
+    # truy vấn phân tích: trả về ColumnarResult với các cột là mảng numpy.
+    # Nếu driver hỗ trợ fetch_df_all (python-oracledb >= 3) và có pyarrow thì dữ liệu
+    # đi thẳng từ buffer Arrow, không tạo đối tượng Python cho từng dòng.
+    def fetch_columns(self, query: str, params=None, arraysize=None) -> ColumnarResult:
+        arraysize = arraysize or 10000
+        with self._acquire() as conn, self._measure(conn, query, arraysize) as op:
+            if pyarrow is not None and hasattr(conn, "fetch_df_all"):
+                table = pyarrow.table(conn.fetch_df_all(query, params or {}, arraysize=arraysize))
+                columns = tuple(name.lower() for name in table.column_names)
+                data = {name: table.column(i).to_numpy() for i, name in enumerate(columns)}
+                op.rows = table.num_rows
+                return ColumnarResult(columns, data)
+
+            cursor = conn.cursor()
+            try:
+                self._tune(cursor, arraysize)
+                cursor.execute(query, params or {})
+                result = ColumnarResult.from_rows(columns_of(cursor), cursor.fetchall()).as_numpy()
+                op.rows = len(result)
+                return result
+            finally:
+                cursor.close()
+
+    # chạy khối PL/SQL mở một ref cursor vào bind :rc rồi đọc dòng từ cursor đó; prefetchrows
+    # dòng đầu về cùng lệnh execute nên kết quả nhỏ chỉ tốn một round trip. Không commit.
+    def fetch_cursor(self, block: str, params=None, arraysize=None, prefetchrows=None, shape=None) -> list:
+        prefetchrows = prefetchrows or arraysize or 100
+        with self._acquire() as conn, self._measure(conn, block, arraysize, prefetchrows) as op:
+            cursor = conn.cursor()
+            ref_cursor = conn.cursor()
+            try:
+                self._tune(ref_cursor, arraysize, prefetchrows)
+                cursor.execute(block, {**(params or {}), "rc": ref_cursor})
+                self._row_factory(ref_cursor, shape)
+                rows = ref_cursor.fetchall()
+                op.rows = len(rows)
+                return rows
+            finally:
+                ref_cursor.close()
+                cursor.close()
+
     # thường dùng cho truy vấn loại: SELECT ONE
-    def fetch_one(self, query: str, params=None) -> dict:
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, params or {})
-            self._dict_factory(cursor)
-            return cursor.fetchone()
-        finally:
-            cursor.close()
-    
+    def fetch_one(self, query: str, params=None, shape=None) -> dict:
+        with self._acquire() as conn, self._measure(conn, query) as op:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params or {})
+                self._row_factory(cursor, shape)
+                row = cursor.fetchone()
+                op.rows = 0 if row is None else 1
+                return row
+            finally:
+                cursor.close()
+
     # thường dùng cho truy vấn loại: INSERT, UPDATE, DELETE
-    def execute(self, query: str, params=None) -> int:
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute(query, params or {})
-            self.conn.commit()
-            return cursor.rowcount
-        except Exception as e:
-            self.conn.rollback()
-            raise e
-        finally:
-            cursor.close()
-    
+    # commit=False cho lệnh không cần commit (ví dụ đặt context), tiết kiệm một round trip
+    def execute(self, query: str, params=None, commit: bool = True) -> int:
+        with self._acquire() as conn, self._measure(conn, query) as op:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params or {})
+                op.rows = max(cursor.rowcount, 0)
+                op.round_trips = 1
+                if commit:
+                    self._commit(conn, op)
+                return cursor.rowcount
+            except Exception as e:
+                self._rollback(conn)
+                raise e
+            finally:
+                cursor.close()
+
     def execute_many(self, query: str, param_list: list) -> int:
-        cursor = self.conn.cursor()
-        try:
-            cursor.executemany(query, param_list)
-            self.conn.commit()
-            return cursor.rowcount
-        except Exception as e:
-            self.conn.rollback()
-            raise e
-        finally:
-            cursor.close()
-    
+        with self._acquire() as conn, self._measure(conn, query) as op:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(query, param_list)
+                op.rows = max(cursor.rowcount, 0)
+                op.round_trips = 1
+                self._commit(conn, op)
+                return cursor.rowcount
+            except Exception as e:
+                self._rollback(conn)
+                raise e
+            finally:
+                cursor.close()
+
     def execute_with_returning(self, query: str, params=None, returning_param: str = "id") -> int:
-        cursor = self.conn.cursor()
-        try:
-            returning_var = cursor.var(int)
-            if params is None:
-                params = {}
-            params[returning_param] = returning_var
-            
-            cursor.execute(query, params)
-            self.conn.commit()
-            return returning_var.getvalue()
-        except Exception as e:
-            self.conn.rollback()
-            raise e
-        finally:
-            cursor.close()
\ No newline at end of file
+        with self._acquire() as conn, self._measure(conn, query) as op:
+            cursor = conn.cursor()
+            try:
+                returning_var = cursor.var(int)
+                if params is None:
+                    params = {}
+                params[returning_param] = returning_var
+
+                cursor.execute(query, params)
+                op.rows = max(cursor.rowcount, 0)
+                op.round_trips = 1
+                self._commit(conn, op)
+                return returning_var.getvalue()
+            except Exception as e:
+                self._rollback(conn)
+                raise e
+            finally:
+                cursor.close()
+
+    # chạy một khối PL/SQL trong một round trip.
+    # arrays: {tên: (kiểu, list)} bind dạng mảng PL/SQL (index-by table)
+    # out:    {tên: kiểu} cho biến OUT đơn, {tên: (kiểu, số phần tử)} cho mảng OUT
+    # Ngoài transaction() thì commit được gửi kèm luôn lệnh execute (autocommit).
+    def execute_plsql(self, block: str, params=None, arrays=None, out=None) -> dict:
+        with self._acquire() as conn, self._measure(conn, block):
+            cursor = conn.cursor()
+            autocommit = conn.autocommit
+            try:
+                binds = dict(params or {})
+                for name, (typ, values) in (arrays or {}).items():
+                    binds[name] = cursor.arrayvar(typ, list(values))
+                out_vars = {}
+                for name, typ in (out or {}).items():
+                    if isinstance(typ, tuple):
+                        out_vars[name] = cursor.arrayvar(typ[0], typ[1])
+                    else:
+                        out_vars[name] = cursor.var(typ)
+                binds.update(out_vars)
+
+                conn.autocommit = not self.in_transaction()
+                cursor.execute(block, binds)
+                return {name: var.getvalue() for name, var in out_vars.items()}
+            except Exception as e:
+                self._rollback(conn)
+                raise e
+            finally:
+                conn.autocommit = autocommit
+                cursor.close()
@@ -1,7 +1,114 @@
 from BAL.OracleExec import OracleExec
-from models.OrderModel import OrderModel
-from models.OrderDetailModel import OrderDetailModel
-from oracledb import DatabaseError
+from oracledb import DatabaseError, NUMBER
+import csv
+from datetime import datetime
+from BAL.SearchSpec import SearchSpec
+from BAL.ProductCatalog import PRODUCT_CATALOG
+from BAL.CustomerService import CUSTOMER_CACHE
+
+# các kiểu tìm kiếm đơn hàng được phép (type_search -> cột), mới nhất trước
+ORDER_SEARCH = SearchSpec(
+    """SELECT 
+        o.id AS id, 
+        o.orderDateTime AS order_date, 
+        c.name AS customer_name, 
+        c.phoneNumber AS customer_phone, 
+        e.name AS employee_name, 
+        e.username AS employee_username,
+        o.total AS total
+    FROM APP_SERVICE.ORDERS o
+    JOIN APP_SERVICE.CUSTOMERS c ON o.cusId = c.id
+    JOIN APP_SERVICE.EMPLOYEES e ON o.empId = e.id""",
+    {"customer_name": "c.name", "customer_phone": "c.phoneNumber",
+     "employee_name": "e.name", "employee_username": "e.username"},
+    order_by="o.orderDateTime DESC, o.id DESC", text=["customer_name", "employee_name"],
+    keys={"customer_name": "c.name_key", "employee_name": "e.name_key"},
+    seek="""o.orderDateTime <= :last_date
+  AND (o.orderDateTime < :last_date OR o.id < :last_id)""")
+# câu lệnh dùng chung cho OrderService và AsyncOrderService
+ORDER_DETAIL_QUERY = """SELECT 
+                    od.id AS id, 
+                    od.orderId AS order_id, 
+                    p.name AS product_name,
+                    od.unitPrice AS unit_price, 
+                    od.quantity AS quantity,
+                    (od.unitPrice * od.quantity) AS subtotal
+                FROM APP_SERVICE.ORDERDETAILS od
+                JOIN APP_SERVICE.PRODUCTS p ON od.productId = p.id
+                WHERE od.orderId = :order_id"""
+
+# Thanh toán trong một lần gọi server: tìm/tạo khách theo số điện thoại, tạo đơn,
+# trừ tồn kho (báo lỗi nếu không đủ) và thêm chi tiết đơn bằng FORALL trên mảng bind.
+# Khối PL/SQL là một lệnh nguyên tử: lỗi ở bất kỳ bước nào thì không có gì được ghi.
+# Đây là đường ghi đơn hàng duy nhất, dùng chung cho OrderService và AsyncOrderService.
+CHECKOUT_BLOCK = """
+DECLARE
+    l_product_ids DBMS_SQL.NUMBER_TABLE := :product_ids;
+    l_prices      DBMS_SQL.NUMBER_TABLE := :unit_prices;
+    l_quantities  DBMS_SQL.NUMBER_TABLE := :quantities;
+    l_stock       DBMS_SQL.NUMBER_TABLE;
+    l_cus_id      NUMBER;
+    l_emp_id      NUMBER;
+    l_order_id    NUMBER;
+    l_total       NUMBER := 0;
+BEGIN
+    IF INSTR(USER, 'EMP') > 0 THEN
+        sec_mgr.fgac_ctx_pkg.set_phonenumber(:phone);
+    END IF;
+
+    BEGIN
+        SELECT id INTO l_cus_id FROM APP_SERVICE.CUSTOMERS WHERE phoneNumber = :phone;
+    EXCEPTION
+        WHEN NO_DATA_FOUND THEN
+            INSERT INTO APP_SERVICE.CUSTOMERS (id, name, phoneNumber)
+            VALUES (APP_SERVICE.seq_customers.NEXTVAL, :customer_name, :phone)
+            RETURNING id INTO l_cus_id;
+    END;
+
+    SELECT id INTO l_emp_id FROM APP_SERVICE.EMPLOYEES WHERE UPPER(username) = USER;
+
+    FORALL i IN 1 .. l_product_ids.COUNT
+        UPDATE APP_SERVICE.PRODUCTS 
+           SET stockQuantity = stockQuantity - l_quantities(i)
+         WHERE id = l_product_ids(i) AND stockQuantity >= l_quantities(i)
+        RETURNING stockQuantity BULK COLLECT INTO l_stock;
+
+    FOR i IN 1 .. l_product_ids.COUNT LOOP
+        IF SQL%BULK_ROWCOUNT(i) = 0 THEN
+            RAISE_APPLICATION_ERROR(-20001, 'Product ' || l_product_ids(i) || ' is out of stock');
+        END IF;
+    END LOOP;
+
+    FOR i IN 1 .. l_product_ids.COUNT LOOP
+        l_total := l_total + l_prices(i) * l_quantities(i);
+    END LOOP;
+
+    INSERT INTO APP_SERVICE.ORDERS (id, cusId, empId, orderDateTime, total)
+    VALUES (APP_SERVICE.seq_orders.NEXTVAL, l_cus_id, l_emp_id, :order_date, l_total)
+    RETURNING id INTO l_order_id;
+
+    FORALL i IN 1 .. l_product_ids.COUNT
+        INSERT INTO APP_SERVICE.ORDERDETAILS (id, orderId, productId, unitPrice, quantity)
+        VALUES (APP_SERVICE.seq_orderdetails.NEXTVAL, l_order_id, l_product_ids(i), l_prices(i), l_quantities(i));
+
+    :order_id := l_order_id;
+    :new_stock := l_stock;
+END;"""
+
+# cart: [{"id": ..., "price": ..., "quantity": ...}] như MainForm.cart_items -> (params, arrays, out)
+def checkout_binds(cart: list, customer_phone: str, customer_name: str) -> tuple:
+    params = {"phone": customer_phone, "customer_name": customer_name, "order_date": datetime.now()}
+    arrays = {
+        "product_ids": (NUMBER, [item["id"] for item in cart]),
+        "unit_prices": (NUMBER, [item["price"] for item in cart]),
+        "quantities": (NUMBER, [item["quantity"] for item in cart])
+    }
+    return params, arrays, {"order_id": int, "new_stock": (NUMBER, len(cart))}
+
+# (order_id, {product_id: tồn kho mới})
+def checkout_result(cart: list, result: dict) -> tuple:
+    new_stock = {item["id"]: int(stock) for item, stock in zip(cart, result["new_stock"])}
+    return int(result["order_id"]), new_stock
 
 class OrderService:
     def __init__(self, oracleExec: OracleExec):
@@ -9,90 +116,103 @@ class OrderService:
         
     def load_orders(self, keyword="", type_search=None):
         try:
-            base_query = """SELECT 
-                            o.id AS id, 
-                            o.orderDateTime AS order_date, 
-                            c.name AS customer_name, 
-                            c.phoneNumber AS customer_phone, 
-                            e.name AS employee_name, 
-                            e.username AS employee_username,
-                            (SELECT SUM(od.unitPrice * od.quantity) 
-                            FROM APP_SERVICE.ORDERDETAILS od 
-                            WHERE od.orderId = o.id) AS total
-                        FROM APP_SERVICE.ORDERS o
-                        JOIN APP_SERVICE.CUSTOMERS c ON o.cusId = c.id
-                        JOIN APP_SERVICE.EMPLOYEES e ON o.empId = e.id
-                    """
-
-            if type_search is None:
-                query = f"{base_query}"
-                return self.oracleExec.fetch_all(query)
-            else:
-                query = f"""
-                    {base_query} 
-                    WHERE LOWER({type_search}) LIKE :keyword
-                """
-                return self.oracleExec.fetch_all(query, {"keyword": f"%{keyword.lower()}%"})
-
+            return ORDER_SEARCH.fetch(self.oracleExec, type_search, keyword)
         except DatabaseError as e:
             print(f"Database Error: {e}")
             raise ValueError("Cannot get order info", e)
     
+    # phân trang keyset cho lịch sử đơn hàng, mới nhất trước, theo (orderDateTime, id).
+    # cursor là (order_date, id) của dòng cuối trang trước, None khi đã hết dữ liệu.
+    # Điều kiện "orderDateTime <= :last_date" đi theo index ORDERS(orderDateTime, id)
+    # (DAL/migrations/001_orders_keyset_index.sql) nên trang thứ n cũng nhanh như trang đầu, khác OFFSET.
+    def load_orders_page(self, keyword="", type_search=None, cursor=None, limit=200):
+        seek = None if cursor is None else {"last_date": cursor[0], "last_id": cursor[1]}
+        try:
+            rows = ORDER_SEARCH.fetch(self.oracleExec, type_search, keyword, seek=seek,
+                                      limit=limit, arraysize=limit)
+        except DatabaseError as e:
+            raise ValueError("Cannot get order info", e)
+        if len(rows) < limit:
+            return rows, None
+        return rows, (rows[-1]["order_date"], rows[-1]["id"])
+    
     def load_orders_detail(self, order_id):
         try:
-            query="""SELECT 
-                    od.id AS id, 
-                    od.orderId AS order_id, 
-                    p.name AS product_name,
-                    od.unitPrice AS unit_price, 
-                    od.quantity AS quantity,
-                    (od.unitPrice * od.quantity) AS subtotal
-                FROM APP_SERVICE.ORDERDETAILS od
-                JOIN APP_SERVICE.PRODUCTS p ON od.productId = p.id
-                WHERE od.orderId = :order_id"""
-                
-            return self.oracleExec.fetch_all(query,{"order_id":order_id})
+            return self.oracleExec.fetch_all(ORDER_DETAIL_QUERY,{"order_id":order_id})
         except DatabaseError as e:
             raise ValueError(f"Can't get order detail of {order_id}")
         
-    def create_order(self, order: OrderModel):
-        query="""INSERT INTO APP_SERVICE.ORDERS (id, cusId, empId, orderDateTime)
-                 VALUES (APP_SERVICE.seq_orders.NEXTVAL, :cusid, :empid, :orderdatetime)
-                 RETURNING id INTO :id"""
+    # xuất toàn bộ đơn hàng ra CSV theo từng lô, bộ nhớ không tăng theo số đơn
+    def export_orders_csv(self, path: str, batch_size: int = 1000) -> int:
+        query = """SELECT 
+                    o.id AS id, 
+                    o.orderDateTime AS order_date, 
+                    o.cusId AS customer_id, 
+                    o.empId AS employee_id
+                FROM APP_SERVICE.ORDERS o
+                ORDER BY o.id"""
+        count = 0
         try:
-            return self.oracleExec.execute_with_returning(query, {
-                "cusid": order.cus_id,
-                "empid": order.emp_id,
-                "orderdatetime": order.order_date_time
-            })
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = None
+                for rows in self.oracleExec.fetch_iter(query, {}, batch_size=batch_size):
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+                        writer.writeheader()
+                    writer.writerows(rows)
+                    count += len(rows)
+            return count
         except DatabaseError as e:
-            raise DatabaseError(f"Error creating order: {e}")
+            raise ValueError("Cannot export orders", e)
         
-    def create_order_detail(self, order_detail: OrderDetailModel):
-        query="""INSERT INTO APP_SERVICE.ORDERDETAILS (id, orderId, productId, unitPrice, quantity)
-                 VALUES (APP_SERVICE.seq_orderdetails.NEXTVAL, :orderid, :productid, :unitprice, :quantity)"""
+    # dữ liệu thô cho báo cáo: mỗi dòng chi tiết đơn hàng, lấy theo cột
+    def _load_sales_columns(self, start: datetime, end: datetime):
+        query = """SELECT 
+                    TRUNC(o.orderDateTime) AS order_day,
+                    od.productId AS product_id,
+                    od.quantity AS quantity,
+                    od.unitPrice * od.quantity AS revenue
+                FROM APP_SERVICE.ORDERS o
+                JOIN APP_SERVICE.ORDERDETAILS od ON od.orderId = o.id
+                WHERE o.orderDateTime >= :start_date AND o.orderDateTime < :end_date"""
         try:
-            self.oracleExec.execute(query,{
-                "orderid": order_detail.order_id,
-                "productid": order_detail.product_id,
-                "unitprice": order_detail.unit_price,
-                "quantity": order_detail.quantity
-            })
-            
-            self.buy_product(id=order_detail.product_id, quantity=order_detail.quantity)
-            
+            return self.oracleExec.fetch_columns(query, {"start_date": start, "end_date": end})
         except DatabaseError as e:
-            raise DatabaseError(f"Error creating order detail order_detail: {e}")
+            raise ValueError("Cannot load sales report", e)
+    
+    # doanh thu theo ngày trong khoảng [start, end), đọc thẳng ORDERS.total, không cần ORDERDETAILS
+    def revenue_by_day(self, start: datetime, end: datetime):
+        query = """SELECT 
+                    TRUNC(o.orderDateTime) AS order_day,
+                    o.total AS revenue
+                FROM APP_SERVICE.ORDERS o
+                WHERE o.orderDateTime >= :start_date AND o.orderDateTime < :end_date"""
+        try:
+            sales = self.oracleExec.fetch_columns(query, {"start_date": start, "end_date": end})
+        except DatabaseError as e:
+            raise ValueError("Cannot load sales report", e)
+        return sales.group_sum("order_day", "revenue")
+    
+    # số lượng bán và doanh thu theo sản phẩm trong khoảng [start, end)
+    def revenue_by_product(self, start: datetime, end: datetime):
+        sales = self._load_sales_columns(start, end)
+        return sales.group_sum("product_id", "quantity", "revenue")
         
+    # thanh toán giỏ hàng bằng CHECKOUT_BLOCK; trả về (order_id, {product_id: tồn kho mới})
+    def checkout(self, cart: list, customer_phone: str, customer_name: str):
+        # khối PL/SQL đặt context FGAC (tài khoản EMP) trên session đang giữ, ghi lại để
+        # CustomerService không đặt lại cùng số điện thoại ở lần tra cứu sau
+        with self.oracleExec.session():
+            state = self.oracleExec.session_state()
+            state.pop("fgac_phone", None)
+            try:
+                result = self.oracleExec.execute_plsql(CHECKOUT_BLOCK, *checkout_binds(cart, customer_phone, customer_name))
+            except DatabaseError as e:
+                raise DatabaseError(f"Error during checkout: {e}")
+            state["fgac_phone"] = customer_phone
         
-    def buy_product(self, id, quantity):
-        try:
-            query = """UPDATE APP_SERVICE.PRODUCTS 
-                       SET stockQuantity = stockQuantity - :quantity 
-                       WHERE id = :id"""
-            
-            rows_updated = self.oracleExec.execute(query, {"quantity": quantity, "id": id})
-            print(rows_updated)
-            
-        except Exception as e:
-            raise ValueError(f"Cannot update stock quantity of product {id}: {e}")
\ No newline at end of file
+        order_id, new_stock = checkout_result(cart, result)
+        PRODUCT_CATALOG.stock_changed(self.oracleExec, new_stock)
+        # checkout có thể vừa tạo khách hàng mới cho số điện thoại này
+        CUSTOMER_CACHE.customer_saved(customer_phone)
+        return order_id, new_stock
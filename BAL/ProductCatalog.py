@@ -0,0 +1,188 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from BAL.RowShapes import record_class
+from BAL.NgramIndex import NgramIndex
+
+# last_modified là cột ẩn có index (DAL/migrations/006_products_last_modified.sql)
+CATALOG_QUERY = "SELECT p.*, p.last_modified AS modified_at FROM APP_SERVICE.PRODUCTS p"
+DELTA_QUERY = CATALOG_QUERY + " WHERE p.last_modified > :since"
+# delta lấy lùi lại một khoảng để không sót dòng của giao dịch commit muộn hơn mốc đã thấy
+DELTA_OVERLAP = timedelta(seconds=60)
+EPOCH = datetime(2000, 1, 1)
+
+# các kiểu tìm kiếm sản phẩm được phép, giống PRODUCT_SEARCH (type_search -> cột)
+SEARCH_COLUMNS = {"name": "name", "id": "id", "categoryid": "categoryid", "brandid": "brandid"}
+
+
+class ProductCatalog:
+    """Bảng PRODUCTS giữ trong bộ nhớ, dùng chung cho cả tiến trình.
+
+    Lần đầu nạp toàn bộ bảng, sau đó cứ refresh_s giây mới hỏi lại DB và chỉ lấy các dòng
+    có last_modified mới hơn mốc đã thấy (trừ đi DELTA_OVERLAP), bằng INDEX RANGE SCAN trên
+    IX_PRODUCTS_LAST_MODIFIED. Delta có thể kèm lại vài dòng đã có; ghi đè lại cũng không sai.
+    Câu truy vấn chạy ngoài self._lock và chỉ một thread đọc DB tại một thời điểm: trong lúc
+    đó các thread khác vẫn tìm kiếm trên dữ liệu cũ, chỉ lần nạp đầu tiên là phải chờ.
+
+    Các thay đổi do chính ứng dụng ghi (sửa, ngừng bán, trừ tồn kho) được áp ngay vào cache
+    nên tìm kiếm và hiển thị tồn kho không cần round trip. Thay đổi nằm trong transaction()
+    chưa chắc được commit nên không áp, chỉ đánh dấu để lần đọc sau lấy delta.
+
+    Tên các sản phẩm đang bán được đánh chỉ mục trigram (BAL/NgramIndex.py), cập nhật
+    cùng lúc với cache, nên tìm theo tên không phải duyệt cả danh sách.
+    """
+
+    def __init__(self, refresh_s: float = 5.0):
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        # chỉ một thread chạy CATALOG_QUERY/DELTA_QUERY tại một thời điểm
+        self._refresh_lock = threading.Lock()
+        self._products = {}
+        self._sorted = None
+        self._record = None
+        self._mark = None
+        self._checked = 0.0
+        # tăng mỗi lần reset(): kết quả của lần đọc đang chạy dở khi đó bị bỏ
+        self._generation = 0
+        self._names = NgramIndex()
+
+    # danh sách sản phẩm (kể cả đã ngừng bán) theo id, làm mới từ DB nếu cần
+    def products(self, oracle_exec) -> list:
+        self._ensure(oracle_exec)
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = [self._products[key] for key in sorted(self._products)]
+            return self._sorted
+
+    def get(self, oracle_exec, product_id):
+        self._ensure(oracle_exec)
+        with self._lock:
+            return self._products.get(product_id)
+
+    # lọc giống PRODUCT_SEARCH: LIKE '%keyword%' không phân biệt hoa thường trên cột được chọn
+    def search(self, oracle_exec, keyword="", type_search=None, active_only=True) -> list:
+        if type_search is not None and type_search not in SEARCH_COLUMNS:
+            raise ValueError(f"Unsupported search column: {type_search}")
+        if type_search == "name" and keyword and active_only:
+            self._ensure(oracle_exec)
+            with self._lock:
+                return [self._products[key] for key in sorted(self._names.matches(keyword))]
+        rows = self.products(oracle_exec)
+        if active_only:
+            rows = [row for row in rows if row["active"]]
+        if type_search is not None and keyword:
+            column = SEARCH_COLUMNS[type_search]
+            keyword = keyword.lower()
+            rows = [row for row in rows
+                    if row[column] is not None and keyword in str(row[column]).lower()]
+        return rows
+
+    # sản phẩm đang bán có tên chứa keyword, khớp tốt nhất trước (gợi ý khi gõ)
+    def suggest(self, oracle_exec, keyword="", limit: int = None) -> list:
+        if not keyword:
+            return self.search(oracle_exec)[:limit]
+        self._ensure(oracle_exec)
+        with self._lock:
+            return [self._products[key] for key in self._names.search(keyword, limit)]
+
+    def _fresh(self) -> bool:
+        return self._mark is not None and time.monotonic() - self._checked < self.refresh_s
+
+    # gọi khi không giữ self._lock; truy vấn DB xong mới lấy lock để gộp kết quả
+    def _ensure(self, oracle_exec):
+        cache = oracle_exec.stats.cache("product_catalog")
+        with self._lock:
+            fresh, loaded = self._fresh(), self._mark is not None
+        if fresh:
+            cache.hit()
+            return
+        # thread khác đang làm mới: dùng tạm dữ liệu cũ, chỉ chờ nếu chưa có gì
+        if not self._refresh_lock.acquire(blocking=not loaded):
+            cache.hit()
+            return
+        try:
+            with self._lock:
+                if self._fresh():
+                    cache.hit()
+                    return
+                mark, generation = self._mark, self._generation
+            cache.miss()
+            started = time.monotonic()
+            if mark is None:
+                result = oracle_exec.fetch_all(CATALOG_QUERY, shape="tuple")
+            else:
+                result = oracle_exec.fetch_all(DELTA_QUERY, {"since": mark - DELTA_OVERLAP}, shape="tuple")
+            with self._lock:
+                if generation != self._generation:
+                    return
+                if mark is None:
+                    self._products = {}
+                    self._names.clear()
+                self._merge(result)
+                self._checked = started
+        finally:
+            self._refresh_lock.release()
+
+    def _merge(self, result):
+        mark_index = result.index["modified_at"]
+        columns = tuple(name for name in result.columns if name != "modified_at")
+        self._record = record_class(columns)
+        mark = self._mark or EPOCH
+        for row in result:
+            mark = max(mark, row[mark_index] or EPOCH)
+            self._store(self._record._make(value for i, value in enumerate(row) if i != mark_index))
+        if result:
+            self._sorted = None
+        self._mark = mark
+
+    def _store(self, product):
+        self._products[product["id"]] = product
+        if product["active"]:
+            self._names.add(product["id"], product["name"])
+        else:
+            self._names.remove(product["id"])
+
+    # áp thay đổi đã commit vào cache; trong transaction thì chỉ hẹn lấy delta ở lần đọc sau
+    def _apply(self, oracle_exec, product_id, **changes):
+        with self._lock:
+            if oracle_exec.in_transaction():
+                self._checked = 0.0
+                return
+            row = self._products.get(product_id)
+            if row is None:
+                self._checked = 0.0
+                return
+            self._store(row._replace(**changes))
+            self._sorted = None
+
+    def product_updated(self, oracle_exec, product):
+        self._apply(oracle_exec, product.id, name=product.name, image=product.image,
+                    unitprice=product.unit_price, stockquantity=product.stock_quantity,
+                    categoryid=product.category_id, brandid=product.brand_id, active=product.active)
+
+    def product_deactivated(self, oracle_exec, product_id):
+        self._apply(oracle_exec, product_id, active=False)
+
+    # new_stock: {product_id: tồn kho mới} (ví dụ kết quả của OrderService.checkout)
+    def stock_changed(self, oracle_exec, new_stock: dict):
+        for product_id, stock in new_stock.items():
+            self._apply(oracle_exec, product_id, stockquantity=stock)
+
+    # sản phẩm mới chưa biết id: lần đọc sau lấy delta từ DB
+    def invalidate(self):
+        with self._lock:
+            self._checked = 0.0
+
+    # bỏ toàn bộ cache, lần đọc sau nạp lại cả bảng
+    def reset(self):
+        with self._lock:
+            self._products = {}
+            self._names.clear()
+            self._sorted = None
+            self._mark = None
+            self._checked = 0.0
+            self._generation += 1
+
+
+# catalog dùng chung cho cả tiến trình (mọi ProductService/OrderService cùng một DB)
+PRODUCT_CATALOG = ProductCatalog()
@@ -1,114 +1,121 @@
 from BAL.OracleExec import OracleExec
 from models.EmployeeModel import EmployeeModel
 from oracledb import DatabaseError
+from BAL.SearchSpec import SearchSpec
+from BAL.ProductCatalog import PRODUCT_CATALOG
+
+# các kiểu tìm kiếm sản phẩm được phép (type_search -> cột). Mặc định bản đồng bộ tìm trên
+# PRODUCT_CATALOG (BAL/ProductCatalog.py); với SEARCH_BACKEND = "text" (catalog quá lớn để
+# giữ ở mỗi máy) thì tìm phía server bằng câu SQL này, tên sản phẩm qua Oracle Text.
+PRODUCT_SEARCH = SearchSpec(
+    "SELECT * FROM APP_SERVICE.PRODUCTS",
+    {"name": "name", "id": "id", "categoryid": "categoryid", "brandid": "brandid"},
+    where=["ACTIVE=TRUE"], order_by="id", seek="id > :last_id", text=["name"], keys={"name": "name_key"})
+# câu lệnh ghi PRODUCTS dùng chung cho ProductService và AsyncProductService
+PRODUCT_INSERT_QUERY = """INSERT INTO APP_SERVICE.PRODUCTS 
+                   (id, name, image, unitprice, stockquantity, categoryid, brandid, active) 
+                   VALUES (APP_SERVICE.seq_products.NEXTVAL, :name, :image, :unitprice, :stockquantity, :categoryid, :brandid, :active)"""
+
+PRODUCT_UPDATE_QUERY = """UPDATE APP_SERVICE.PRODUCTS SET 
+                                                name=:name,
+                                                image=:image,
+                                                unitprice=:unitprice,
+                                                stockquantity=:stockquantity,
+                                                categoryid=:categoryid,
+                                                brandid=:brandid,
+                                                active=:active
+                                                WHERE id=:product_id"""
+
+PRODUCT_DEACTIVATE_QUERY = """UPDATE APP_SERVICE.PRODUCTS SET 
+                                                ACTIVE=false
+                                                WHERE id=:product_id"""
+
+def product_params(product) -> dict:
+    return {
+        "name": product.name,
+        "image": product.image,
+        "unitprice": product.unit_price,
+        "stockquantity": product.stock_quantity,
+        "categoryid": product.category_id,
+        "brandid": product.brand_id,
+        "active": product.active
+    }
+
 
 class ProductService:
     def __init__(self, oracleExec: OracleExec):
         self.oracleExec = oracleExec
 
+    def _use_catalog(self) -> bool:
+        return SearchSpec.backend != "text"
+
     def get_all_products(self, keyword="", type_search=None):
-        
         try:
-            if type_search is None:
-                query="""SELECT * FROM APP_SERVICE.PRODUCTS WHERE ACTIVE=true ORDER BY id"""
-                return self.oracleExec.fetch_all(query)
-            else:
-                query=f"""SELECT * FROM APP_SERVICE.PRODUCTS WHERE ACTIVE=TRUE 
-                                                            AND LOWER({type_search}) LIKE :keyword"""
-                                                            
-                return self.oracleExec.fetch_all(query,{"keyword":f"%{keyword.lower()}%"})
+            if not self._use_catalog():
+                return PRODUCT_SEARCH.fetch(self.oracleExec, type_search, keyword)
+            return PRODUCT_CATALOG.search(self.oracleExec, keyword, type_search)
         except DatabaseError as e:
             raise ValueError("Cannot get product info" ,e)
-        
-    def create_product(self, product):
-        query = """INSERT INTO APP_SERVICE.PRODUCTS 
-                   (id, name, image, unitprice, stockquantity, categoryid, brandid, active) 
-                   VALUES (APP_SERVICE.seq_products.NEXTVAL, :name, :image, :unitprice, :stockquantity, :categoryid, :brandid, :active)"""
+    
+    # phân trang keyset theo id: trả về (rows, cursor); cursor là id cuối trang,
+    # None khi đã hết dữ liệu. Trang sau bắt đầu từ "id > cursor", trên catalog trong bộ nhớ
+    # hoặc trên index khoá chính khi tìm phía server.
+    def get_products_page(self, keyword="", type_search=None, cursor=None, limit=200):
         try:
-            self.oracleExec.execute(query, {
-                "name": product.name,
-                "image": product.image,
-                "unitprice": product.unit_price,
-                "stockquantity": product.stock_quantity,
-                "categoryid": product.category_id,
-                "brandid": product.brand_id,
-                "active": product.active
-            })
+            if not self._use_catalog():
+                rows = PRODUCT_SEARCH.fetch(self.oracleExec, type_search, keyword,
+                                            seek=None if cursor is None else {"last_id": cursor},
+                                            limit=limit, arraysize=limit)
+                return rows, (rows[-1]["id"] if len(rows) == limit else None)
+            rows = PRODUCT_CATALOG.search(self.oracleExec, keyword, type_search)
         except DatabaseError as e:
-            raise DatabaseError(f"Error creating product {product.name}: {e}")
+            raise ValueError("Cannot get product info" ,e)
+        if cursor is not None:
+            rows = [row for row in rows if row["id"] > cursor]
+        page = rows[:limit]
+        return page, (page[-1]["id"] if len(rows) > limit else None)
         
     def create_product(self, product):
-        query = """INSERT INTO APP_SERVICE.PRODUCTS 
-                   (id, name, image, unitprice, stockquantity, categoryid, brandid, active) 
-                   VALUES (APP_SERVICE.seq_products.NEXTVAL, :name, :image, :unitprice, :stockquantity, :categoryid, :brandid, :active)"""
         try:
-            self.oracleExec.execute(query, {
-                "name": product.name,
-                "image": product.image,
-                "unitprice": product.unit_price,
-                "stockquantity": product.stock_quantity,
-                "categoryid": product.category_id,
-                "brandid": product.brand_id,
-                "active": product.active
-            })
+            self.oracleExec.execute(PRODUCT_INSERT_QUERY, product_params(product))
         except DatabaseError as e:
             raise DatabaseError(f"Error creating product {product.name}: {e}")
+        # id do sequence sinh ra, catalog lấy dòng mới ở lần đọc sau
+        PRODUCT_CATALOG.invalidate()
         
         
         
     def update_product(self, product):
-        query="""UPDATE APP_SERVICE.PRODUCTS SET 
-                                                name=:name,
-                                                image=:image,
-                                                unitprice=:unitprice,
-                                                stockquantity=:stockquantity,
-                                                categoryid=:categoryid,
-                                                brandid=:brandid,
-                                                active=:active
-                                                WHERE id=:product_id"""
         try:
-            self.oracleExec.execute(query,{
-                                           "name":product.name,
-                                           "image":product.image,
-                                           "unitprice":product.unit_price,
-                                           "stockquantity":product.stock_quantity,
-                                           "categoryid":product.category_id,
-                                           "brandid":product.brand_id,
-                                           "active":product.active,
-                                           "product_id":product.id})
+            self.oracleExec.execute(PRODUCT_UPDATE_QUERY, {**product_params(product), "product_id": product.id})
         except DatabaseError as e:
             raise DatabaseError (f"Error updating product ID {product.id} ",e)
+        PRODUCT_CATALOG.product_updated(self.oracleExec, product)
         
     def deactivate_product(self, product_id: int):
-        query="""UPDATE APP_SERVICE.PRODUCTS SET 
-                                                ACTIVE=false
-                                                WHERE id=:product_id"""
         try:
-            self.oracleExec.execute(query,{"product_id":product_id})
+            self.deactivate_products([product_id])
         except DatabaseError as e:
             raise DatabaseError (f"Error deactivating product ID {product_id} ",e)
+
+    # ngừng bán nhiều sản phẩm: một lệnh UPDATE với mảng bind (executemany), commit một lần
+    def deactivate_products(self, product_ids: list) -> int:
+        if not product_ids:
+            return 0
+        try:
+            count = self.oracleExec.execute_many(PRODUCT_DEACTIVATE_QUERY,
+                                                 [{"product_id": product_id} for product_id in product_ids])
+        except DatabaseError as e:
+            raise DatabaseError (f"Error deactivating {len(product_ids)} products ",e)
+        for product_id in product_ids:
+            PRODUCT_CATALOG.product_deactivated(self.oracleExec, product_id)
+        return count
         
-    def get_product_for_order(self, keyword : str=""):
+    # sản phẩm đang bán có tên chứa keyword, khớp tốt nhất trước, kèm tồn kho hiện tại trong catalog
+    def get_product_for_order(self, keyword : str="", limit: int=None):
         try:
-            if keyword:
-                
-                query=f"""SELECT id,
-                                name,
-                                unitPrice,
-                                stockQuantity
-                                FROM APP_SERVICE.PRODUCTS WHERE LOWER(name) LIKE :keyword WHERE active=1 ORDER BY id"""
-                return self.oracleExec.fetch_all(query,{"keyword":f"%{keyword.lower()}%"})
-            
-            else:
-                query=f"""SELECT id,
-                                name,
-                                unitPrice,
-                                stockQuantity
-                                FROM APP_SERVICE.PRODUCTS WHERE active=1 ORDER BY id"""
-                
-                return self.oracleExec.fetch_all(query,{})
+            if not self._use_catalog():
+                return PRODUCT_SEARCH.fetch(self.oracleExec, "name" if keyword else None, keyword, limit=limit)
+            return PRODUCT_CATALOG.suggest(self.oracleExec, keyword, limit)
         except DatabaseError as e:
             raise ValueError("Cannot get product info" ,e)
-        
-
-                            
\ No newline at end of file
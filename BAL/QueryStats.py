@@ -0,0 +1,261 @@
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("BAL.QueryStats")
+
+# thống kê phiên lấy từ v$mystat khi bật sample_session (tốn thêm 2 round trip mỗi lệnh)
+SESSION_STATS_QUERY = """SELECT n.name, s.value
+                           FROM v$mystat s JOIN v$statname n ON n.statistic# = s.statistic#
+                          WHERE n.name IN ('SQL*Net roundtrips to/from client',
+                                           'bytes sent via SQL*Net to client',
+                                           'bytes received via SQL*Net from client')"""
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+# gom các biến thể của cùng một câu lệnh: bỏ khoảng trắng thừa, thay literal bằng ?
+def normalize(statement: str) -> str:
+    return _SPACES.sub(" ", _LITERALS.sub("?", statement)).strip()
+
+
+# ước lượng số round trip của một lần truy vấn khi không đo bằng v$mystat:
+# execute trả về prefetchrows dòng đầu, mỗi lần fetch sau lấy arraysize dòng
+def estimate_round_trips(rows: int, arraysize=None, prefetchrows=None) -> int:
+    arraysize = arraysize or 100
+    prefetchrows = 2 if prefetchrows is None else prefetchrows
+    remaining = max(0, rows - prefetchrows)
+    return 1 + math.ceil(remaining / arraysize)
+
+
+class Histogram:
+    """Histogram theo bucket log: bucket i chứa các giá trị trong (GROWTH^(i-1), GROWTH^i] ms.
+    Bộ nhớ cố định, percentile sai số tối đa ~GROWTH-1 (10%)."""
+
+    GROWTH = 1.1
+    MIN_MS = 0.01
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        index = math.ceil(math.log(max(ms, self.MIN_MS) / self.MIN_MS, self.GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.MIN_MS * self.GROWTH ** index, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max,
+        }
+
+
+class StatementStats:
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.elapsed = Histogram()
+        self.commits = Histogram()
+        self.errors = 0
+        self.rows = 0
+        self.round_trips = 0
+        self.bytes = 0
+
+    def to_dict(self) -> dict:
+        elapsed = self.elapsed.summary()
+        return {
+            "statement": self.statement,
+            "calls": elapsed["count"],
+            "errors": self.errors,
+            "total_ms": self.elapsed.total,
+            **{k: v for k, v in elapsed.items() if k != "count"},
+            "rows": self.rows,
+            "round_trips": self.round_trips,
+            "bytes": self.bytes,
+            "commit_ms": self.commits.total,
+            "commit_p95_ms": self.commits.percentile(95),
+        }
+
+
+class Operation:
+    """Một lần chạy câu lệnh đang được đo; OracleExec/AsyncOracleExec điền rows/round_trips trước khi kết thúc."""
+
+    __slots__ = ("statement", "started", "rows", "round_trips", "arraysize", "prefetchrows",
+                 "commit_ms", "error", "conn", "before")
+
+    def __init__(self, statement, conn=None, arraysize=None, prefetchrows=None):
+        self.statement = statement
+        self.rows = 0
+        self.round_trips = None
+        self.arraysize = arraysize
+        self.prefetchrows = prefetchrows
+        self.commit_ms = None
+        self.error = False
+        self.conn = conn
+        self.before = None
+        self.started = time.perf_counter()
+
+
+class CacheStats:
+    """Đếm hit/miss của một cache trong BAL, hiển thị trên trang chẩn đoán."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        self.hits += 1
+
+    def miss(self):
+        self.misses += 1
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    def to_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"name": self.name, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class QueryStats:
+    """Thống kê thời gian chạy của mọi câu lệnh qua OracleExec, gom theo câu lệnh đã chuẩn hoá.
+
+    slow_ms: lệnh chạy lâu hơn ngưỡng này được ghi log WARNING (logger "BAL.QueryStats")
+    sample_session: đo round trip và số byte thật bằng v$mystat thay vì ước lượng
+    """
+
+    def __init__(self, slow_ms: float = 500, sample_session: bool = False, recent: int = 200):
+        self.slow_ms = slow_ms
+        self.sample_session = sample_session
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._slowest = deque(maxlen=recent)
+        self.caches = {}
+
+    def begin(self, statement: str, conn=None, arraysize=None, prefetchrows=None) -> Operation:
+        op = Operation(statement, conn, arraysize, prefetchrows)
+        if self.sample_session and conn is not None:
+            op.before = self._session_counters(conn)
+            op.started = time.perf_counter()
+        return op
+
+    # đo câu lệnh chạy trong khối with (thời gian, op.rows, lỗi), dùng chung cho OracleExec và
+    # AsyncOracleExec. Generator đọc dở bị đóng sớm (GeneratorExit) là bên gọi dừng đọc, không phải lỗi
+    @contextmanager
+    def measure(self, statement: str, conn=None, arraysize=None, prefetchrows=None):
+        op = self.begin(statement, conn, arraysize, prefetchrows)
+        try:
+            yield op
+        except GeneratorExit:
+            raise
+        except BaseException:
+            op.error = True
+            raise
+        finally:
+            self.end(op)
+
+    def end(self, op: Operation):
+        elapsed_ms = (time.perf_counter() - op.started) * 1000
+        sent = received = 0
+        if op.before is not None and not op.error:
+            after = self._session_counters(op.conn)
+            # trừ đi round trip của chính câu đọc v$mystat đầu tiên
+            op.round_trips = after[0] - op.before[0] - 1
+            sent, received = after[1] - op.before[1], after[2] - op.before[2]
+        elif op.round_trips is None:
+            op.round_trips = estimate_round_trips(op.rows, op.arraysize, op.prefetchrows)
+
+        key = normalize(op.statement)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats(key)
+            stats.elapsed.add(elapsed_ms)
+            stats.rows += op.rows
+            stats.round_trips += op.round_trips
+            stats.bytes += sent + received
+            if op.commit_ms is not None:
+                stats.commits.add(op.commit_ms)
+            if op.error:
+                stats.errors += 1
+            self._slowest.append((elapsed_ms, time.time(), key, op.rows))
+
+        if elapsed_ms >= self.slow_ms:
+            logger.warning("slow query %.1f ms, %d rows, %d round trips: %s",
+                           elapsed_ms, op.rows, op.round_trips, key)
+
+    def _session_counters(self, conn) -> tuple:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SESSION_STATS_QUERY)
+            values = dict(cursor.fetchall())
+        finally:
+            cursor.close()
+        return (values.get('SQL*Net roundtrips to/from client', 0),
+                values.get('bytes sent via SQL*Net to client', 0),
+                values.get('bytes received via SQL*Net from client', 0))
+
+    def cache(self, name: str) -> CacheStats:
+        with self._lock:
+            stats = self.caches.get(name)
+            if stats is None:
+                stats = self.caches[name] = CacheStats(name)
+            return stats
+
+    # danh sách thống kê theo câu lệnh, tổng thời gian lớn nhất trước
+    def snapshot(self) -> list:
+        with self._lock:
+            rows = [stats.to_dict() for stats in self._statements.values()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    # các lệnh chậm nhất trong số lệnh chạy gần đây: [(ms, thời điểm, câu lệnh, số dòng)]
+    def slowest(self, n: int = 10) -> list:
+        with self._lock:
+            recent = list(self._slowest)
+        return sorted(recent, reverse=True)[:n]
+
+    def export_json(self, path: str):
+        data = {
+            "statements": self.snapshot(),
+            "caches": [cache.to_dict() for cache in self.caches.values()],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slowest.clear()
+            for cache in self.caches.values():
+                cache.reset()
+
+
+# thống kê dùng chung cho cả tiến trình; OracleExec ghi vào đây nếu không được truyền stats riêng
+QUERY_STATS = QueryStats()
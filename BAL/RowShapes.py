@@ -0,0 +1,164 @@
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Các dạng kết quả OracleExec có thể trả về:
+#   "dict"    - mỗi dòng là một dict (cách cũ, tốn bộ nhớ nhất)
+#   "record"  - mỗi dòng là một tuple có tên, lớp được sinh một lần cho mỗi bộ cột
+#   "tuple"   - tuple thô của driver + một bảng chỉ mục cột dùng chung (TupleResult)
+#   "columns" - dữ liệu theo cột (ColumnarResult)
+# "record" vẫn hỗ trợ row["col"], row.get("col") và row.keys() như dict.
+SHAPES = ("dict", "record", "tuple", "columns")
+
+def columns_of(cursor) -> tuple:
+    return tuple(col[0].lower() for col in cursor.description)
+
+@lru_cache(maxsize=256)
+def record_class(columns: tuple):
+    index = {name: i for i, name in enumerate(columns)}
+    keys = dict.fromkeys(columns).keys()
+    base = namedtuple("Record", columns, rename=True)
+
+    class Record(base):
+        __slots__ = ()
+        _columns = columns
+        _index = index
+
+        def __getitem__(self, key):
+            if isinstance(key, str):
+                return tuple.__getitem__(self, index[key])
+            return tuple.__getitem__(self, key)
+
+        def get(self, key, default=None):
+            i = index.get(key)
+            return default if i is None else tuple.__getitem__(self, i)
+
+        def keys(self):
+            return keys
+
+        def values(self):
+            return tuple(self)
+
+        def items(self):
+            return zip(columns, self)
+
+        def to_dict(self) -> dict:
+            return dict(zip(columns, self))
+
+    return Record
+
+def apply_row_factory(cursor, shape: str):
+    if not cursor.description:
+        return
+    if shape == "dict":
+        columns = columns_of(cursor)
+        cursor.rowfactory = lambda *args: dict(zip(columns, args))
+    elif shape == "record":
+        cursor.rowfactory = record_class(columns_of(cursor))
+
+
+class TupleResult(list):
+    """Danh sách tuple thô của driver kèm chỉ mục cột dùng chung cho mọi dòng."""
+
+    def __init__(self, columns: tuple, rows: list):
+        super().__init__(rows)
+        self.columns = columns
+        self.index = {name: i for i, name in enumerate(columns)}
+
+    def value(self, row: int, name: str):
+        return self[row][self.index[name]]
+
+    def column(self, name: str) -> list:
+        i = self.index[name]
+        return [row[i] for row in self]
+
+    # bọc một dòng thành record để dùng được .get(key) như dict
+    def row(self, i: int):
+        return record_class(self.columns)._make(self[i])
+
+
+class ColumnarResult:
+    """Kết quả theo cột: mỗi cột là một list, hoặc mảng numpy sau as_numpy()."""
+
+    def __init__(self, columns: tuple, data: dict):
+        self.columns = columns
+        self.data = data
+
+    @classmethod
+    def from_rows(cls, columns: tuple, rows: list):
+        if rows:
+            data = dict(zip(columns, (list(col) for col in zip(*rows))))
+        else:
+            data = {name: [] for name in columns}
+        return cls(columns, data)
+
+    def __len__(self):
+        return len(self.data[self.columns[0]]) if self.columns else 0
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def column(self, name: str):
+        return self.data[name]
+
+    def __getitem__(self, i: int):
+        return self.row(i)
+
+    def row(self, i: int):
+        return record_class(self.columns)._make(self.data[name][i] for name in self.columns)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    # chuyển các cột sang mảng numpy (nếu đã cài numpy) để tính toán vector hoá
+    def as_numpy(self):
+        if np is not None:
+            self.data = {name: np.asarray(col) for name, col in self.data.items()}
+        return self
+
+    # tổng các cột values theo từng giá trị của cột key, trả về ColumnarResult (key, *values).
+    # NULL được xử lý giống nhau ở cả hai nhánh: giá trị NULL tính là 0, dòng có key NULL bị bỏ qua
+    def group_sum(self, key: str, *values: str):
+        keys = self.data[key]
+        if np is not None and isinstance(keys, np.ndarray):
+            present = ~_null_mask(keys)
+            groups, inverse = np.unique(keys[present], return_inverse=True)
+            data = {key: groups}
+            for name in values:
+                weights = np.nan_to_num(np.asarray(self.data[name], dtype=float)[present])
+                data[name] = np.bincount(inverse, weights=weights, minlength=len(groups))
+            return ColumnarResult((key, *values), data)
+
+        totals = {}
+        columns = [self.data[name] for name in values]
+        for i, k in enumerate(keys):
+            if _is_null(k):
+                continue
+            acc = totals.setdefault(k, [0] * len(values))
+            for j, col in enumerate(columns):
+                if not _is_null(col[i]):
+                    acc[j] += col[i]
+        groups = sorted(totals)
+        data = {key: groups}
+        for j, name in enumerate(values):
+            data[name] = [totals[k][j] for k in groups]
+        return ColumnarResult((key, *values), data)
+
+
+# NULL của Oracle về Python là None; qua Arrow/numpy có thể thành NaN (số) hoặc NaT (ngày)
+def _is_null(value) -> bool:
+    return value is None or value != value
+
+def _null_mask(column):
+    if column.dtype.kind == "f":
+        return np.isnan(column)
+    if column.dtype.kind in "mM":
+        return np.isnat(column)
+    if column.dtype == object:
+        return np.fromiter((_is_null(value) for value in column), dtype=bool, count=len(column))
+    return np.zeros(len(column), dtype=bool)
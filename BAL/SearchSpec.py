@@ -0,0 +1,150 @@
+import logging
+import re
+from oracledb import DatabaseError
+from BAL.TextNormalize import fold
+
+logger = logging.getLogger("BAL.SearchSpec")
+
+# từ khoá của ngôn ngữ truy vấn Oracle Text, phải đặt trong {} để được hiểu là chữ thường
+TEXT_RESERVED = {"ABOUT", "ACCUM", "AND", "BT", "BTG", "BTI", "BTP", "EQUIV", "FUZZY", "HASPATH",
+                 "INPATH", "MINUS", "NEAR", "NOT", "NT", "NTG", "NTI", "NTP", "OR", "PT", "RT",
+                 "SQE", "SYN", "TR", "TRSYN", "TT", "WITHIN"}
+
+# chuyển chuỗi người dùng gõ thành truy vấn CONTAINS: mỗi từ là một tiền tố, các từ nối bằng AND.
+# Ký tự đặc biệt của Oracle Text bị bỏ, nên người dùng không thể chèn toán tử vào truy vấn.
+def text_query(keyword) -> str:
+    words = re.findall(r"\w+", keyword or "")
+    return " AND ".join(f"{{{word}}}" if word.upper() in TEXT_RESERVED else f"{word}%" for word in words)
+
+
+def is_text_error(error: DatabaseError) -> bool:
+    code = getattr(error.args[0], "code", None) if error.args else None
+    return code in (20000, 29902, 29903) or "DRG-" in str(error)
+
+
+class SearchSpec:
+    """Tập câu SQL cố định cho một loại tìm kiếm.
+
+    Cột tìm kiếm chỉ được chọn trong danh sách columns ({type_search: biểu thức cột}),
+    giá trị tìm kiếm luôn đi qua bind :keyword. Mỗi tổ hợp (cột, có seek, có giới hạn)
+    sinh đúng một câu SQL và được giữ lại, nên Oracle chỉ parse mỗi câu một lần và
+    statement cache phía client luôn trúng.
+
+    where: điều kiện cố định luôn có; seek: điều kiện phân trang keyset (bind do caller đưa vào);
+    lower=True thì so sánh không phân biệt hoa thường.
+
+    text: các type_search có index Oracle Text (DAL/migrations/003_oracle_text_indexes.sql).
+    Khi SearchSpec.backend == "text", các cột này được tìm bằng CONTAINS (khớp tiền tố từng từ,
+    không phân biệt hoa thường và dấu); câu không phân trang xếp theo SCORE giảm dần, câu phân
+    trang giữ thứ tự order_by để điều kiện seek vẫn đúng.
+
+    keys: {type_search: cột khoá không dấu} (name_key, DAL/migrations/004_name_keys.sql). Từ khoá
+    được bỏ dấu bằng BAL/TextNormalize.fold rồi so tiền tố với cột khoá ("name_key LIKE 'nguy%'")
+    để Oracle dùng INDEX RANGE SCAN: "an" khớp "an khang" nhưng không khớp "nguyen van an".
+    Tìm theo từ bất kỳ trong tên là việc của backend "text" (CONTAINS). Cột khác vẫn dùng LIKE.
+    """
+
+    # "like": LOWER(cột) LIKE :keyword; "text": CONTAINS trên index Oracle Text.
+    # Chọn theo SEARCH_BACKEND trong DAL/connectDB.py khi đăng nhập.
+    backend = "like"
+
+    def __init__(self, select: str, columns: dict, where=(), order_by: str = None,
+                 seek: str = None, lower: bool = True, text=(), keys=None):
+        self.select = select
+        self.columns = dict(columns)
+        self.where = tuple(where)
+        self.order_by = order_by
+        self.seek = seek
+        self.lower = lower
+        self.text = frozenset(text)
+        self.keys = dict(keys or {})
+        self._statements = {}
+
+    # match: "like", "text" hoặc "words" (tiền tố trên cột khoá)
+    def sql(self, type_search=None, seek=False, limit=False, match="like") -> str:
+        key = (type_search, seek, limit, match)
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._statements[key] = self._build(type_search, seek, limit, match)
+        return statement
+
+    def _build(self, type_search, seek, limit, match="like") -> str:
+        conditions = list(self.where)
+        order_by = self.order_by
+        if type_search is not None:
+            if type_search not in self.columns:
+                raise ValueError(f"Unsupported search column: {type_search}")
+            column = self.columns[type_search]
+            if match == "text":
+                conditions.append(f"CONTAINS({column}, :keyword, 1) > 0")
+                if not seek and not limit:
+                    order_by = f"SCORE(1) DESC, {order_by}" if order_by else "SCORE(1) DESC"
+            elif match == "words":
+                key = self.keys[type_search]
+                conditions.append(f"{key} LIKE :keyword || '%'")
+            else:
+                conditions.append(f"LOWER({column}) LIKE :keyword" if self.lower else f"{column} LIKE :keyword")
+        if seek:
+            conditions.append(self.seek)
+        parts = [self.select]
+        if conditions:
+            parts.append("WHERE " + "\n  AND ".join(conditions))
+        if order_by:
+            parts.append(f"ORDER BY {order_by}")
+        if limit:
+            parts.append("FETCH FIRST :limit ROWS ONLY")
+        return "\n".join(parts)
+
+    def _match(self, type_search, keyword) -> str:
+        if SearchSpec.backend == "text" and type_search in self.text and text_query(keyword):
+            return "text"
+        if type_search in self.keys and fold(keyword):
+            return "words"
+        return "like"
+
+    # trả về (sql, binds); binds cho seek (ví dụ :last_id) do caller thêm vào
+    def statement(self, type_search=None, keyword="", seek=False, limit=None):
+        params = {}
+        match = self._match(type_search, keyword)
+        if match == "text":
+            params["keyword"] = text_query(keyword)
+        elif match == "words":
+            params["keyword"] = fold(keyword)
+        elif type_search is not None:
+            keyword = keyword or ""
+            params["keyword"] = f"%{keyword.lower() if self.lower else keyword}%"
+        if limit is not None:
+            params["limit"] = limit
+        return self.sql(type_search, seek, limit is not None, match), params
+
+    # chạy tìm kiếm qua oracle_exec.fetch_all; seek: binds của điều kiện phân trang hoặc None.
+    # Nếu Oracle Text lỗi (chưa tạo index, thiếu CTXSYS...) thì chuyển hẳn về LIKE và chạy lại.
+    def fetch(self, oracle_exec, type_search=None, keyword="", seek=None, limit=None, **fetch_args):
+        match = self._match(type_search, keyword)
+        query, params = self._bound(type_search, keyword, seek, limit)
+        try:
+            return oracle_exec.fetch_all(query, params, **fetch_args)
+        except DatabaseError as e:
+            self._fall_back(match, e)
+        return self.fetch(oracle_exec, type_search, keyword, seek, limit, **fetch_args)
+
+    # như fetch nhưng cho AsyncOracleExec, cùng câu SQL và cùng cách quay về LIKE
+    async def fetch_async(self, oracle_exec, type_search=None, keyword="", seek=None, limit=None, **fetch_args):
+        match = self._match(type_search, keyword)
+        query, params = self._bound(type_search, keyword, seek, limit)
+        try:
+            return await oracle_exec.fetch_all(query, params, **fetch_args)
+        except DatabaseError as e:
+            self._fall_back(match, e)
+        return await self.fetch_async(oracle_exec, type_search, keyword, seek, limit, **fetch_args)
+
+    def _bound(self, type_search, keyword, seek, limit):
+        query, params = self.statement(type_search, keyword, seek is not None, limit)
+        return query, {**params, **(seek or {})}
+
+    # lỗi của Oracle Text thì chuyển hẳn SearchSpec.backend về "like", lỗi khác thì ném lại
+    def _fall_back(self, match, error):
+        if match != "text" or not is_text_error(error):
+            raise error
+        logger.warning("Oracle Text search failed, falling back to LIKE: %s", error)
+        SearchSpec.backend = "like"
@@ -0,0 +1,24 @@
+import unicodedata
+
+# bảng bỏ dấu tiếng Việt (chữ thường), dùng chung với cột ảo name_key trong
+# DAL/migrations/004_name_keys.sql: TRANSLATE(LOWER(name), ACCENTED, PLAIN).
+# Sửa ở đây thì phải sửa cả biểu thức trong migration để khoá hai phía khớp nhau.
+_GROUPS = {
+    "a": "àáảãạăằắẳẵặâầấẩẫậ",
+    "d": "đ",
+    "e": "èéẻẽẹêềếểễệ",
+    "i": "ìíỉĩị",
+    "o": "òóỏõọôồốổỗộơờớởỡợ",
+    "u": "ùúủũụưừứửữự",
+    "y": "ỳýỷỹỵ",
+}
+ACCENTED = "".join(_GROUPS.values())
+PLAIN = "".join(letter * len(chars) for letter, chars in _GROUPS.items())
+_TABLE = str.maketrans(ACCENTED, PLAIN)
+
+
+# khoá tìm kiếm: dựng sẵn (NFC), chữ thường, bỏ dấu; "Nguyễn Văn Đức" -> "nguyen van duc"
+def fold(text) -> str:
+    if text is None:
+        return ""
+    return unicodedata.normalize("NFC", str(text)).lower().translate(_TABLE)
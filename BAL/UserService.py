@@ -1,100 +1,314 @@
+import logging
+import threading
+import time
 from BAL.OracleExec import OracleExec
 from models.EmployeeModel import EmployeeModel
 import datetime
-from oracledb import DatabaseError
+from oracledb import DatabaseError, DB_TYPE_DATE, NUMBER
+from BAL.SearchSpec import SearchSpec
+
+logger = logging.getLogger("BAL.UserService")
+
+# các kiểu tìm kiếm nhân viên được phép (type_search -> cột); chỉ liệt kê tài khoản đang mở
+# theo cột EMPLOYEES.account_status (DAL/migrations/005_employee_account_status.sql);
+# tên dùng index Oracle Text TX_EMPLOYEES_NAME (003) khi SEARCH_BACKEND = "text"
+EMPLOYEE_SEARCH = SearchSpec(
+    "SELECT * FROM APP_SERVICE.EMPLOYEES e",
+    {"name": "e.name", "email": "e.email", "phonenumber": "e.phoneNumber",
+     "username": "e.username", "emp_role": "e.emp_role"},
+    where=["e.account_status = 'OPEN'"],
+    order_by="e.id", seek="e.id > :last_id", text=["name"],
+    keys={"name": "e.name_key"})
+
+EMPLOYEE_SELF = SearchSpec("SELECT * FROM APP_SERVICE.EMPLOYEES e", {},
+                           order_by="e.id", seek="e.id > :last_id")
+
+# user Oracle của phiên và dòng EMPLOYEES tương ứng trong cùng một round trip
+SESSION_IDENTITY_QUERY = """SELECT USER AS session_user, e.*
+                              FROM dual
+                              LEFT JOIN APP_SERVICE.EMPLOYEES e ON UPPER(e.username) = USER"""
+
+EMPLOYEE_UPDATE_QUERY = """UPDATE APP_SERVICE.EMPLOYEES SET 
+                                                address=:address,
+                                                phoneNumber=:phone_number,
+                                                email=:email
+                                                WHERE id=:employee_id"""
+
+# chép account_status từ DBA_USERS, chỉ ghi những dòng thực sự đổi
+SYNC_ACCOUNT_STATUS_QUERY = """MERGE INTO APP_SERVICE.EMPLOYEES e
+    USING (SELECT emp.id, NVL(u.account_status, 'DROPPED') AS account_status
+             FROM APP_SERVICE.EMPLOYEES emp
+             LEFT JOIN DBA_USERS u ON u.username = UPPER(emp.username)) s
+       ON (e.id = s.id)
+     WHEN MATCHED THEN UPDATE SET e.account_status = s.account_status
+                       WHERE e.account_status <> s.account_status"""
+
+# tạo nhiều tài khoản trong một round trip. Tên user đi qua DBMS_ASSERT trước khi ghép vào DDL,
+# mật khẩu được đặt trong nháy kép. Mỗi dòng có khối xử lý lỗi riêng: dòng lỗi ghi SQLERRM vào
+# :errors(i) và xoá user vừa tạo (nếu có), các dòng khác vẫn được tạo. CREATE USER/GRANT là DDL
+# nên mỗi nhân viên được commit ngay khi tạo xong user của nhân viên kế tiếp hoặc khi khối kết thúc.
+CREATE_EMPLOYEES_BLOCK = """
+    DECLARE
+        l_usernames DBMS_SQL.VARCHAR2_TABLE := :usernames;
+        l_passwords DBMS_SQL.VARCHAR2_TABLE := :passwords;
+        l_names     DBMS_SQL.VARCHAR2_TABLE := :names;
+        l_dobs      DBMS_SQL.DATE_TABLE     := :dobs;
+        l_genders   DBMS_SQL.NUMBER_TABLE   := :genders;
+        l_addresses DBMS_SQL.VARCHAR2_TABLE := :addresses;
+        l_phones    DBMS_SQL.VARCHAR2_TABLE := :phones;
+        l_emails    DBMS_SQL.VARCHAR2_TABLE := :emails;
+        l_roles     DBMS_SQL.VARCHAR2_TABLE := :roles;
+        l_ids       DBMS_SQL.NUMBER_TABLE;
+        l_errors    DBMS_SQL.VARCHAR2_TABLE;
+        l_user      VARCHAR2(128);
+        l_created   BOOLEAN;
+    BEGIN
+        FOR i IN 1 .. l_usernames.COUNT LOOP
+            l_ids(i) := NULL;
+            l_errors(i) := NULL;
+            l_created := FALSE;
+            BEGIN
+                l_user := DBMS_ASSERT.SIMPLE_SQL_NAME(l_usernames(i));
+                IF INSTR(l_user, '"') > 0 THEN
+                    RAISE_APPLICATION_ERROR(-20002, 'Invalid username ' || l_user);
+                END IF;
+                EXECUTE IMMEDIATE 'CREATE USER ' || l_user
+                    || ' IDENTIFIED BY ' || DBMS_ASSERT.ENQUOTE_NAME(l_passwords(i), FALSE)
+                    || ' DEFAULT TABLESPACE users QUOTA 50M ON users';
+                l_created := TRUE;
+                EXECUTE IMMEDIATE 'GRANT CREATE SESSION, app_user_role TO ' || l_user;
+
+                INSERT INTO APP_SERVICE.EMPLOYEES
+                    (id, name, dateOfBirth, gender, address, phoneNumber, email, username, emp_role)
+                VALUES (APP_SERVICE.seq_employees.NEXTVAL, l_names(i), l_dobs(i), l_genders(i), l_addresses(i),
+                        l_phones(i), l_emails(i), l_usernames(i), l_roles(i))
+                RETURNING id INTO l_ids(i);
+            EXCEPTION
+                WHEN OTHERS THEN
+                    l_errors(i) := SQLERRM;
+                    IF l_created THEN
+                        BEGIN
+                            EXECUTE IMMEDIATE 'DROP USER ' || l_user;
+                        EXCEPTION
+                            WHEN OTHERS THEN NULL;
+                        END;
+                    END IF;
+            END;
+        END LOOP;
+        :ids := l_ids;
+        :errors := l_errors;
+    END;"""
+
+
+# khoá/mở khoá nhiều tài khoản trong một round trip, cập nhật account_status cùng lúc;
+# mỗi dòng xử lý lỗi riêng như CREATE_EMPLOYEES_BLOCK
+SET_ACCOUNTS_LOCKED_BLOCK = """
+    DECLARE
+        l_usernames DBMS_SQL.VARCHAR2_TABLE := :usernames;
+        l_locked    BOOLEAN := :locked = 1;
+        l_errors    DBMS_SQL.VARCHAR2_TABLE;
+        l_user      VARCHAR2(128);
+    BEGIN
+        FOR i IN 1 .. l_usernames.COUNT LOOP
+            l_errors(i) := NULL;
+            BEGIN
+                l_user := DBMS_ASSERT.SIMPLE_SQL_NAME(l_usernames(i));
+                IF l_locked THEN
+                    EXECUTE IMMEDIATE 'ALTER USER ' || l_user || ' ACCOUNT LOCK';
+                ELSE
+                    EXECUTE IMMEDIATE 'ALTER USER ' || l_user || ' ACCOUNT UNLOCK';
+                END IF;
+                UPDATE APP_SERVICE.EMPLOYEES
+                   SET account_status = CASE WHEN l_locked THEN 'LOCKED' ELSE 'OPEN' END
+                 WHERE UPPER(username) = UPPER(l_usernames(i));
+            EXCEPTION
+                WHEN OTHERS THEN
+                    l_errors(i) := SQLERRM;
+            END;
+        END LOOP;
+        :errors := l_errors;
+    END;"""
+
+
+
+# binds cho CREATE_EMPLOYEES_BLOCK / SET_ACCOUNTS_LOCKED_BLOCK, dùng chung cho bản đồng bộ và async
+def create_employees_binds(employees: list) -> dict:
+    return {
+        "arrays": {
+            "usernames": (str, [e.username for e in employees]),
+            "passwords": (str, [e.password for e in employees]),
+            "names": (str, [e.name for e in employees]),
+            "dobs": (DB_TYPE_DATE, [e.dateofbirth for e in employees]),
+            "genders": (NUMBER, [None if e.gender is None else int(e.gender) for e in employees]),
+            "addresses": (str, [e.address for e in employees]),
+            "phones": (str, [e.phonenumber for e in employees]),
+            "emails": (str, [e.email for e in employees]),
+            "roles": (str, [e.emp_role for e in employees])
+        },
+        "out": {"ids": (NUMBER, len(employees)), "errors": (str, len(employees))}
+    }
+
+
+def create_employees_result(result: dict) -> list:
+    return [(None if employee_id is None else int(employee_id), error)
+            for employee_id, error in zip(result["ids"], result["errors"])]
+
+
+def set_accounts_locked_binds(usernames: list, locked: bool) -> dict:
+    return {"params": {"locked": int(locked)},
+            "arrays": {"usernames": (str, list(usernames))},
+            "out": {"errors": (str, len(usernames))}}
+
+
+class AccountStatusSync:
+    """Hẹn giờ đồng bộ EMPLOYEES.account_status với DBA_USERS, dùng chung cho cả tiến trình.
+
+    Tạo và khoá nhân viên qua ứng dụng đã tự cập nhật cột; đồng bộ chỉ để bắt các thay đổi
+    ngoài ứng dụng (khoá do đăng nhập sai, mật khẩu hết hạn, DBA sửa tay), nên chạy
+    tối đa một lần mỗi interval_s giây.
+    """
+
+    def __init__(self, interval_s: float = 300):
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._synced = None
+
+    # True nếu đã tới lúc đồng bộ; lời gọi đầu tiên nhận việc, các lời gọi đồng thời khác bỏ qua
+    def claim(self, force=False) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._synced is not None and now - self._synced < self.interval_s:
+                return False
+            self._synced = now
+            return True
+
+    def invalidate(self):
+        with self._lock:
+            self._synced = None
+
+
+ACCOUNT_STATUS_SYNC = AccountStatusSync()
+
+
+class SessionIdentity:
+    """Người đang đăng nhập: user Oracle, dòng EMPLOYEES (None nếu tài khoản không phải
+    nhân viên) và vai trò suy ra từ tên user: is_emp (nhân viên, bị FGAC giới hạn), is_mgr (quản lý)."""
+
+    def __init__(self, username: str, employee=None):
+        self.username = username
+        self.employee = employee
+        self.is_emp = "EMP" in username
+        self.is_mgr = "MGR" in username
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["session_user"], row if row["id"] is not None else None)
+
+# sửa chính mình thì lần sau nạp lại dòng EMPLOYEES của phiên
+def employee_changed(oracle_exec, employee_id):
+    identity = oracle_exec.identity
+    if identity is not None and identity.employee is not None and identity.employee["id"] == employee_id:
+        oracle_exec.reset_identity()
+
+
 class UserService:
     def __init__(self, oracleExec: OracleExec):
         self.oracleExec = oracleExec
 
-    def create_employee(self, employee: EmployeeModel):        
-        create_user_query = f"""CREATE USER {employee.username} IDENTIFIED BY {employee.password} DEFAULT TABLESPACE users QUOTA 50M ON users"""
-                    
-        grant_session_query= f"""GRANT CREATE SESSION TO {employee.username}"""
-        
-        apply_role_query= f"""GRANT app_user_role TO {employee.username}"""
-        
+    def create_employee(self, employee: EmployeeModel):
+        employee_id, error = self.create_employees([employee])[0]
+        if error is not None:
+            raise DatabaseError(f"Error creating employee {employee.username}: {error}")
+        return employee_id
+
+    # tạo nhiều nhân viên (user Oracle + quyền + dòng EMPLOYEES) trong một lần gọi server.
+    # Trả về [(id, lỗi)] theo thứ tự đầu vào: id None và lỗi là thông báo ORA- nếu dòng đó thất bại
+    def create_employees(self, employees: list) -> list:
+        if not employees:
+            return []
         try:
-            self.oracleExec.execute(create_user_query, {})
-
-            self.oracleExec.execute(grant_session_query, {})
-            
-            self.oracleExec.execute(apply_role_query, {})
-            
-            insert_query = """INSERT INTO APP_SERVICE.EMPLOYEES 
-                              (id ,name, dateOfBirth, gender, address, phoneNumber, email, username, emp_role) 
-                              VALUES (APP_SERVICE.seq_employees.NEXTVAL, :name, :dateOfBirth, :gender, :address, :phoneNumber, :email, :username, :emp_role)"""
-            
-            self.oracleExec.execute(insert_query, {
-                "name": employee.name,
-                "dateOfBirth": employee.dateofbirth,
-                "gender": employee.gender,
-                "address": employee.address,
-                "phoneNumber": employee.phonenumber,
-                "email": employee.email,
-                "username": employee.username,
-                "emp_role": employee.emp_role
-            })
-            
+            result = self.oracleExec.execute_plsql(CREATE_EMPLOYEES_BLOCK, **create_employees_binds(employees))
         except DatabaseError as e:
-            raise DatabaseError(f"Error creating employee {employee.username}: {e}")
+            raise DatabaseError(f"Error creating employees: {e}")
+        return create_employees_result(result)
         
     def update_employee(self, employee: EmployeeModel):
-        query="""UPDATE APP_SERVICE.EMPLOYEES SET 
-                                                address=:address,
-                                                phoneNumber=:phone_number,
-                                                email=:email
-                                                WHERE id=:employee_id"""
         try:
-            self.oracleExec.execute(query,{
+            self.oracleExec.execute(EMPLOYEE_UPDATE_QUERY,{
                                            "address":employee.address,
                                            "phone_number":employee.phonenumber,
                                            "email":employee.email,
                                            "employee_id":employee.id})
         except DatabaseError as e:
             raise DatabaseError (f"Error updating employee {employee.username} ",e)
+        employee_changed(self.oracleExec, employee.id)
         
     def deactive_employee(self, username: str):
-        query=f"""ALTER USER {username} ACCOUNT LOCK"""
-        
+        error = self.set_accounts_locked([username])[0]
+        if error is not None:
+            raise DatabaseError(f"Error LOCKED user {username} ", error)
+
+    # khoá (locked=True) hoặc mở khoá nhiều tài khoản trong một lần gọi server.
+    # Trả về danh sách lỗi theo thứ tự đầu vào, None với tài khoản thành công
+    def set_accounts_locked(self, usernames: list, locked: bool = True) -> list:
+        if not usernames:
+            return []
         try:
-            self.oracleExec.execute(query,{})
+            result = self.oracleExec.execute_plsql(SET_ACCOUNTS_LOCKED_BLOCK, **set_accounts_locked_binds(usernames, locked))
         except DatabaseError as e:
-            raise DatabaseError(f"Error LOCKED user {username} ",e)
+            raise DatabaseError(f"Error {'LOCKED' if locked else 'UNLOCKED'} users ", e)
+        return result["errors"]
+
+    # đồng bộ account_status với DBA_USERS nếu đã quá hạn (force=True: chạy ngay).
+    # Lỗi chỉ ghi log: tìm kiếm vẫn chạy được trên giá trị đang lưu
+    def sync_account_status(self, force=False):
+        if not ACCOUNT_STATUS_SYNC.claim(force):
+            return
+        try:
+            self.oracleExec.execute(SYNC_ACCOUNT_STATUS_QUERY)
+        except DatabaseError as e:
+            logger.warning("Cannot sync EMPLOYEES.account_status: %s", e)
         
+    # danh tính phiên đăng nhập: chỉ truy vấn lần đầu, sau đó lấy lại từ oracleExec.identity
+    @property
+    def identity(self) -> SessionIdentity:
+        identity = self.oracleExec.identity
+        if identity is None:
+            try:
+                row = self.oracleExec.fetch_one(SESSION_IDENTITY_QUERY, {})
+            except DatabaseError as e:
+                raise ValueError("Can't get session user ", e)
+            identity = self.oracleExec.identity = SessionIdentity.from_row(row)
+        return identity
+
     def get_user_session(self)-> dict:
-        sql = """SELECT
-            user AS USERNAME
-            FROM dual"""
-            
-        return self.oracleExec.fetch_one(sql,{})
+        return {"username": self.identity.username}
     
     def get_user(self):
-        try:
-            username=self.get_user_session()["username"]
-            query="""SELECT * FROM APP_SERVICE.EMPLOYEES WHERE UPPER(username) = :username"""
-            return self.oracleExec.fetch_one(query,{"username":username})
-        except DatabaseError as e:
-            raise ValueError(f"Can't get employee {username} ",e)
+        return self.identity.employee
         
     def get_all_employee_info(self, keyword="", type_search=None):
         try:
-            
-            username=self.get_user_session()["username"]
-            if "EMP" in username:
-                query="""SELECT * FROM APP_SERVICE.EMPLOYEES"""
-                return self.oracleExec.fetch_all(query,{})
-            
-            if type_search is None:
-                query="""SELECT * FROM APP_SERVICE.EMPLOYEES e WHERE EXISTS (SELECT 1 FROM DBA_USERS u 
-                                                                    WHERE u.username = upper(e.username) 
-                                                                    AND u.account_status = 'OPEN')"""
-                return self.oracleExec.fetch_all(query)
-            else:
-                query=f"""SELECT * FROM APP_SERVICE.EMPLOYEES e WHERE EXISTS (SELECT 1 FROM DBA_USERS u 
-                                                                    WHERE u.username = upper(e.username) 
-                                                                    AND u.account_status = 'OPEN') AND LOWER({type_search}) LIKE :keyword"""
-                return self.oracleExec.fetch_all(query, {"keyword": f"%{keyword.lower()}%"})
-                
+            spec, type_search = self._employee_search(type_search)
+            return spec.fetch(self.oracleExec, type_search, keyword)
         except DatabaseError as e:
             raise ValueError("Cannot get employee info", e)
+    
+    # phân trang keyset theo id, trả về (rows, cursor); cursor None khi đã hết dữ liệu
+    def get_employee_info_page(self, keyword="", type_search=None, cursor=None, limit=200):
+        try:
+            spec, type_search = self._employee_search(type_search)
+            rows = spec.fetch(self.oracleExec, type_search, keyword,
+                              seek=None if cursor is None else {"last_id": cursor},
+                              limit=limit, arraysize=limit)
+        except DatabaseError as e:
+            raise ValueError("Cannot get employee info", e)
+        return rows, (rows[-1]["id"] if len(rows) == limit else None)
+    
+    # nhân viên thường chỉ thấy những dòng chính sách FGAC cho phép, không lọc/tìm kiếm thêm
+    def _employee_search(self, type_search):
+        if self.identity.is_emp:
+            return EMPLOYEE_SELF, None
+        self.sync_account_status()
+        return EMPLOYEE_SEARCH, type_search
             
\ No newline at end of file
@@ -1,8 +1,58 @@
 import oracledb
 
+DSN = "localhost:1521/FREEPDB1"
+
+# cấu hình mặc định cho pool kết nối của mỗi phiên đăng nhập
+POOL_CONFIG = {
+    "min": 1,
+    "max": 4,
+    "increment": 1,
+    "ping_interval": 0,     # 0 = luôn ping khi lấy kết nối ra khỏi pool
+    "timeout": 300,         # đóng session rảnh quá 300 giây
+    "wait_timeout": 10000,  # ms chờ khi pool đã đầy
+    "stmtcachesize": 64,    # đủ chỗ cho mọi câu SQL cố định của BAL/SearchSpec
+}
+
+# cách tìm kiếm theo tên: "like" (LIKE + catalog sản phẩm trong bộ nhớ) hoặc "text"
+# (Oracle Text phía server, cần chạy DAL/migrations/003_oracle_text_indexes.sql trước)
+SEARCH_BACKEND = "like"
+
 def get_connection(username, password):
     return oracledb.connect(
         user=username,
         password=password,
-        dsn="localhost:1521/FREEPDB1"
-    )
\ No newline at end of file
+        dsn=DSN
+    )
+
+# gọi một lần cho mỗi session mới được pool mở ra
+def init_session(conn, requested_tag):
+    conn.module = "SportShop"
+    conn.client_identifier = conn.username
+
+def create_pool(username, password, session_callback=init_session, **config):
+    options = {**POOL_CONFIG, **config}
+    return oracledb.create_pool(
+        user=username,
+        password=password,
+        dsn=DSN,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        session_callback=session_callback,
+        **options
+    )
+
+def create_pool_async(username, password, **config):
+    options = {**POOL_CONFIG, **config}
+    return oracledb.create_pool_async(
+        user=username,
+        password=password,
+        dsn=DSN,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        **options
+    )
+
+async def get_connection_async(username, password):
+    return await oracledb.connect_async(
+        user=username,
+        password=password,
+        dsn=DSN
+    )
@@ -0,0 +1,7 @@
+-- Index phục vụ phân trang keyset của lịch sử đơn hàng (OrderService.load_orders_page):
+-- ORDER BY orderDateTime DESC, id DESC FETCH FIRST n ROWS ONLY được đọc theo index
+-- (INDEX RANGE SCAN DESCENDING) và dừng sau n dòng, không phải sort cả bảng ORDERS.
+-- PRODUCTS, CUSTOMERS, EMPLOYEES phân trang theo id nên dùng luôn index khoá chính.
+-- Chạy bằng tài khoản APP_SERVICE.
+
+CREATE INDEX APP_SERVICE.IX_ORDERS_DATE_ID ON APP_SERVICE.ORDERS (orderDateTime, id);
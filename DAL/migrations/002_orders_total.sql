@@ -0,0 +1,16 @@
+-- Tổng tiền đơn hàng được lưu sẵn trong ORDERS.total thay vì tính lại bằng
+-- SUM(unitPrice * quantity) trên ORDERDETAILS cho từng đơn mỗi lần xem lịch sử.
+-- Cột được ghi cùng lúc với chi tiết đơn trong khối CHECKOUT_BLOCK (BAL/OrderService.py).
+-- Chạy bằng tài khoản APP_SERVICE, một lần, sau 001_orders_keyset_index.sql.
+
+ALTER TABLE APP_SERVICE.ORDERS ADD (total NUMBER(15, 2) DEFAULT 0 NOT NULL);
+
+-- điền giá trị cho các đơn đã có
+MERGE INTO APP_SERVICE.ORDERS o
+USING (SELECT orderId, SUM(unitPrice * quantity) AS total
+         FROM APP_SERVICE.ORDERDETAILS
+        GROUP BY orderId) d
+   ON (o.id = d.orderId)
+ WHEN MATCHED THEN UPDATE SET o.total = d.total;
+
+COMMIT;
@@ -0,0 +1,36 @@
+-- Index Oracle Text cho chế độ tìm kiếm phía server (SEARCH_BACKEND = "text" trong DAL/connectDB.py),
+-- dùng khi catalog quá lớn để giữ trong bộ nhớ ở mỗi máy bán hàng.
+-- BAL/SearchSpec.py tìm các cột này bằng CONTAINS(cột, 'từ1% AND từ2%', 1) > 0 và xếp theo SCORE(1).
+-- Dùng CONTEXT thay vì CTXCAT vì CATSEARCH không có SCORE; SYNC (ON COMMIT) để dòng mới
+-- tìm được ngay sau khi commit. BASE_LETTER bỏ dấu tiếng Việt khi đánh index và khi tìm,
+-- PREFIX_INDEX giúp truy vấn tiền tố ("nik%") không phải mở rộng wildcard trên cả từ điển.
+-- Nếu chưa chạy file này, SearchSpec gặp lỗi DRG-... sẽ tự quay về LIKE.
+-- Chạy bằng tài khoản APP_SERVICE (cần role CTXAPP).
+
+BEGIN
+    CTX_DDL.CREATE_PREFERENCE('APP_SERVICE.SEARCH_LEXER', 'BASIC_LEXER');
+    CTX_DDL.SET_ATTRIBUTE('APP_SERVICE.SEARCH_LEXER', 'BASE_LETTER', 'YES');
+    CTX_DDL.SET_ATTRIBUTE('APP_SERVICE.SEARCH_LEXER', 'MIXED_CASE', 'NO');
+
+    CTX_DDL.CREATE_PREFERENCE('APP_SERVICE.SEARCH_WORDLIST', 'BASIC_WORDLIST');
+    CTX_DDL.SET_ATTRIBUTE('APP_SERVICE.SEARCH_WORDLIST', 'PREFIX_INDEX', 'TRUE');
+    CTX_DDL.SET_ATTRIBUTE('APP_SERVICE.SEARCH_WORDLIST', 'PREFIX_MIN_LENGTH', '1');
+    CTX_DDL.SET_ATTRIBUTE('APP_SERVICE.SEARCH_WORDLIST', 'PREFIX_MAX_LENGTH', '8');
+END;
+/
+
+CREATE INDEX APP_SERVICE.TX_PRODUCTS_NAME ON APP_SERVICE.PRODUCTS (name)
+    INDEXTYPE IS CTXSYS.CONTEXT
+    PARAMETERS ('LEXER APP_SERVICE.SEARCH_LEXER WORDLIST APP_SERVICE.SEARCH_WORDLIST
+                 STOPLIST CTXSYS.EMPTY_STOPLIST SYNC (ON COMMIT)');
+
+CREATE INDEX APP_SERVICE.TX_CUSTOMERS_NAME ON APP_SERVICE.CUSTOMERS (name)
+    INDEXTYPE IS CTXSYS.CONTEXT
+    PARAMETERS ('LEXER APP_SERVICE.SEARCH_LEXER WORDLIST APP_SERVICE.SEARCH_WORDLIST
+                 STOPLIST CTXSYS.EMPTY_STOPLIST SYNC (ON COMMIT)');
+
+-- lịch sử đơn hàng tìm theo tên nhân viên (ORDER_SEARCH "employee_name")
+CREATE INDEX APP_SERVICE.TX_EMPLOYEES_NAME ON APP_SERVICE.EMPLOYEES (name)
+    INDEXTYPE IS CTXSYS.CONTEXT
+    PARAMETERS ('LEXER APP_SERVICE.SEARCH_LEXER WORDLIST APP_SERVICE.SEARCH_WORDLIST
+                 STOPLIST CTXSYS.EMPTY_STOPLIST SYNC (ON COMMIT)');
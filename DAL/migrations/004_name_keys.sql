@@ -0,0 +1,20 @@
+-- Khoá tìm kiếm không dấu cho tên khách hàng, nhân viên, sản phẩm: "Nguyễn Văn Đức" -> "nguyen van duc".
+-- Cột ảo ẩn (INVISIBLE) nên không xuất hiện trong SELECT *, không tốn chỗ lưu và luôn khớp với name;
+-- index B-tree trên cột cho phép tìm tiền tố "name_key LIKE 'nguy%'" bằng INDEX RANGE SCAN.
+-- BAL/SearchSpec.py chỉ so tiền tố trên cột này (không có điều kiện '%...' nào làm mất index);
+-- tìm một từ ở giữa tên ("van an") dùng SEARCH_BACKEND = "text" với index của 003.
+-- Biểu thức phải giống hệt BAL/TextNormalize.fold (bảng ACCENTED/PLAIN); dữ liệu được giả định
+-- lưu ở dạng dựng sẵn (NFC) như bộ gõ thường sinh ra, phía Python chuẩn hoá NFC từ khoá trước khi so.
+-- Chạy bằng tài khoản APP_SERVICE.
+
+ALTER TABLE APP_SERVICE.CUSTOMERS ADD (name_key INVISIBLE AS (TRANSLATE(LOWER(name), 'àáảãạăằắẳẵặâầấẩẫậđèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵ',
+                                                    'aaaaaaaaaaaaaaaaadeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyy')));
+CREATE INDEX APP_SERVICE.IX_CUSTOMERS_NAME_KEY ON APP_SERVICE.CUSTOMERS (name_key);
+
+ALTER TABLE APP_SERVICE.EMPLOYEES ADD (name_key INVISIBLE AS (TRANSLATE(LOWER(name), 'àáảãạăằắẳẵặâầấẩẫậđèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵ',
+                                                    'aaaaaaaaaaaaaaaaadeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyy')));
+CREATE INDEX APP_SERVICE.IX_EMPLOYEES_NAME_KEY ON APP_SERVICE.EMPLOYEES (name_key);
+
+ALTER TABLE APP_SERVICE.PRODUCTS ADD (name_key INVISIBLE AS (TRANSLATE(LOWER(name), 'àáảãạăằắẳẵặâầấẩẫậđèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵ',
+                                                    'aaaaaaaaaaaaaaaaadeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyy')));
+CREATE INDEX APP_SERVICE.IX_PRODUCTS_NAME_KEY ON APP_SERVICE.PRODUCTS (name_key);
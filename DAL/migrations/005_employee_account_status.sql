@@ -0,0 +1,16 @@
+-- Trạng thái tài khoản Oracle của nhân viên lưu ngay trên EMPLOYEES, thay cho điều kiện
+-- EXISTS (... DBA_USERS u WHERE u.username = UPPER(e.username) ...) trong mỗi lần tìm nhân viên:
+-- view từ điển chậm và UPPER() trên cột nối làm mất index.
+-- Giá trị giống DBA_USERS.account_status ('OPEN', 'LOCKED', 'EXPIRED & LOCKED'...),
+-- 'DROPPED' nếu không còn user Oracle. Ứng dụng cập nhật cột khi tạo/khoá nhân viên
+-- (BAL/UserService.py) và định kỳ đồng bộ lại với DBA_USERS cho các thay đổi ngoài ứng dụng.
+-- Cột ẩn (INVISIBLE) như name_key (004) nên SELECT * trên EMPLOYEES (bảng nhân viên, chi tiết,
+-- xuất dữ liệu) không đổi; ứng dụng chỉ đọc/ghi cột bằng tên.
+-- Chạy bằng tài khoản có quyền đọc DBA_USERS.
+
+ALTER TABLE APP_SERVICE.EMPLOYEES ADD (account_status VARCHAR2(32) INVISIBLE DEFAULT 'OPEN' NOT NULL);
+
+UPDATE APP_SERVICE.EMPLOYEES e
+   SET account_status = NVL((SELECT u.account_status FROM DBA_USERS u
+                              WHERE u.username = UPPER(e.username)), 'DROPPED');
+COMMIT;
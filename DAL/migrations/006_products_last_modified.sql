@@ -0,0 +1,19 @@
+-- Mốc thay đổi của từng sản phẩm cho BAL/ProductCatalog.py: mỗi máy bán hàng hỏi delta
+-- "last_modified > :since" vài giây một lần. Trước đây dùng ORA_ROWSCN, không có index nên
+-- mỗi lần hỏi là một lần quét toàn bảng PRODUCTS; với index dưới đây chỉ là INDEX RANGE SCAN
+-- trên vài dòng mới đổi.
+-- Cột ẩn (INVISIBLE) như name_key (004) nên SELECT * trên PRODUCTS không đổi.
+-- Trigger đặt lại mốc cho mọi UPDATE, kể cả lệnh trừ tồn kho trong CHECKOUT_BLOCK và thay đổi
+-- ngoài ứng dụng; dòng mới nhận giá trị DEFAULT.
+-- Chạy bằng tài khoản APP_SERVICE.
+
+ALTER TABLE APP_SERVICE.PRODUCTS ADD (last_modified TIMESTAMP INVISIBLE DEFAULT SYSTIMESTAMP NOT NULL);
+CREATE INDEX APP_SERVICE.IX_PRODUCTS_LAST_MODIFIED ON APP_SERVICE.PRODUCTS (last_modified);
+
+CREATE OR REPLACE TRIGGER APP_SERVICE.TRG_PRODUCTS_LAST_MODIFIED
+    BEFORE UPDATE ON APP_SERVICE.PRODUCTS
+    FOR EACH ROW
+BEGIN
+    :new.last_modified := SYSTIMESTAMP;
+END;
+/
@@ -0,0 +1,8 @@
+-- Index cho gợi ý khách hàng theo tiền tố số điện thoại khi lập đơn (BAL/CustomerService.py,
+-- PHONE_PREFIX_QUERY): "phoneNumber LIKE :prefix || '%' ... FETCH FIRST :limit ROWS ONLY" chỉ đọc
+-- vài dòng đầu của INDEX RANGE SCAN thay vì nạp cả bảng CUSTOMERS cho mỗi máy bán hàng.
+-- Index cũng phục vụ tra cứu chính xác "phoneNumber = :phonenumber".
+-- Nếu phoneNumber đã có ràng buộc UNIQUE thì Oracle đã có index và lệnh dưới báo ORA-01408, bỏ qua.
+-- Chạy bằng tài khoản APP_SERVICE.
+
+CREATE INDEX APP_SERVICE.IX_CUSTOMERS_PHONE ON APP_SERVICE.CUSTOMERS (phoneNumber);
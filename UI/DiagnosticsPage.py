@@ -0,0 +1,243 @@
+import time
+from collections import deque
+from datetime import datetime
+from PySide6.QtWidgets import (
+    QWidget, QLabel, QPushButton, QHBoxLayout, QVBoxLayout, QFrame,
+    QHeaderView, QTableView, QFileDialog, QMessageBox
+)
+from PySide6.QtCore import Qt, QObject, QTimer
+from PySide6.QtGui import QFont
+
+from BAL.QueryStats import Histogram
+from UI.RowTableModel import RowTableModel
+
+
+def format_ms(value) -> str:
+    return f"{value:.1f}" if value is not None else ""
+
+
+def format_percent(value) -> str:
+    return f"{value * 100:.1f}%"
+
+
+class EventLoopLagProbe(QObject):
+    """Đo độ trễ của event loop trên GUI thread.
+
+    Một QTimer chạy mỗi interval_ms; khoảng thời gian thực tế giữa hai lần timer chạy
+    trừ đi interval_ms chính là thời gian GUI thread bị chặn (đang chạy việc khác).
+    Lần trễ vượt stall_ms được giữ lại trong stalls: [(thời điểm, ms)].
+    """
+
+    def __init__(self, interval_ms=100, stall_ms=50, recent=50, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self.stall_ms = stall_ms
+        self.lag = Histogram()
+        self.stalls = deque(maxlen=recent)
+        self._last = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self._tick)
+
+    def start(self):
+        self._last = time.perf_counter()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self._last = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        if self._last is not None:
+            lag_ms = max(0.0, (now - self._last) * 1000 - self.interval_ms)
+            self.lag.add(lag_ms)
+            if lag_ms >= self.stall_ms:
+                self.stalls.append((time.time(), lag_ms))
+        self._last = now
+
+    def reset(self):
+        self.lag = Histogram()
+        self.stalls.clear()
+
+
+class DiagnosticsPage(QWidget):
+    """Trang chẩn đoán hiệu năng: độ trễ câu lệnh, tỉ lệ trúng cache, pool kết nối,
+    độ trễ GUI thread và các lệnh chậm nhất gần đây. Số liệu lấy từ oracle_exec.stats
+    (BAL/QueryStats.py), chỉ làm mới khi trang đang hiển thị.
+    """
+
+    def __init__(self, oracle_exec, refresh_ms=1000, parent=None):
+        super().__init__(parent)
+        self.oracleExec = oracle_exec
+        self.stats = oracle_exec.stats
+
+        # probe chạy suốt vòng đời form để bắt cả những lần treo khi đang ở trang khác
+        self.probe = EventLoopLagProbe(parent=self)
+        self.probe.start()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(refresh_ms)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        number = Qt.AlignRight | Qt.AlignVCenter
+        self.statement_model = RowTableModel(
+            ["statement", "calls", "errors", "p50_ms", "p95_ms", "p99_ms", "max_ms", "rows", "round_trips"],
+            ["Câu lệnh", "Số lần", "Lỗi", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)", "Số dòng", "Round trip"],
+            formatters={key: format_ms for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")},
+            alignments={"statement": Qt.AlignLeft | Qt.AlignVCenter},
+            alignment=number, parent=self)
+        self.cache_model = RowTableModel(
+            ["name", "hits", "misses", "hit_rate"], ["Cache", "Trúng", "Trượt", "Tỉ lệ trúng"],
+            formatters={"hit_rate": format_percent},
+            alignments={"name": Qt.AlignLeft | Qt.AlignVCenter},
+            alignment=number, parent=self)
+        self.slowest_model = RowTableModel(
+            ["at", "ms", "rows", "statement"], ["Thời điểm", "ms", "Số dòng", "Câu lệnh"],
+            formatters={"at": lambda ts: datetime.fromtimestamp(ts).strftime('%H:%M:%S'), "ms": format_ms},
+            alignments={"statement": Qt.AlignLeft | Qt.AlignVCenter},
+            alignment=number, parent=self)
+
+        self.init_ui()
+
+    def init_ui(self):
+        self.setStyleSheet("background-color: #ecf0f1;")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(30, 30, 30, 30)
+
+        header_layout = QHBoxLayout()
+        header = QLabel("📈 CHẨN ĐOÁN HIỆU NĂNG")
+        header.setFont(QFont("Segoe UI", 20, QFont.Bold))
+        header.setStyleSheet("color: #2c3e50; margin-bottom: 10px;")
+
+        btn_style = """
+            QPushButton {
+                background-color: #3498db;
+                color: white;
+                border: none;
+                border-radius: 8px;
+                padding: 8px 16px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #2980b9;
+            }
+        """
+        btn_export = QPushButton("💾 Xuất JSON")
+        btn_reset = QPushButton("🔄 Đặt lại")
+        for btn in (btn_export, btn_reset):
+            btn.setFixedHeight(40)
+            btn.setStyleSheet(btn_style)
+            btn.setCursor(Qt.PointingHandCursor)
+        btn_export.clicked.connect(self.export_json)
+        btn_reset.clicked.connect(self.reset)
+
+        header_layout.addWidget(header)
+        header_layout.addStretch()
+        header_layout.addWidget(btn_export)
+        header_layout.addWidget(btn_reset)
+
+        # các chỉ số tổng quát: pool kết nối và độ trễ GUI thread
+        summary = QFrame()
+        summary.setStyleSheet("background-color: white; border: 1px solid #bdc3c7; border-radius: 5px;")
+        summary_layout = QHBoxLayout(summary)
+        self.pool_label = QLabel()
+        self.lag_label = QLabel()
+        self.stall_label = QLabel()
+        for label in (self.pool_label, self.lag_label, self.stall_label):
+            label.setFont(QFont("Segoe UI", 10, QFont.Bold))
+            label.setStyleSheet("color: #2c3e50; border: none; padding: 6px;")
+            summary_layout.addWidget(label)
+
+        layout.addLayout(header_layout)
+        layout.addWidget(summary)
+        layout.addWidget(self.section_label("Độ trễ theo câu lệnh"))
+        layout.addWidget(self.create_table(self.statement_model, stretch_column=0), 3)
+
+        bottom = QHBoxLayout()
+        cache_box = QVBoxLayout()
+        cache_box.addWidget(self.section_label("Cache"))
+        cache_box.addWidget(self.create_table(self.cache_model, stretch_column=0))
+        slow_box = QVBoxLayout()
+        slow_box.addWidget(self.section_label("Lệnh chậm nhất gần đây"))
+        slow_box.addWidget(self.create_table(self.slowest_model, stretch_column=3))
+        bottom.addLayout(cache_box, 1)
+        bottom.addLayout(slow_box, 2)
+        layout.addLayout(bottom, 2)
+
+    def section_label(self, text):
+        label = QLabel(text)
+        label.setFont(QFont("Segoe UI", 11, QFont.Bold))
+        label.setStyleSheet("color: #2c3e50; margin-top: 10px;")
+        return label
+
+    def create_table(self, model, stretch_column):
+        table = QTableView()
+        table.setModel(model)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.setAlternatingRowColors(True)
+        table.setWordWrap(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(stretch_column, QHeaderView.Stretch)
+        table.setStyleSheet("""
+            QTableView {
+                background-color: white;
+                border: 1px solid #bdc3c7;
+                border-radius: 5px;
+                gridline-color: #ecf0f1;
+                outline: none;
+            }
+            QHeaderView::section {
+                background-color: #34495e;
+                color: white;
+                padding: 6px;
+                border: none;
+                font-weight: bold;
+            }
+        """)
+        return table
+
+    def refresh(self):
+        pool = self.oracleExec.pool_status()
+        self.pool_label.setText(f"🔌 Pool: {pool['busy']} bận / {pool['opened']} mở / tối đa {pool['max']}")
+
+        lag = self.probe.lag.summary()
+        self.lag_label.setText(f"⏱️ Trễ GUI: p50 {lag['p50_ms']:.1f} ms · p95 {lag['p95_ms']:.1f} ms · "
+                               f"max {lag['max_ms']:.1f} ms")
+        if self.probe.stalls:
+            at, ms = self.probe.stalls[-1]
+            last = f" · gần nhất {ms:.0f} ms lúc {datetime.fromtimestamp(at).strftime('%H:%M:%S')}"
+        else:
+            last = ""
+        self.stall_label.setText(f"🐢 Treo ≥ {self.probe.stall_ms} ms: {len(self.probe.stalls)} lần{last}")
+
+        self.statement_model.set_rows(self.stats.snapshot(), self.statement_model.columns)
+        self.cache_model.set_rows([cache.to_dict() for cache in list(self.stats.caches.values())],
+                                self.cache_model.columns)
+        self.slowest_model.set_rows([{"at": ts, "ms": ms, "rows": rows, "statement": statement}
+                                     for ms, ts, statement, rows in self.stats.slowest(10)],
+                                    self.slowest_model.columns)
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Xuất thống kê", "query_stats.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.stats.export_json(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Lỗi", f"Không thể ghi file:\n{e}")
+
+    def reset(self):
+        self.stats.reset()
+        self.probe.reset()
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
@@ -6,6 +6,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 from BAL.UserService import UserService
+from UI.TaskRunner import TaskRunner
 from models.EmployeeModel import EmployeeModel
 import datetime
 class AddEmployeeDialog(QDialog):
@@ -13,11 +14,16 @@ class AddEmployeeDialog(QDialog):
         super().__init__(parent)
         self.oracleExec = oracleExec
         self.userService = UserService(self.oracleExec)
+        self.runner = TaskRunner(oracleExec, parent=self)
         self.setWindowTitle("Thêm Nhân Viên Mới")
         self.setMinimumSize(700, 600)
         self.input_fields = {}
         self.init_ui()
 
+    def done(self, result):
+        self.runner.cancel_all()
+        super().done(result)
+
     def init_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -155,7 +161,7 @@ class AddEmployeeDialog(QDialog):
         btn_cancel.clicked.connect(self.reject)
         btn_layout.addWidget(btn_cancel)
 
-        btn_save = QPushButton("💾 Lưu")
+        btn_save = self.btn_save = QPushButton("💾 Lưu")
         btn_save.setFixedSize(120, 45)
         btn_save.setFont(QFont("Segoe UI", 11, QFont.Bold))
         btn_save.setCursor(Qt.PointingHandCursor)
@@ -196,9 +202,6 @@ class AddEmployeeDialog(QDialog):
                 self.input_fields[field].setFocus()
                 return
         
-        # If all valid, accept
-        self.accept()
-        
         data = self.get_employee_data()
         try:
             employee = EmployeeModel(
@@ -212,12 +215,16 @@ class AddEmployeeDialog(QDialog):
                 password=data["password"],
                 emp_role=data["role"]
             )
-            
-            self.userService.create_employee(employee)
-            
         except Exception as e:
             QMessageBox.critical(self, "Lỗi", f"Lỗi khi thêm nhân viên: {str(e)}")
             return None
+        
+        # CREATE USER/GRANT chạy trên thread nền; dialog chỉ đóng khi tạo thành công
+        self.btn_save.setEnabled(False)
+        self.runner.submit(self.userService.create_employee, employee,
+                           on_result=lambda _: self.accept(),
+                           on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Lỗi khi thêm nhân viên: {str(e)}"),
+                           on_finished=lambda: self.btn_save.setEnabled(True))
 
     def get_employee_data(self):
         """Get employee data from form"""
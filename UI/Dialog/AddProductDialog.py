@@ -7,18 +7,24 @@ from PySide6.QtGui import QFont, QPixmap
 import os
 import shutil
 from BAL.ProductService import ProductService
+from UI.TaskRunner import TaskRunner
 from models.ProductModel import ProductModel
 
 class AddProductDialog(QDialog):
     def __init__(self, oracleExec, parent=None):
         super().__init__(parent)
         self.oracleExec = oracleExec
+        self.runner = TaskRunner(oracleExec, parent=self)
         self.setWindowTitle("Thêm Sản Phẩm Mới")
         self.setMinimumSize(700, 600)
         self.input_fields = {}
         self.image_path = None
         self.init_ui()
 
+    def done(self, result):
+        self.runner.cancel_all()
+        super().done(result)
+
     def init_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -235,7 +241,7 @@ class AddProductDialog(QDialog):
         """)
         btn_cancel.clicked.connect(self.reject)
 
-        btn_save = QPushButton("💾 Lưu")
+        btn_save = self.btn_save = QPushButton("💾 Lưu")
         btn_save.setFixedSize(120, 45)
         btn_save.setFont(QFont("Segoe UI", 11, QFont.Bold))
         btn_save.setCursor(Qt.PointingHandCursor)
@@ -357,12 +363,10 @@ class AddProductDialog(QDialog):
             )
             return
         
-        # If all valid, save image if selected and accept
+        # If all valid, save image if selected
         if self.image_path:
             self.save_selected_image()
         
-        self.accept()
-        
         product_data = self.get_product_data()
         try:
             product = ProductModel(
@@ -375,14 +379,20 @@ class AddProductDialog(QDialog):
                 brand_id=int(product_data["brandId"]),
                 active=product_data["active"].lower() == "true"
             )
-            
-            service = ProductService(self.oracleExec)
-            service.create_product(product)
-            
-            QMessageBox.information(self, "Thành Công", f"Đã thêm sản phẩm '{product_data['name']}' thành công!")
-            
         except Exception as e:
             QMessageBox.critical(self, "Lỗi", f"Lỗi khi thêm sản phẩm: {str(e)}")
+            return
+        
+        # ghi DB trên thread nền; dialog chỉ đóng khi thêm thành công
+        self.btn_save.setEnabled(False)
+        self.runner.submit(ProductService(self.oracleExec).create_product, product,
+                           on_result=lambda _: self.on_product_created(product_data["name"]),
+                           on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Lỗi khi thêm sản phẩm: {str(e)}"),
+                           on_finished=lambda: self.btn_save.setEnabled(True))
+    
+    def on_product_created(self, name):
+        QMessageBox.information(self, "Thành Công", f"Đã thêm sản phẩm '{name}' thành công!")
+        self.accept()
         
     def get_product_data(self):
         """Get product data from form"""
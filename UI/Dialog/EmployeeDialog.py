@@ -1,6 +1,6 @@
 from PySide6.QtWidgets import (
     QWidget, QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QFrame,
-    QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView,
+    QMessageBox, QTableView, QHeaderView,
     QGridLayout, QScrollArea, QLineEdit
 )
 from PySide6.QtCore import Qt
@@ -8,6 +8,10 @@ from PySide6.QtGui import QFont
 from BAL.UserService import UserService
 from models.EmployeeModel import EmployeeModel
 from BAL.AuditSerice import AuditService
+from UI.TaskRunner import TaskRunner
+from UI.RowTableModel import RowTableModel
+
+AUDIT_ACTION_COLORS = {"INSERT": Qt.green, "UPDATE": Qt.blue, "DELETE": Qt.red, "SELECT": Qt.darkGray}
 
 class EmployeeDetailDialog(QDialog):
     def __init__(self, employee_data, oracleExec,parent=None):
@@ -17,10 +21,16 @@ class EmployeeDetailDialog(QDialog):
         self.value_widgets = {}
         self.auditService=AuditService(oracleExec)
         self.userService=UserService(oracleExec)
+        self.runner = TaskRunner(oracleExec, parent=self)
         
         self.setWindowTitle(f"Chi Tiết Nhân Viên - {employee_data.get('name', 'N/A')}")
         self.setMinimumSize(900, 700)
         self.init_ui()
+        self.load_audit_logs()
+
+    def done(self, result):
+        self.runner.cancel_all()
+        super().done(result)
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -242,16 +252,23 @@ class EmployeeDetailDialog(QDialog):
         layout.addWidget(title)
 
         # Audit table
-        audit_table = QTableWidget()
-        audit_table.setColumnCount(5)
-        audit_table.setHorizontalHeaderLabels(["Tài Khoản", "Thời gian", "Hành động", "Bảng", "Hoàn thành"])
+        self.audit_model = RowTableModel(
+            ['username', 'event_timestamp', 'action_name', 'object_name', 'return_code'],
+            headers=["Tài Khoản", "Thời gian", "Hành động", "Bảng", "Hoàn thành"],
+            formatters={"event_timestamp": lambda v: v.strftime("%d/%m/%Y %H:%M:%S") if v else ""},
+            foreground=self.audit_foreground,
+            font=self.audit_font,
+            parent=self)
+        audit_table = QTableView()
+        self.audit_table = audit_table
+        audit_table.setModel(self.audit_model)
         audit_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         audit_table.setAlternatingRowColors(True)
-        audit_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        audit_table.setSelectionBehavior(QTableWidget.SelectRows)
+        audit_table.setEditTriggers(QTableView.NoEditTriggers)
+        audit_table.setSelectionBehavior(QTableView.SelectRows)
         audit_table.setMinimumHeight(300)
         audit_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #bdc3c7;
                 border-radius: 5px;
@@ -264,12 +281,12 @@ class EmployeeDetailDialog(QDialog):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 color: #2c3e50;
                 border: none;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
@@ -279,49 +296,35 @@ class EmployeeDetailDialog(QDialog):
             }
         """)
         
-        audit_logs = []
-        current_user=self.userService.get_user_session()["username"]
-        if "MGR" in current_user:
-            try:
-                audit_logs = self.auditService.get_user_audit(self.employee_data["username"])
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi audit", f"{str(e)}")
+        layout.addWidget(audit_table)
+        return section
 
-        audit_table.setRowCount(len(audit_logs))
-        
-        keys = ['username', 'event_timestamp', 'action_name', 'object_name', 'return_code']
+    # audit log đọc trên thread nền theo từng lô, mỗi lô được thêm vào bảng ngay khi về
+    def load_audit_logs(self):
+        self.runner.submit(self.fetch_audit_logs, self.employee_data["username"],
+                           on_progress=self.append_audit_logs,
+                           on_error=lambda e: QMessageBox.critical(self, "Lỗi audit", f"{str(e)}"))
 
-        for row, log in enumerate(audit_logs):
-            for col, key in enumerate(keys):
-                val = log.get(key, "")
-                
-                if key == 'event_timestamp' and val:
-                    display_text = val.strftime("%d/%m/%Y %H:%M:%S")
-                else:
-                    display_text = str(val)
+    def fetch_audit_logs(self, username, progress):
+        if not self.userService.identity.is_mgr:
+            return
+        for batch in self.auditService.iter_user_audit(username):
+            progress(batch)
 
-                item = QTableWidgetItem(display_text)
-                item.setTextAlignment(Qt.AlignCenter)
-                
-                if key == 'action_name':
-                    if val == "INSERT":
-                        item.setForeground(Qt.green)
-                        item.setFont(QFont("Segoe UI", weight=QFont.Bold))
-                    elif val == "UPDATE":
-                        item.setForeground(Qt.blue)
-                    elif val == "DELETE":
-                        item.setForeground(Qt.red)
-                    elif val == "SELECT":
-                        item.setForeground(Qt.darkGray)
-                
-                if key == 'return_code':
-                    if val != 0:
-                        item.setForeground(Qt.red)
+    def append_audit_logs(self, audit_logs):
+        self.audit_model.append_rows(audit_logs)
 
-                audit_table.setItem(row, col, item)
+    def audit_foreground(self, column, value):
+        if column == 'action_name':
+            return AUDIT_ACTION_COLORS.get(value)
+        if column == 'return_code' and value != 0:
+            return Qt.red
+        return None
 
-        layout.addWidget(audit_table)
-        return section
+    def audit_font(self, column, value):
+        if column == 'action_name' and value == "INSERT":
+            return QFont("Segoe UI", weight=QFont.Bold)
+        return None
 
     def toggle_edit_mode(self):
         """Toggle between view and edit mode"""
@@ -381,19 +384,25 @@ class EmployeeDetailDialog(QDialog):
                                        address=self.employee_data["address"],
                                        phonenumber=self.employee_data["phonenumber"],
                                        email=self.employee_data["email"])
-                
-                self.userService.update_employee(employee)
-                QMessageBox.information(
-                    self,
-                    "Thành Công",
-                    "Thông tin nhân viên đã được cập nhật!"
-                )
-                
             except Exception as e:
-                self.is_editing = True
-                for key, widget in self.value_widgets.items():
-                    if key != 'id':
-                        widget.setReadOnly(False)
-                
-                QMessageBox.critical(self,"Lỗi Cập Nhật",f"{str(e)}"
-                )
\ No newline at end of file
+                self.on_update_failed(e)
+                return
+            
+            self.btn_edit.setEnabled(False)
+            self.runner.submit(self.userService.update_employee, employee,
+                               on_result=lambda _: QMessageBox.information(
+                                   self,
+                                   "Thành Công",
+                                   "Thông tin nhân viên đã được cập nhật!"
+                               ),
+                               on_error=self.on_update_failed,
+                               on_finished=lambda: self.btn_edit.setEnabled(True))
+
+    def on_update_failed(self, e):
+        self.is_editing = True
+        for key, widget in self.value_widgets.items():
+            if key != 'id':
+                widget.setReadOnly(False)
+        
+        QMessageBox.critical(self,"Lỗi Cập Nhật",f"{str(e)}"
+        )
\ No newline at end of file
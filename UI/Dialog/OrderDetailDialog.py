@@ -6,6 +6,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
 from BAL.OrderService import OrderService
+from UI.TaskRunner import TaskRunner
 
 class OrderDetailDialog(QDialog):
     def __init__(self, order_service: OrderService, order_id, parent=None):
@@ -17,27 +18,34 @@ class OrderDetailDialog(QDialog):
         self.setWindowTitle(f"📋 Chi Tiết Đơn Hàng #{order_id}")
         self.setMinimumSize(900, 600)
         self.setStyleSheet("background-color: #ecf0f1;")
-        self.load_order_details_data()
+        self.runner = TaskRunner(order_service.oracleExec, parent=self)
         self.init_ui()
+        self.load_order_details_data()
     
     def load_order_details_data(self):
-        """Load order details from OrderService"""
-        try:
-            details_data = self.order_service.load_orders_detail(self.order_id)
-            if details_data:
-                for detail in details_data:
-                    self.order_details.append({
-                        'id': detail["id"],
-                        'order_id': detail["order_id"],
-                        'product_name': detail["product_name"],
-                        'unit_price': detail["unit_price"],
-                        'quantity': detail["quantity"],
-                        'subtotal': detail["subtotal"]
-                    })
-            else:
-                QMessageBox.warning(self, "Thông báo", f"Không có chi tiết cho đơn hàng #{self.order_id}")
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Lỗi tải chi tiết đơn hàng: {str(e)}")
+        """Load order details from OrderService (trên thread nền)"""
+        self.runner.submit(self.order_service.load_orders_detail, self.order_id,
+                           on_result=self.on_details_loaded,
+                           on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Lỗi tải chi tiết đơn hàng: {str(e)}"))
+    
+    def on_details_loaded(self, details_data):
+        if not details_data:
+            QMessageBox.warning(self, "Thông báo", f"Không có chi tiết cho đơn hàng #{self.order_id}")
+            return
+        for detail in details_data:
+            self.order_details.append({
+                'id': detail["id"],
+                'order_id': detail["order_id"],
+                'product_name': detail["product_name"],
+                'unit_price': detail["unit_price"],
+                'quantity': detail["quantity"],
+                'subtotal': detail["subtotal"]
+            })
+        self.populate_details_table()
+    
+    def done(self, result):
+        self.runner.cancel_all()
+        super().done(result)
     
     def init_ui(self):
         """Initialize UI for order detail display"""
@@ -56,6 +64,7 @@ class OrderDetailDialog(QDialog):
         layout.addWidget(products_label)
         
         products_table = QTableWidget()
+        self.products_table = products_table
         products_table.setColumnCount(6)
         products_table.setHorizontalHeaderLabels(["Mã Chi Tiết", "Mã ĐH", "Tên Sản Phẩm", "Đơn Giá", "Số Lượng", "Thành Tiền"])
         products_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
@@ -85,36 +94,6 @@ class OrderDetailDialog(QDialog):
             }
         """)
         
-        products_table.setRowCount(len(self.order_details))
-        
-        total_amount = 0
-        for row, detail in enumerate(self.order_details):
-            id_item = QTableWidgetItem(str(detail['id']))
-            id_item.setTextAlignment(Qt.AlignCenter)
-            products_table.setItem(row, 0, id_item)
-            
-            order_id_item = QTableWidgetItem(str(detail['order_id']))
-            order_id_item.setTextAlignment(Qt.AlignCenter)
-            products_table.setItem(row, 1, order_id_item)
-            
-            name_item = QTableWidgetItem(detail['product_name'])
-            products_table.setItem(row, 2, name_item)
-            
-            price_item = QTableWidgetItem(f"{detail['unit_price']:,.0f} đ")
-            price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            products_table.setItem(row, 3, price_item)
-            
-            qty_item = QTableWidgetItem(str(detail['quantity']))
-            qty_item.setTextAlignment(Qt.AlignCenter)
-            products_table.setItem(row, 4, qty_item)
-            
-            subtotal_item = QTableWidgetItem(f"{detail['subtotal']:,.0f} đ")
-            subtotal_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            subtotal_item.setFont(QFont("Segoe UI", 10, QFont.Bold))
-            products_table.setItem(row, 5, subtotal_item)
-            
-            total_amount += detail['subtotal']
-        
         layout.addWidget(products_table)
         
         total_frame = QFrame()
@@ -125,7 +104,8 @@ class OrderDetailDialog(QDialog):
         total_label.setFont(QFont("Segoe UI", 14, QFont.Bold))
         total_label.setStyleSheet("color: white; border: none; background: transparent;")
         
-        total_value = QLabel(f"{total_amount:,.0f} đ")
+        total_value = QLabel("0 đ")
+        self.total_value = total_value
         total_value.setFont(QFont("Segoe UI", 18, QFont.Bold))
         total_value.setStyleSheet("color: white; border: none; background: transparent;")
         total_value.setAlignment(Qt.AlignRight)
@@ -152,3 +132,37 @@ class OrderDetailDialog(QDialog):
             }
         """)
         layout.addWidget(button_box)
+    
+    def populate_details_table(self):
+        products_table = self.products_table
+        products_table.setRowCount(len(self.order_details))
+        
+        total_amount = 0
+        for row, detail in enumerate(self.order_details):
+            id_item = QTableWidgetItem(str(detail['id']))
+            id_item.setTextAlignment(Qt.AlignCenter)
+            products_table.setItem(row, 0, id_item)
+            
+            order_id_item = QTableWidgetItem(str(detail['order_id']))
+            order_id_item.setTextAlignment(Qt.AlignCenter)
+            products_table.setItem(row, 1, order_id_item)
+            
+            name_item = QTableWidgetItem(detail['product_name'])
+            products_table.setItem(row, 2, name_item)
+            
+            price_item = QTableWidgetItem(f"{detail['unit_price']:,.0f} đ")
+            price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            products_table.setItem(row, 3, price_item)
+            
+            qty_item = QTableWidgetItem(str(detail['quantity']))
+            qty_item.setTextAlignment(Qt.AlignCenter)
+            products_table.setItem(row, 4, qty_item)
+            
+            subtotal_item = QTableWidgetItem(f"{detail['subtotal']:,.0f} đ")
+            subtotal_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            subtotal_item.setFont(QFont("Segoe UI", 10, QFont.Bold))
+            products_table.setItem(row, 5, subtotal_item)
+            
+            total_amount += detail['subtotal']
+        
+        self.total_value.setText(f"{total_amount:,.0f} đ")
@@ -1,56 +1,95 @@
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, 
-    QTableWidgetItem, QPushButton, QFrame, QHeaderView, QDialogButtonBox,
-    QWidget, QMessageBox, QAbstractItemView
+    QDialog, QVBoxLayout, QLabel, QTableView, QHeaderView, QDialogButtonBox,
+    QMessageBox, QAbstractItemView
 )
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont
+from PySide6.QtGui import QFont, QColor
 from BAL.OrderService import OrderService
+from UI.SearchController import SearchController
+from UI.RowTableModel import RowTableModel
+
+ORDER_COLUMNS = ["id", "customer_name", "customer_phone", "order_date",
+                 "employee_name", "employee_username", "total", "detail"]
+DETAIL_COLUMN = ORDER_COLUMNS.index("detail")
 
 class OrderHistoryDialog(QDialog):
     def __init__(self, order_service: OrderService, parent=None):
         super().__init__(parent)
         self.order_service = order_service
         self.parent_widget = parent
-        self.order_history = []
         self.setWindowTitle("📋 Lịch Sử Đơn Hàng")
         self.setMinimumSize(1000, 600)
         self.setStyleSheet("background-color: #ecf0f1;")
-        self.load_orders_data()
         self.init_ui()
+        # đơn hàng được tải theo trang (mới nhất trước) trên thread nền, trang sau khi cuộn tới cuối
+        self.orders_loader = SearchController(self.order_service.load_orders_page, self.on_orders_loaded,
+                                              self.show_load_error, oracle_exec=order_service.oracleExec,
+                                              parent=self, model=self.orders_model,
+                                              on_page_error=self.show_page_error)
+        self.orders_model.rowsInserted.connect(self.update_header)
+        self.load_orders_data()
     
+    # dialog hiện ngay, danh sách đơn được tải trên thread nền
     def load_orders_data(self):
-        try:
-            orders_data = self.order_service.load_orders()
-            if orders_data:
-                for order in orders_data:
-                    self.order_history.append({
-                        'order_id': order["id"],
-                        'customer_name': order["customer_name"],
-                        'customer_phone': order["customer_phone"],
-                        'order_date': order["order_date"], 
-                        'employee_name': order["employee_name"],
-                        "employee_username": order["employee_username"],
-                        "total": order["total"]
-                    })
-            else:
-                QMessageBox.warning(self, "Thông báo", "Không có dữ liệu đơn hàng")
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Lỗi tải dữ liệu đơn hàng: {str(e)}")
+        self.orders_loader.run_now()
+    
+    def on_orders_loaded(self, orders_data):
+        if not orders_data:
+            QMessageBox.warning(self, "Thông báo", "Không có dữ liệu đơn hàng")
+            return
+        self.orders_model.set_rows(orders_data, ORDER_COLUMNS)
+        self.update_header()
+    
+    def update_header(self):
+        count = len(self.orders_model.rows)
+        more = "+" if self.orders_model.has_more or self.orders_loader.cursor is not None else ""
+        self.header.setText(f"📋 LỊCH SỬ ĐƠN HÀNG ({count}{more} đơn)")
+    
+    def show_load_error(self, e):
+        QMessageBox.critical(self, "Lỗi", f"Lỗi tải dữ liệu đơn hàng: {str(e)}")
+    
+    def show_page_error(self, e, retry):
+        answer = QMessageBox.critical(self, "Lỗi", f"Lỗi tải thêm đơn hàng: {str(e)}",
+                                      QMessageBox.Retry | QMessageBox.Cancel)
+        if answer == QMessageBox.Retry:
+            retry()
+    
+    def done(self, result):
+        self.orders_loader.cancel()
+        super().done(result)
     
     
     def init_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(20, 20, 20, 20)
         
-        header = QLabel(f"📋 LỊCH SỬ ĐƠN HÀNG ({len(self.order_history)} đơn)")
+        header = QLabel("📋 LỊCH SỬ ĐƠN HÀNG (đang tải...)")
+        self.header = header
         header.setFont(QFont("Segoe UI", 16, QFont.Bold))
         header.setStyleSheet("color: #2c3e50; margin-bottom: 10px;")
         layout.addWidget(header)
         
-        orders_table = QTableWidget()
-        orders_table.setColumnCount(8)
-        orders_table.setHorizontalHeaderLabels(["Mã ĐH", "Khách Hàng", "SĐT", "Thời Gian", "Nhân Viên", "Username", "Tổng Tiền", "Chi Tiết"])
+        bold = QFont("Segoe UI", 10, QFont.Bold)
+        left = Qt.AlignVCenter | Qt.AlignLeft
+        self.orders_model = RowTableModel(
+            ORDER_COLUMNS,
+            headers=["Mã ĐH", "Khách Hàng", "SĐT", "Thời Gian", "Nhân Viên", "Username", "Tổng Tiền", "Chi Tiết"],
+            formatters={
+                "id": lambda v: f"#{v}",
+                "order_date": lambda v: v.strftime("%d/%m/%Y %H:%M:%S") if v else "",
+                "total": lambda v: f"{float(v or 0):,.0f} đ",
+                "detail": lambda v: "🔍 Chi Tiết",
+            },
+            alignments={"customer_name": left, "employee_name": left,
+                        "total": Qt.AlignRight | Qt.AlignVCenter},
+            foreground=lambda column, value: (Qt.darkGreen if column == "total"
+                                              else QColor("#3498db") if column == "detail" else None),
+            font=lambda column, value: bold if column in ("id", "total", "detail") else None,
+            parent=self)
+        
+        orders_table = QTableView()
+        self.orders_table = orders_table
+        orders_table.setModel(self.orders_model)
         
         orders_table.setColumnWidth(0, 70)
         orders_table.setColumnWidth(1, 160)
@@ -70,9 +109,12 @@ class OrderHistoryDialog(QDialog):
         orders_table.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         orders_table.setAlternatingRowColors(True)
         orders_table.setSelectionMode(QAbstractItemView.NoSelection) # Tắt chọn ô để tránh rối mắt khi click nút
+        # bấm vào cột "Chi Tiết" để mở chi tiết đơn hàng
+        orders_table.clicked.connect(self.handle_cell_clicked)
+        orders_table.setCursor(Qt.PointingHandCursor)
         
         orders_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #bdc3c7;
                 border-radius: 8px;
@@ -85,82 +127,13 @@ class OrderHistoryDialog(QDialog):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 color: #2c3e50;
                 border-bottom: 1px solid #ecf0f1;
             }
         """)
         
-        orders_table.setRowCount(len(self.order_history))
-        
-        for row, order in enumerate(self.order_history):
-            orders_table.setRowHeight(row, 60) 
-            
-            id_val = order["order_id"]
-            id_item = QTableWidgetItem(f"#{id_val}")
-            id_item.setTextAlignment(Qt.AlignCenter)
-            id_item.setFont(QFont("Segoe UI", 10, QFont.Bold))
-            orders_table.setItem(row, 0, id_item)
-
-            name_item = QTableWidgetItem(order["customer_name"])
-            name_item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-            orders_table.setItem(row, 1, name_item)
-            
-            phone_item = QTableWidgetItem(order["customer_phone"])
-            phone_item.setTextAlignment(Qt.AlignCenter)
-            orders_table.setItem(row, 2, phone_item)
-            
-            raw_date = order["order_date"]
-            date_str = raw_date.strftime("%d/%m/%Y %H:%M:%S")
-            date_item = QTableWidgetItem(date_str)
-            date_item.setTextAlignment(Qt.AlignCenter)
-            orders_table.setItem(row, 3, date_item)
-            
-            employee_item = QTableWidgetItem(order["employee_name"])
-            employee_item.setTextAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-            orders_table.setItem(row, 4, employee_item)
-            
-            username_item = QTableWidgetItem(order["employee_username"])
-            username_item.setTextAlignment(Qt.AlignCenter)
-            orders_table.setItem(row, 5, username_item)
-
-            total_val = order.get('total') or 0
-            total_item = QTableWidgetItem(f"{float(total_val):,.0f} đ")
-            total_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            total_item.setFont(QFont("Segoe UI", 10, QFont.Bold))
-            total_item.setForeground(Qt.darkGreen)
-            orders_table.setItem(row, 6, total_item)
-            
-            # --- Container cho nút ---
-            container_widget = QWidget()
-            layout_btn = QHBoxLayout(container_widget)
-            layout_btn.setContentsMargins(0, 0, 0, 0)
-            layout_btn.setAlignment(Qt.AlignCenter)
-
-            btn_detail = QPushButton("🔍 Chi Tiết")
-            btn_detail.setFixedSize(90, 36) # Kích thước cố định cho nút
-            btn_detail.setFont(QFont("Segoe UI", 9, QFont.Bold))
-            btn_detail.setStyleSheet("""
-                QPushButton {
-                    background-color: #3498db;
-                    color: white;
-                    border-radius: 6px;
-                    border: none;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                }
-                QPushButton:pressed {
-                    background-color: #1f618d;
-                }
-            """)
-            btn_detail.setCursor(Qt.PointingHandCursor)
-            btn_detail.clicked.connect(lambda checked, o=order: self.view_order_detail(o['order_id']))
-            
-            layout_btn.addWidget(btn_detail)
-            orders_table.setCellWidget(row, 7, container_widget)
-        
         layout.addWidget(orders_table)
         
         button_box = QDialogButtonBox(QDialogButtonBox.Close)
@@ -180,6 +153,10 @@ class OrderHistoryDialog(QDialog):
         """)
         layout.addWidget(button_box)
     
+    def handle_cell_clicked(self, index):
+        if index.column() == DETAIL_COLUMN:
+            self.view_order_detail(self.orders_model.value(index.row(), "id"))
+    
     def view_order_detail(self, order_id):
         """View details of a specific order"""
         try:
@@ -5,6 +5,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QPixmap
 from BAL.ProductService import ProductService
+from UI.TaskRunner import TaskRunner
 from models.ProductModel import ProductModel
 import shutil
 import os  # Added for path handling
@@ -17,11 +18,16 @@ class ProductDetailDialog(QDialog):
         self.value_widgets = {}
         self.image_path = None  # Store selected image path
         self.oracle_exec = oracle_exec
+        self.runner = TaskRunner(oracle_exec, parent=self)
         self.setWindowTitle(f"Chi Tiết Sản Phẩm - {product_data.get('NAME', 'N/A')}")
         self.setMinimumSize(800, 600)
         self.init_ui()
         self.load_initial_image()  # Load initial image after UI is set up
 
+    def done(self, result):
+        self.runner.cancel_all()
+        super().done(result)
+
     def init_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -439,21 +445,15 @@ class ProductDetailDialog(QDialog):
                                        category_id=int(self.product_data['CATEGORYID']),
                                        brand_id=int(self.product_data['BRANDID']),
                                        active=active)
-                productService.update_product(product)
-                
-                QMessageBox.information(
-                    self,
-                    "Thành Công",
-                    "Thông tin sản phẩm đã được cập nhật!"
-                )
             except ValueError as e:
                 QMessageBox.critical(
                     self,
                     "Lỗi Dữ Liệu",
                     f"Vui lòng kiểm tra dữ liệu:\n- Giá phải là số\n- Số lượng phải là số nguyên\n- ID danh mục/thương hiệu phải là số nguyên\n\nLỗi: {str(e)}"
                 )
-                self.is_editing = True
+                self.is_editing = False
                 self.toggle_edit_mode()
+                return
             except Exception as e:
                 QMessageBox.critical(
                     self,
@@ -461,5 +461,26 @@ class ProductDetailDialog(QDialog):
                     f"Không thể cập nhật sản phẩm: {str(e)}"
                 )
                 # Restore editing mode if save fails
-                self.is_editing = True
-                self.toggle_edit_mode()
\ No newline at end of file
+                self.is_editing = False
+                self.toggle_edit_mode()
+                return
+            
+            # cập nhật DB trên thread nền, lỗi thì mở lại chế độ sửa
+            self.btn_edit.setEnabled(False)
+            self.runner.submit(productService.update_product, product,
+                               on_result=lambda _: QMessageBox.information(
+                                   self,
+                                   "Thành Công",
+                                   "Thông tin sản phẩm đã được cập nhật!"
+                               ),
+                               on_error=self.on_update_failed,
+                               on_finished=lambda: self.btn_edit.setEnabled(True))
+
+    def on_update_failed(self, e):
+        QMessageBox.critical(
+            self,
+            "Lỗi",
+            f"Không thể cập nhật sản phẩm: {str(e)}"
+        )
+        self.is_editing = False
+        self.toggle_edit_mode()
\ No newline at end of file
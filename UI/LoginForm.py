@@ -10,13 +10,15 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
-from BAL.LoginService import login
+from BAL.LoginService import login, logout, close_all
 from UI.MainForm import MainForm
+from UI.TaskRunner import TaskRunner
 
 class LoginForm(QWidget):
     def __init__(self):
         super().__init__()
         self.oracle_app = None
+        self.runner = TaskRunner(parent=self)
         self.setWindowTitle("Login")
         self.setFixedSize(720, 380)
         self.init_ui()
@@ -100,7 +102,7 @@ class LoginForm(QWidget):
         self.txt_pass.setFont(QFont("Segoe UI", 11))
 
         # Login button
-        btn_login = QPushButton("ĐĂNG NHẬP")
+        btn_login = self.btn_login = QPushButton("ĐĂNG NHẬP")
         btn_login.setFixedHeight(42)
         btn_login.setFont(QFont("Segoe UI", 11, QFont.Bold))
         btn_login.setCursor(Qt.PointingHandCursor)
@@ -165,19 +167,28 @@ class LoginForm(QWidget):
             QMessageBox.warning(self, "Error", "Please enter username and password")
             return
         
-        try:
-            oracleExec = login(username, password)
-            self.hide()
-            mainForm = MainForm(oracleExec, username)
-            mainForm.show()
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi đăng nhập", str(e)) 
+        # tạo pool, xác thực và nạp danh tính trên thread nền, form vẫn phản hồi trong lúc chờ
+        self.btn_login.setEnabled(False)
+        self.runner.submit(login, username, password,
+                           on_result=lambda oracleExec: self.on_logged_in(oracleExec, username),
+                           on_error=lambda e: QMessageBox.critical(self, "Lỗi đăng nhập", str(e)),
+                           on_finished=lambda: self.btn_login.setEnabled(True))
 
         print("Login attempt:", username)
 
+    def on_logged_in(self, oracleExec, username):
+        try:
+            self.mainForm = MainForm(oracleExec, username, parent=self)
+        except Exception as e:
+            logout(oracleExec)
+            QMessageBox.critical(self, "Lỗi đăng nhập", str(e))
+            return
+        self.hide()
+        self.mainForm.show()
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(close_all)
     window = LoginForm()
     window.show()
     sys.exit(app.exec())
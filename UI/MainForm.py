@@ -1,24 +1,32 @@
 from PySide6.QtWidgets import (
     QWidget, QLabel, QPushButton, QHBoxLayout, QVBoxLayout, QFrame,
     QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QStackedWidget,
-    QLineEdit, QComboBox, QSpinBox, QDialog
+    QLineEdit, QComboBox, QSpinBox, QDialog, QTableView, QCompleter, QApplication
 )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QColor
-from datetime import date, datetime
+from PySide6.QtCore import Qt, QStringListModel
+from PySide6.QtGui import QFont, QColor, QKeySequence, QShortcut
 
+from BAL.LoginService import logout
 from BAL.UserService import UserService
 from BAL.ProductService import ProductService
 from BAL.OrderService import OrderService
-from BAL.CustomerService import CustomerService
+from BAL.CustomerService import CustomerService, normalize_phone
 from UI.Dialog.EmployeeDialog import EmployeeDetailDialog
 from UI.Dialog.AddEmployeeDialog import AddEmployeeDialog
 from UI.Dialog.AddProductDialog import AddProductDialog
 from UI.Dialog.ProductDetailDialog import ProductDetailDialog
+from UI.SearchController import SearchController
+from UI.TaskRunner import TaskRunner
+from UI.RowTableModel import RowTableModel
+from UI.DiagnosticsPage import DiagnosticsPage
+from UI.RevenuePage import RevenuePage
 from models.OrderModel import OrderModel
 from models.OrderDetailModel import OrderDetailModel
 from models.CustomerModel import CustomerModel
 
+# số sản phẩm tối đa hiện trong bảng chọn hàng khi lập đơn
+ORDER_PRODUCT_LIMIT = 50
+
 class MainForm(QWidget):
     def __init__(self, oracleExec, username=None, parent=None):
         super().__init__()
@@ -31,6 +39,44 @@ class MainForm(QWidget):
         self.customerService=CustomerService(self.oracleExec)
         self.orderService = OrderService(self.oracleExec)
         
+        # mọi lời gọi BAL chạy trên thread nền qua TaskRunner, GUI không bị treo khi chờ DB
+        self.runner = TaskRunner(self.oracleExec, parent=self)
+        
+        # model đặt thẳng trên danh sách dòng, ô được định dạng khi vẽ
+        self.employee_model = RowTableModel(["id", "name", "dob", "gender", "address", "phone_number", "email", "username", "role"], parent=self)
+        self.product_model = RowTableModel(["ID", "Tên Sản Phẩm", "Danh Mục", "Giá", "Số Lượng"], parent=self)
+        self.customer_model = RowTableModel(["id", "name", "phonenumber"], parent=self)
+        # cột "add" không có dữ liệu, chỉ hiện nút Thêm; bấm vào ô này để thêm sản phẩm vào giỏ
+        self.order_product_model = RowTableModel(
+            ["id", "name", "unitprice", "stockquantity", "add"],
+            headers=["ID", "Tên Sản Phẩm", "Giá", "Tồn Kho", ""],
+            formatters={"unitprice": lambda v: f"{v or 0:,.0f} đ", "add": lambda _: "➕ Thêm"},
+            alignments={"name": Qt.AlignLeft | Qt.AlignVCenter, "unitprice": Qt.AlignRight | Qt.AlignVCenter},
+            foreground=lambda column, _: QColor("#3498db") if column == "add" else None,
+            font=lambda column, _: QFont("Segoe UI", 9, QFont.Bold) if column == "add" else None,
+            parent=self)
+        
+        # các bảng được tải/tìm kiếm qua SearchController: chỉ lấy kết quả của lần gọi mới nhất;
+        # dữ liệu tải theo trang, trang sau được lấy khi cuộn tới cuối bảng
+        self.employee_search = SearchController(self.query_employees, self.populate_employee_table,
+                                                self.show_load_error, oracle_exec=self.oracleExec, parent=self,
+                                                model=self.employee_model, on_page_error=self.show_page_error)
+        self.product_search = SearchController(self.query_products, self.populate_product_table,
+                                               self.show_load_error, oracle_exec=self.oracleExec, parent=self,
+                                               model=self.product_model, on_page_error=self.show_page_error)
+        self.customer_search = SearchController(self.query_customers, self.populate_customer_table,
+                                                self.show_load_error, oracle_exec=self.oracleExec, parent=self,
+                                                model=self.customer_model, on_page_error=self.show_page_error)
+        # tìm sản phẩm khi lập đơn chạy trên catalog trong bộ nhớ nên chỉ chờ rất ngắn giữa các phím
+        self.order_product_search_ctl = SearchController(self.query_order_products,
+                                                         self.populate_order_products,
+                                                         self.show_load_error, delay_ms=50,
+                                                         oracle_exec=self.oracleExec, parent=self)
+        # tra khách hàng theo số điện thoại khi lập đơn: gợi ý theo tiền tố và tự điền tên khách quen
+        self.order_customer_ctl = SearchController(self.lookup_order_customer, self.on_order_customer_found,
+                                                   self.show_load_error, delay_ms=150,
+                                                   oracle_exec=self.oracleExec, parent=self)
+        
         self.setWindowTitle(f"Main Form - {self.username}")
         self.setMinimumSize(1100, 650)            
         self.init_ui()
@@ -72,9 +118,15 @@ class MainForm(QWidget):
         self.btn_products = QPushButton("📋 Quản Lý Sản Phẩm")
         self.btn_orders = QPushButton("📦 Đơn Hàng")
         self.btn_customers = QPushButton("👤 Quản Lý Khách Hàng")
+        self.btn_revenue = QPushButton("📊 Doanh Thu")
+        self.btn_diagnostics = QPushButton("📈 Chẩn Đoán")
         
         self.btn_logout = QPushButton("🚪 Đăng Xuất")
-        menu_buttons = [self.btn_employees, self.btn_products, self.btn_orders, self.btn_customers, self.btn_logout]
+        menu_buttons = [self.btn_employees, self.btn_products, self.btn_orders, self.btn_customers,
+                        self.btn_revenue, self.btn_diagnostics, self.btn_logout]
+        # trang doanh thu và trang chẩn đoán (câu SQL, độ trễ, trạng thái pool) chỉ dành cho quản lý
+        self.btn_revenue.setVisible(self.userService.identity.is_mgr)
+        self.btn_diagnostics.setVisible(self.userService.identity.is_mgr)
 
         # Style menu buttons
         menu_style = """
@@ -107,6 +159,8 @@ class MainForm(QWidget):
         self.btn_products.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(1))
         self.btn_orders.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(2))
         self.btn_customers.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(3))
+        self.btn_revenue.clicked.connect(self.show_revenue)
+        self.btn_diagnostics.clicked.connect(self.show_diagnostics)
         self.btn_logout.clicked.connect(self.handle_logout)
 
         sidebar_layout.addWidget(header)
@@ -131,6 +185,16 @@ class MainForm(QWidget):
         customer_page = self.create_customer_page()
         self.stacked_widget.addWidget(customer_page)
 
+        # tài khoản không phải quản lý không có trang doanh thu, trang chẩn đoán lẫn phím tắt Ctrl+Shift+D
+        self.revenue_page = None
+        self.diagnostics_page = None
+        if self.userService.identity.is_mgr:
+            self.revenue_page = RevenuePage(self.orderService, self.runner)
+            self.stacked_widget.addWidget(self.revenue_page)
+            self.diagnostics_page = DiagnosticsPage(self.oracleExec)
+            self.stacked_widget.addWidget(self.diagnostics_page)
+            QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.show_diagnostics)
+
         main_layout.addWidget(sidebar)
         main_layout.addWidget(self.stacked_widget)
 
@@ -368,18 +432,15 @@ class MainForm(QWidget):
         left_layout.addLayout(search_layout)
 
         # Product table
-        self.order_product_table = QTableWidget()
-        self.order_product_table.setColumnCount(5)
-        self.order_product_table.setHorizontalHeaderLabels(["ID", "Tên Sản Phẩm", "Giá", "Tồn Kho", ""])
-        self.order_product_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.order_product_table = QTableView()
+        self.order_product_table.setModel(self.order_product_model)
+        self.order_product_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
         self.order_product_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.order_product_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        self.order_product_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        self.order_product_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
         self.order_product_table.setAlternatingRowColors(True)
-        self.order_product_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.order_product_table.setSelectionBehavior(QTableView.SelectRows)
+        self.order_product_table.clicked.connect(self.on_order_product_clicked)
         self.order_product_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 gridline-color: #ecf0f1;
                 border: none;
@@ -393,11 +454,11 @@ class MainForm(QWidget):
                 font-weight: bold;
                 font-size: 11px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
                 color: #2c3e50;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
@@ -477,6 +538,12 @@ class MainForm(QWidget):
             }
         """)
         
+        self.phone_completer_model = QStringListModel(self)
+        phone_completer = QCompleter(self.phone_completer_model, self)
+        self.customer_phone_input.setCompleter(phone_completer)
+        self.customer_phone_input.textEdited.connect(self.order_customer_ctl.trigger)
+        phone_completer.activated.connect(self.order_customer_ctl.run_now)
+        
         phone_layout.addWidget(phone_label)
         phone_layout.addWidget(self.customer_phone_input)
         customer_layout.addLayout(phone_layout)
@@ -568,6 +635,7 @@ class MainForm(QWidget):
         btn_clear_cart.clicked.connect(self.clear_cart)
         
         btn_create_order = QPushButton("✅ Tạo Đơn Hàng")
+        self.btn_create_order = btn_create_order
         btn_create_order.setFixedHeight(40)
         btn_create_order.setFont(QFont("Segoe UI", 10, QFont.Bold))
         btn_create_order.setStyleSheet("""
@@ -689,13 +757,13 @@ class MainForm(QWidget):
         
         btn_layout.addStretch()
 
-        self.customer_table = QTableWidget()
-        self.customer_table.setColumnCount(6)
-        self.customer_table.setHorizontalHeaderLabels(["id", "name", "phonenumber", "email", "dateofbirth", "gender"])
+        self.customer_table = QTableView()
+        self.customer_table.setModel(self.customer_model)
+        self.customer_table.setSelectionBehavior(QTableView.SelectRows)
         self.customer_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.customer_table.setAlternatingRowColors(True)
         self.customer_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #bdc3c7;
                 border-radius: 5px;
@@ -709,17 +777,17 @@ class MainForm(QWidget):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 color: #2c3e50;
                 border: none;
                 outline: none;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
-            QTableWidget::item:focus {
+            QTableView::item:focus {
                 outline: none;
                 border: none;
             }
@@ -732,7 +800,7 @@ class MainForm(QWidget):
         self.load_customer_data()
 
         btn_refresh.clicked.connect(self.load_customer_data)
-        self.customer_table.cellClicked.connect(self.show_customer_detail)
+        self.customer_table.clicked.connect(lambda index: self.show_customer_detail(index.row(), index.column()))
 
         layout.addWidget(header)
         layout.addLayout(search_layout)
@@ -834,13 +902,14 @@ class MainForm(QWidget):
         
         btn_layout.addStretch()
 
-        self.employee_table = QTableWidget()
-        self.employee_table.setColumnCount(9)
-        self.employee_table.setHorizontalHeaderLabels(["id", "name", "dob", "gender", "address", "phone_number", "email", "username", "role"])
+        self.employee_table = QTableView()
+        self.employee_table.setModel(self.employee_model)
+        self.employee_table.setSelectionBehavior(QTableView.SelectRows)
+        self.employee_table.setSelectionMode(QTableView.ExtendedSelection)
         self.employee_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.employee_table.setAlternatingRowColors(True)
         self.employee_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #bdc3c7;
                 border-radius: 5px;
@@ -854,17 +923,17 @@ class MainForm(QWidget):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 color: #2c3e50;
                 border: none;
                 outline: none;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
-            QTableWidget::item:focus {
+            QTableView::item:focus {
                 outline: none;
                 border: none;
             }
@@ -879,7 +948,7 @@ class MainForm(QWidget):
         btn_add.clicked.connect(self.show_add_employee_form)
         btn_delete.clicked.connect(self.delete_employee)
         btn_refresh.clicked.connect(self.load_employee_data)
-        self.employee_table.cellClicked.connect(self.show_employee_detail)
+        self.employee_table.clicked.connect(lambda index: self.on_plain_click(index, self.show_employee_detail))
 
         layout.addWidget(header)
         layout.addLayout(search_layout)
@@ -981,13 +1050,14 @@ class MainForm(QWidget):
         
         btn_layout.addStretch()
 
-        self.product_table = QTableWidget()
-        self.product_table.setColumnCount(5)
-        self.product_table.setHorizontalHeaderLabels(["ID", "Tên Sản Phẩm", "Danh Mục", "Giá", "Số Lượng"])
+        self.product_table = QTableView()
+        self.product_table.setModel(self.product_model)
+        self.product_table.setSelectionBehavior(QTableView.SelectRows)
+        self.product_table.setSelectionMode(QTableView.ExtendedSelection)
         self.product_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.product_table.setAlternatingRowColors(True)
         self.product_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #bdc3c7;
                 border-radius: 5px;
@@ -1001,17 +1071,17 @@ class MainForm(QWidget):
                 border: none;
                 font-weight: bold;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 color: #2c3e50;
                 border: none;
                 outline: none;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
-            QTableWidget::item:focus {
+            QTableView::item:focus {
                 outline: none;
                 border: none;
             }
@@ -1026,7 +1096,7 @@ class MainForm(QWidget):
         btn_add.clicked.connect(self.show_add_product_form)
         btn_delete.clicked.connect(self.handle_delete_product)
         btn_refresh.clicked.connect(self.load_product_data)
-        self.product_table.cellClicked.connect(self.show_product_detail)
+        self.product_table.clicked.connect(lambda index: self.on_plain_click(index, self.show_product_detail))
 
         layout.addWidget(header)
         layout.addLayout(search_layout)
@@ -1109,95 +1179,49 @@ class MainForm(QWidget):
     def load_employee_data(self, keyword=None, type_search=None):
         
         if type_search is None:
-            self.employee_search_input.clear()
+            self.clear_search_input(self.employee_search_input)
             
-        employees = self.userService.get_all_employee_info(keyword=keyword, type_search=type_search)
-        
-        self.employee_table.setRowCount(0)
-        
+        self.employee_search.run_now(keyword, type_search)
+    
+    def query_employees(self, keyword=None, type_search=None, cursor=None):
+        return self.userService.get_employee_info_page(keyword=keyword, type_search=type_search, cursor=cursor)
+    
+    def populate_employee_table(self, employees):
         if not employees:
+            self.employee_model.clear()
             return
-        
-        column_headers = list(employees[0].keys())
-        
-        self.employee_table.setColumnCount(len(column_headers))
-        self.employee_table.setHorizontalHeaderLabels(column_headers)
-        
-        self.employee_table.setRowCount(len(employees))
-        
-        for row, employee_dict in enumerate(employees):
-            for col, key in enumerate(column_headers):
-                data = employee_dict.get(key, "")
-                
-                if isinstance(data, (date, datetime)):
-                    display_text = data.strftime('%Y-%m-%d')
-                elif data is None:
-                    display_text = ""
-                else:
-                    display_text = str(data)
-                
-                item = QTableWidgetItem(display_text)
-                item.setTextAlignment(Qt.AlignCenter)
-                self.employee_table.setItem(row, col, item)
+        self.employee_model.set_rows(employees)
 
     def load_product_data(self, keyword=None, type_search=None):
         
         if type_search is None:
-            self.product_search_input.clear()
+            self.clear_search_input(self.product_search_input)
         
-        products = self.productService.get_all_products(keyword=keyword,type_search=type_search)
-        self.product_table.setRowCount(0)
+        self.product_search.run_now(keyword, type_search)
+    
+    def query_products(self, keyword=None, type_search=None, cursor=None):
+        return self.productService.get_products_page(keyword=keyword, type_search=type_search, cursor=cursor)
+    
+    def populate_product_table(self, products):
         if not products:
+            self.product_model.clear()
             return
-        
-        column_headers = list(products[0].keys())
-
-        self.product_table.setColumnCount(len(column_headers))
-        self.product_table.setHorizontalHeaderLabels(column_headers)
-
-        self.product_table.setRowCount(len(products))
-        
-        for row, product_dict in enumerate(products):
-            for col, key in enumerate(column_headers):
-                data = product_dict.get(key, "")
-                item = QTableWidgetItem(str(data) if data is not None else "")
-                item.setTextAlignment(Qt.AlignCenter)
-                self.product_table.setItem(row, col, item)
+        self.product_model.set_rows(products)
 
     def load_customer_data(self, keyword=None, type_search=None):
         """Tải dữ liệu khách hàng"""
         if type_search is None:
-            self.customer_search_input.clear()
+            self.clear_search_input(self.customer_search_input)
         
-        try:
-            customers = self.customerService.get_all_customers(keyword=keyword,type_search=type_search)
-            
-            self.customer_table.setRowCount(0)
-            
-            if not customers:
-                return
-            
-            column_headers = ["id", "name", "phonenumber"]
-            
-            self.customer_table.setColumnCount(len(column_headers))
-            self.customer_table.setHorizontalHeaderLabels(column_headers)
-            
-            self.customer_table.setRowCount(len(customers))
-            
-            for row, customer_dict in enumerate(customers):
-                for col, key in enumerate(column_headers):
-                    data = customer_dict.get(key, "")
-                    
-                    if data is None:
-                        display_text = ""
-                    else:
-                        display_text = str(data)
-                    
-                    item = QTableWidgetItem(display_text)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.customer_table.setItem(row, col, item)
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải dữ liệu khách hàng:\n{str(e)}")
+        self.customer_search.run_now(keyword, type_search)
+    
+    # chạy trên thread nền; với tài khoản EMP, context FGAC được đặt cùng lời gọi truy vấn (CustomerService)
+    def query_customers(self, keyword=None, type_search=None, cursor=None):
+        return self.customerService.get_customers_page(keyword=keyword, type_search=type_search, cursor=cursor,
+                                                       username=self.username)
+    
+    def populate_customer_table(self, customers):
+        self.customer_model.set_rows(customers)
     
     def search_customers(self):
         """Tìm kiếm khách hàng"""
@@ -1212,18 +1236,11 @@ class MainForm(QWidget):
         
         type_search = column_map.get(search_type) if search_type != "Tất cả" else None
         
-        if "emp" in self.username.lower() and type_search == "phonenumber" :
-            self.customerService.set_context(keyword)
-        
-        self.load_customer_data(keyword=keyword, type_search=type_search)
+        self.customer_search.trigger(keyword, type_search)
     
     def show_customer_detail(self, row, col):
         """Hiển thị chi tiết khách hàng"""
-        customer_data = {}
-        for col_idx in range(self.customer_table.columnCount()):
-            header = self.customer_table.horizontalHeaderItem(col_idx).text()
-            item = self.customer_table.item(row, col_idx)
-            customer_data[header] = item.text() if item else ""
+        customer_data = self.customer_model.row_texts(row)
         
         # Tạo dialog hiển thị chi tiết
         detail_dialog = QDialog(self)
@@ -1294,6 +1311,25 @@ class MainForm(QWidget):
         
         detail_dialog.exec()
                 
+    def show_revenue(self):
+        if self.revenue_page is None or not self.userService.identity.is_mgr:
+            return
+        self.stacked_widget.setCurrentWidget(self.revenue_page)
+
+    def show_diagnostics(self):
+        if self.diagnostics_page is None or not self.userService.identity.is_mgr:
+            return
+        self.stacked_widget.setCurrentWidget(self.diagnostics_page)
+
+    def closeEvent(self, event):
+        self.runner.cancel_all()
+        for controller in (self.employee_search, self.product_search,
+                           self.customer_search, self.order_product_search_ctl, self.order_customer_ctl):
+            controller.cancel()
+        # đăng xuất: đóng pool của phiên, lần đăng nhập sau xác thực lại với database
+        logout(self.oracleExec)
+        super().closeEvent(event)
+    
     def handle_logout(self):
         reply = QMessageBox.question(self, "Đăng Xuất", "Bạn có chắc chắn muốn đăng xuất?",
                                      QMessageBox.Yes | QMessageBox.No)
@@ -1307,11 +1343,7 @@ class MainForm(QWidget):
             QMessageBox.warning(self, "Lỗi", "Chưa import được dialog chi tiết nhân viên")
             return
             
-        employee_data = {}
-        for col_idx in range(self.employee_table.columnCount()):
-            header = self.employee_table.horizontalHeaderItem(col_idx).text()
-            item = self.employee_table.item(row, col_idx)
-            employee_data[header] = item.text() if item else ""
+        employee_data = self.employee_model.row_texts(row)
         
         dialog = EmployeeDetailDialog(employee_data, self.oracleExec, self)
         dialog.exec()
@@ -1327,24 +1359,43 @@ class MainForm(QWidget):
             if new_employee:
                 self.load_employee_data()
                 
+    # nhấn thường mở chi tiết; nhấn kèm Ctrl/Shift chỉ để chọn nhiều dòng
+    def on_plain_click(self, index, show_detail):
+        if QApplication.keyboardModifiers() & (Qt.ControlModifier | Qt.ShiftModifier):
+            return
+        show_detail(index.row(), index.column())
+
+    # các dòng đang chọn trong bảng (nhiều dòng với Ctrl/Shift), theo thứ tự hiển thị
+    def selected_rows(self, table):
+        return sorted(index.row() for index in table.selectionModel().selectedRows())
+
     def delete_employee(self):
-        selected_row=self.employee_table.currentRow()
-        if selected_row < 0:
+        usernames = [self.employee_model.text(row, 7) for row in self.selected_rows(self.employee_table)]
+        if not usernames:
             QMessageBox.warning(self,"Cảnh báo", "Vui lòng chọn một nhân viên để xóa")
             return
         
-        username=self.employee_table.item(selected_row,7).text()
+        target = f"nhân viên {usernames[0]}" if len(usernames) == 1 else f"{len(usernames)} nhân viên"
         reply = QMessageBox.question(self, "Xác Nhận",
-                                     f"Bạn có chắc chắn muốn xóa nhân viên {username}?",
+                                     f"Bạn có chắc chắn muốn xóa {target}?",
                                      QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            try:
-                self.userService.deactive_employee(username)
-                QMessageBox.information(self, "Thành Công", f"Đã xóa nhân viên {username}")
-                self.load_employee_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"Lỗi khi xóa: {str(e)}")
+            self.runner.submit(self.userService.set_accounts_locked, usernames,
+                               on_result=lambda errors: self.on_employee_deleted(usernames, errors),
+                               on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Lỗi khi xóa: {str(e)}"))
+    
+    # errors: lỗi của từng tài khoản theo thứ tự usernames, None nếu thành công
+    def on_employee_deleted(self, usernames, errors):
+        failed = [f"{username}: {error}" for username, error in zip(usernames, errors) if error is not None]
+        if failed:
+            QMessageBox.warning(self, "Lỗi", f"Đã xóa {len(usernames) - len(failed)}/{len(usernames)} nhân viên. "
+                                             "Không xóa được:\n" + "\n".join(failed))
+        elif len(usernames) == 1:
+            QMessageBox.information(self, "Thành Công", f"Đã xóa nhân viên {usernames[0]}")
+        else:
+            QMessageBox.information(self, "Thành Công", f"Đã xóa {len(usernames)} nhân viên")
+        self.load_employee_data()
         
     def show_add_product_form(self):
         if AddProductDialog is None:
@@ -1364,36 +1415,49 @@ class MainForm(QWidget):
             
         product_data = {}
         headers = ["ID", "NAME", "IMAGE", "UNITPRICE", "STOCKQUANTITY", "CATEGORYID", "BRANDID", "ACTIVE"]
-        for col_idx in range(self.product_table.columnCount()):
-            item = self.product_table.item(row, col_idx)
-            product_data[headers[col_idx]] = item.text() if item else ""
+        for col_idx, text in enumerate(self.product_model.row_texts(row).values()):
+            product_data[headers[col_idx]] = text
         
         dialog = ProductDetailDialog(product_data, self.oracleExec, self)
         dialog.exec()
         
     def handle_delete_product(self):
-        selected_items = self.product_table.selectedItems()
-        if not selected_items:
+        selected_rows = self.selected_rows(self.product_table)
+        if not selected_rows:
             QMessageBox.warning(self, "Chưa Chọn", "Vui lòng chọn sản phẩm để xóa.")
             return
         
-        selected_row = selected_items[0].row()
-        product_id_item = self.product_table.item(selected_row, 0)
-        if not product_id_item:
+        product_ids = [self.product_model.value(row, 0) for row in selected_rows]
+        if None in product_ids:
             QMessageBox.warning(self, "Lỗi", "Không thể lấy ID sản phẩm.")
             return
         
-        product_id = int(product_id_item.text())
+        product_ids = [int(product_id) for product_id in product_ids]
+        target = f"sản phẩm ID {product_ids[0]}" if len(product_ids) == 1 else f"{len(product_ids)} sản phẩm"
         
         reply = QMessageBox.question(self, "Xác Nhận Xóa",
-                                     f"Bạn có chắc chắn muốn xóa sản phẩm ID {product_id}?",
+                                     f"Bạn có chắc chắn muốn xóa {target}?",
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                self.productService.deactivate_product(product_id)
-                self.load_product_data()
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"Lỗi khi xóa sản phẩm: {str(e)}")
+            self.runner.submit(self.productService.deactivate_products, product_ids,
+                               on_result=lambda _: self.load_product_data(),
+                               on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"Lỗi khi xóa sản phẩm: {str(e)}"))
+    
+    # xoá ô tìm kiếm mà không kích hoạt một lần tìm kiếm mới
+    def clear_search_input(self, search_input):
+        search_input.blockSignals(True)
+        search_input.clear()
+        search_input.blockSignals(False)
+    
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "Lỗi", f"Không thể tải dữ liệu:\n{str(error)}")
+    
+    # tải trang sau lỗi: bảng giữ các dòng đã có, chỉ tải lại khi người dùng chọn Thử lại
+    def show_page_error(self, error, retry):
+        answer = QMessageBox.critical(self, "Lỗi", f"Không thể tải thêm dữ liệu:\n{str(error)}",
+                                      QMessageBox.Retry | QMessageBox.Cancel)
+        if answer == QMessageBox.Retry:
+            retry()
     
     def search_employees(self):
         keyword = self.employee_search_input.text().strip()
@@ -1409,7 +1473,7 @@ class MainForm(QWidget):
         
         type_search = column_map.get(search_type_vn) if search_type_vn != "Tất cả" else None
         
-        self.load_employee_data(keyword=keyword, type_search=type_search)
+        self.employee_search.trigger(keyword, type_search)
         
     def search_products(self):
         keyword = self.product_search_input.text().strip().lower()
@@ -1424,76 +1488,52 @@ class MainForm(QWidget):
         
         type_search = column_map.get(search_type) if search_type != "Tất cả" else None
         
-        self.load_product_data(keyword=keyword,type_search=type_search)
+        self.product_search.trigger(keyword, type_search)
     
     def load_order_products(self, keyword:str=""):
-        
-        try:
-            products = self.productService.get_product_for_order(keyword)
-            
-            self.order_product_table.setRowCount(0)
-                
-            if not products:
-                return
-            
-            self.order_product_table.setRowCount(len(products))
-            
-            for row, product in enumerate(products):
-                # ID
-                id_item = QTableWidgetItem(str(product.get('id', '')))
-                id_item.setTextAlignment(Qt.AlignCenter)
-                self.order_product_table.setItem(row, 0, id_item)
-                
-                # Name
-                name_item = QTableWidgetItem(str(product.get('name', '')))
-                self.order_product_table.setItem(row, 1, name_item)
-                
-                # Price
-                price = product.get('unitprice', 0)
-                price_item = QTableWidgetItem(f"{price:,.0f} đ")
-                price_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                self.order_product_table.setItem(row, 2, price_item)
-                
-                # Stock
-                stock = product.get('stockquantity', 0)
-                stock_item = QTableWidgetItem(str(stock))
-                stock_item.setTextAlignment(Qt.AlignCenter)
-                self.order_product_table.setItem(row, 3, stock_item)
-                
-                # Add button
-                btn_add = QPushButton("➕ Thêm")
-                btn_add.setStyleSheet("""
-                    QPushButton {
-                        background-color: #3498db;
-                        color: white;
-                        border-radius: 5px;
-                        padding: 5px 10px;
-                        font-weight: bold;
-                        border: none;
-                    }
-                    QPushButton:hover {
-                        background-color: #2980b9;
-                    }
-                """)
-                btn_add.setCursor(Qt.PointingHandCursor)
-                btn_add.clicked.connect(lambda checked, r=row: self.add_to_cart(r))
-                self.order_product_table.setCellWidget(row, 4, btn_add)
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể load sản phẩm: {str(e)}")
+        self.order_product_search_ctl.run_now(keyword or "")
+    
+    # chạy trên thread nền; chỉ lấy tối đa ORDER_PRODUCT_LIMIT gợi ý cho mỗi lần gõ phím
+    def query_order_products(self, keyword=""):
+        return self.productService.get_product_for_order(keyword, ORDER_PRODUCT_LIMIT)
+    
+    def populate_order_products(self, products):
+        # giữ nguyên danh sách cột vì cột "add" không có trong dòng dữ liệu
+        self.order_product_model.set_rows(products or [], self.order_product_model.columns)
+    
+    def on_order_product_clicked(self, index):
+        if self.order_product_model.columns[index.column()] == "add":
+            self.add_to_cart(index.row())
+    
+    # chạy trên thread nền: gợi ý số điện thoại theo tiền tố (từ chỉ mục trong bộ nhớ) và
+    # tra khách hàng khi đã đủ số (từ CUSTOMER_CACHE, chỉ truy vấn DB khi chưa có trong cache)
+    def lookup_order_customer(self, phone):
+        phone = phone.strip()
+        suggestions = self.customerService.suggest_by_phone(phone, self.username)
+        customer = None
+        if len(normalize_phone(phone)) >= 10:
+            customer = self.customerService.get_customer_by_phone(phone, self.username)
+        return suggestions, customer
+    
+    def on_order_customer_found(self, result):
+        suggestions, customer = result
+        self.phone_completer_model.setStringList([row["phonenumber"] for row in suggestions])
+        if suggestions and self.customer_phone_input.hasFocus():
+            self.customer_phone_input.completer().complete()
+        if customer is not None and not self.customer_name_input.text().strip():
+            self.customer_name_input.setText(customer.get("name") or "")
     
     def search_order_products(self):
         """Tìm kiếm sản phẩm trong bảng order"""
         keyword = self.order_product_search.text().strip().lower()
-        self.load_order_products(keyword=keyword)
+        self.order_product_search_ctl.trigger(keyword)
     
     def add_to_cart(self, row):
         try:
-            product_id = int(self.order_product_table.item(row, 0).text())
-            product_name = self.order_product_table.item(row, 1).text()
-            price_text = self.order_product_table.item(row, 2).text().replace(' đ', '').replace(',', '')
-            product_price = float(price_text)
-            stock = int(self.order_product_table.item(row, 3).text())
+            product_id = int(self.order_product_model.value(row, "id"))
+            product_name = self.order_product_model.value(row, "name")
+            product_price = float(self.order_product_model.value(row, "unitprice") or 0)
+            stock = int(self.order_product_model.value(row, "stockquantity") or 0)
             
             if stock <= 0:
                 QMessageBox.warning(self, "Hết Hàng", f"Sản phẩm '{product_name}' đã hết hàng!")
@@ -1649,43 +1689,36 @@ class MainForm(QWidget):
                                     QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            try:
-                customer_model=CustomerModel(name=customer_name,phonenumber=customer_phone)
-                
-                exists_customer=self.customerService.get_customer_by_phone(phonenumber=customer_phone,
-                                                                           username=self.username)
-                if exists_customer is None:
-                    cus_id=self.customerService.create_customer(customer_model)[0]
-                else:
-                    cus_id=exists_customer["id"]
-            
-                employee=self.userService.get_user()
-                
-                order=OrderModel(cus_id=cus_id,
-                                 emp_id=employee["id"],
-                                 order_date_time=datetime.now())
-                
-                order_id=self.orderService.create_order(order)
-                for item in self.cart_items:
-                    order_detail=OrderDetailModel(order_id=order_id[0],
-                                                  product_id=item["id"],
-                                                  unit_price=item["price"],
-                                                  quantity=item["quantity"]
-                                                  )
-                    
-                    self.orderService.create_order_detail(order_detail)
-                
-                QMessageBox.information(self, "Thành Công", 
-                                      f"Đã tạo đơn hàng #{order_id[0]} thành công!\n"
-                                      f"Khách hàng: {customer_name}\n"
-                                      f"Tổng tiền: {total:,.0f} đ\n\n")
-                
-                self.cart_items.clear()
-                self.customer_name_input.clear()
-                self.customer_phone_input.clear()
-                self.update_cart_display()
-            except Exception as e:
-                QMessageBox.critical(self, "Lỗi", f"{str(e)}")
+            # khách, đơn, chi tiết và tồn kho được xử lý trong một lần gọi server (trên thread nền);
+            # khoá nút tới khi có kết quả để không tạo trùng đơn
+            self.btn_create_order.setEnabled(False)
+            self.runner.submit(self.orderService.checkout, [dict(item) for item in self.cart_items],
+                               customer_phone=customer_phone, customer_name=customer_name,
+                               on_result=lambda result: self.on_order_created(result, customer_name, total),
+                               on_error=lambda e: QMessageBox.critical(self, "Lỗi", f"{str(e)}"),
+                               on_finished=lambda: self.btn_create_order.setEnabled(True))
+    
+    def on_order_created(self, result, customer_name, total):
+        order_id, new_stock = result
+        self.apply_stock_levels(new_stock)
+        
+        QMessageBox.information(self, "Thành Công", 
+                              f"Đã tạo đơn hàng #{order_id} thành công!\n"
+                              f"Khách hàng: {customer_name}\n"
+                              f"Tổng tiền: {total:,.0f} đ\n\n")
+        
+        self.cart_items.clear()
+        self.customer_name_input.clear()
+        self.customer_phone_input.clear()
+        self.update_cart_display()
+    
+    # cập nhật cột tồn kho của bảng sản phẩm theo kết quả thanh toán, không cần tải lại
+    def apply_stock_levels(self, new_stock: dict):
+        model = self.order_product_model
+        for row in range(len(model.rows)):
+            stock = new_stock.get(model.value(row, "id"))
+            if stock is not None:
+                model.set_value(row, "stockquantity", stock)
     
     def view_order_history(self):
         if not self.orderService:
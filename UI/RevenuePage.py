@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta
+from PySide6.QtWidgets import (
+    QWidget, QLabel, QPushButton, QHBoxLayout, QVBoxLayout, QDateEdit,
+    QHeaderView, QTableView, QMessageBox
+)
+from PySide6.QtCore import Qt, QDate
+from PySide6.QtGui import QFont
+
+from UI.RowTableModel import RowTableModel
+
+
+def format_money(value) -> str:
+    return f"{value or 0:,.0f} đ"
+
+
+def format_quantity(value) -> str:
+    return f"{value or 0:,.0f}"
+
+
+# ngày từ truy vấn theo cột có thể là datetime (driver) hoặc numpy.datetime64 (Arrow)
+def format_day(value) -> str:
+    if hasattr(value, "strftime"):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+
+class RevenuePage(QWidget):
+    """Trang doanh thu cho quản lý: doanh thu theo ngày và theo sản phẩm trong khoảng ngày chọn.
+
+    Số liệu từ OrderService.revenue_by_day / revenue_by_product (truy vấn theo cột, cộng dồn
+    vector hoá trong ColumnarResult.group_sum), chạy trên thread nền qua TaskRunner.
+    """
+
+    def __init__(self, order_service, runner, parent=None):
+        super().__init__(parent)
+        self.orderService = order_service
+        self.runner = runner
+        self.task = None
+
+        number = Qt.AlignRight | Qt.AlignVCenter
+        self.day_model = RowTableModel(
+            ["order_day", "revenue"], ["Ngày", "Doanh thu"],
+            formatters={"order_day": format_day, "revenue": format_money},
+            alignments={"order_day": Qt.AlignCenter}, alignment=number, parent=self)
+        self.product_model = RowTableModel(
+            ["product_id", "quantity", "revenue"], ["Mã sản phẩm", "Số lượng bán", "Doanh thu"],
+            formatters={"quantity": format_quantity, "revenue": format_money},
+            alignments={"product_id": Qt.AlignCenter}, alignment=number, parent=self)
+
+        self.init_ui()
+
+    def init_ui(self):
+        self.setStyleSheet("background-color: #ecf0f1;")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(30, 30, 30, 30)
+
+        header = QLabel("📊 DOANH THU")
+        header.setFont(QFont("Segoe UI", 20, QFont.Bold))
+        header.setStyleSheet("color: #2c3e50; margin-bottom: 10px;")
+
+        # mặc định từ đầu tháng tới hôm nay; ngày kết thúc được tính trọn ngày
+        today = QDate.currentDate()
+        self.start_edit = QDateEdit(QDate(today.year(), today.month(), 1))
+        self.end_edit = QDateEdit(today)
+        range_layout = QHBoxLayout()
+        for text, edit in (("Từ ngày:", self.start_edit), ("Đến ngày:", self.end_edit)):
+            label = QLabel(text)
+            label.setFont(QFont("Segoe UI", 11, QFont.Bold))
+            label.setStyleSheet("color: #2c3e50;")
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("dd/MM/yyyy")
+            edit.setFixedHeight(40)
+            edit.setStyleSheet("color: #2c3e50; background-color: white;")
+            range_layout.addWidget(label)
+            range_layout.addWidget(edit)
+
+        self.btn_load = QPushButton("🔍 Xem")
+        self.btn_load.setFixedHeight(40)
+        self.btn_load.setCursor(Qt.PointingHandCursor)
+        self.btn_load.setStyleSheet("""
+            QPushButton {
+                background-color: #3498db;
+                color: white;
+                border: none;
+                border-radius: 8px;
+                padding: 8px 16px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #2980b9;
+            }
+        """)
+        self.btn_load.clicked.connect(self.load)
+        range_layout.addWidget(self.btn_load)
+        range_layout.addStretch()
+
+        self.total_label = QLabel()
+        self.total_label.setFont(QFont("Segoe UI", 12, QFont.Bold))
+        self.total_label.setStyleSheet("color: #27ae60;")
+
+        tables = QHBoxLayout()
+        day_box = QVBoxLayout()
+        day_box.addWidget(self.section_label("Theo ngày"))
+        day_box.addWidget(self.create_table(self.day_model))
+        product_box = QVBoxLayout()
+        product_box.addWidget(self.section_label("Theo sản phẩm"))
+        product_box.addWidget(self.create_table(self.product_model))
+        tables.addLayout(day_box, 1)
+        tables.addLayout(product_box, 1)
+
+        layout.addWidget(header)
+        layout.addLayout(range_layout)
+        layout.addWidget(self.total_label)
+        layout.addLayout(tables)
+
+    def section_label(self, text):
+        label = QLabel(text)
+        label.setFont(QFont("Segoe UI", 11, QFont.Bold))
+        label.setStyleSheet("color: #2c3e50; margin-top: 10px;")
+        return label
+
+    def create_table(self, model):
+        table = QTableView()
+        table.setModel(model)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.setAlternatingRowColors(True)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setStyleSheet("""
+            QTableView {
+                background-color: white;
+                border: 1px solid #bdc3c7;
+                border-radius: 5px;
+                gridline-color: #ecf0f1;
+                outline: none;
+            }
+            QHeaderView::section {
+                background-color: #34495e;
+                color: white;
+                padding: 6px;
+                border: none;
+                font-weight: bold;
+            }
+        """)
+        return table
+
+    # khoảng [start, end) theo datetime cho OrderService
+    def date_range(self):
+        start = self.start_edit.date().toPython()
+        end = self.end_edit.date().toPython() + timedelta(days=1)
+        return datetime(start.year, start.month, start.day), datetime(end.year, end.month, end.day)
+
+    def load(self):
+        start, end = self.date_range()
+        if start >= end:
+            QMessageBox.warning(self, "Lỗi", "Ngày bắt đầu phải trước ngày kết thúc!")
+            return
+        # đang tải thì bỏ qua (nút Xem bị khoá, chỉ showEvent có thể gọi lại)
+        if self.task is not None:
+            return
+        self.btn_load.setEnabled(False)
+        self.task = self.runner.submit(self.load_report, start, end,
+                                       on_result=self.show_report, on_error=self.show_error,
+                                       on_finished=self.on_load_finished)
+
+    # chạy trên thread nền: hai báo cáo dùng chung session của task
+    def load_report(self, start, end):
+        return self.orderService.revenue_by_day(start, end), self.orderService.revenue_by_product(start, end)
+
+    def show_report(self, report):
+        by_day, by_product = report
+        self.day_model.set_rows(list(by_day), self.day_model.columns)
+        self.product_model.set_rows(list(by_product), self.product_model.columns)
+        self.total_label.setText(f"Tổng doanh thu: {format_money(sum(by_day.column('revenue')))}")
+
+    def show_error(self, error):
+        QMessageBox.critical(self, "Lỗi", f"Không thể tải báo cáo doanh thu:\n{error}")
+
+    def on_load_finished(self):
+        self.task = None
+        self.btn_load.setEnabled(True)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.load()
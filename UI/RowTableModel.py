@@ -0,0 +1,158 @@
+from datetime import date, datetime
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+def format_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+class RowTableModel(QAbstractTableModel):
+    """Model cho QTableView đặt thẳng trên danh sách dòng lấy từ OracleExec (record/dict).
+
+    Không tạo QTableWidgetItem cho từng ô: chuỗi hiển thị được tạo khi view cần vẽ ô đó.
+    View chỉ thấy batch_size dòng đầu, các dòng tiếp theo được mở dần qua fetchMore()
+    khi người dùng cuộn xuống cuối bảng. Khi đã hiện hết dòng trong bộ nhớ mà server
+    còn trang sau (set_more), fetchMore() gọi fetch_page() để tải trang tiếp theo.
+
+    formatters: {cột: hàm(value) -> str}, alignments: {cột: Qt.Alignment}
+    foreground/font: hàm(cột, value) -> QColor/QFont hoặc None, dùng để tô màu từng ô.
+    """
+
+    def __init__(self, columns=None, headers=None, formatters=None, alignments=None,
+                 foreground=None, font=None, alignment=Qt.AlignCenter, batch_size=200, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns or [])
+        self.headers = list(headers) if headers else None
+        self.formatters = formatters or {}
+        self.alignments = alignments or {}
+        self.foreground = foreground
+        self.font = font
+        self.alignment = alignment
+        self.batch_size = batch_size
+        self.rows = []
+        self.loaded = 0
+        # phân trang phía server: fetch_page() yêu cầu trang sau, kết quả về qua append_rows()
+        self.fetch_page = None
+        self.has_more = False
+        self.fetching = False
+
+    # thay toàn bộ dữ liệu; columns=None thì lấy theo khoá của dòng đầu tiên
+    def set_rows(self, rows, columns=None):
+        self.beginResetModel()
+        self.rows = list(rows or [])
+        if columns is not None:
+            self.columns = list(columns)
+        elif self.rows and hasattr(self.rows[0], "keys"):
+            self.columns = list(self.rows[0].keys())
+        self.loaded = min(len(self.rows), self.batch_size)
+        self.has_more = False
+        self.fetching = False
+        self.endResetModel()
+
+    # báo server còn trang sau hay không (gọi sau mỗi trang tải về)
+    def set_more(self, has_more: bool, fetch_page=None):
+        self.has_more = has_more
+        self.fetching = False
+        if fetch_page is not None:
+            self.fetch_page = fetch_page
+
+    # thêm dòng vào cuối (ví dụ từng lô kết quả trả về dần)
+    def append_rows(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        if not self.columns and hasattr(rows[0], "keys"):
+            self.set_rows(rows)
+            return
+        old_count = len(self.rows)
+        self.rows.extend(rows)
+        # view đang thấy hết dữ liệu cũ thì hiện luôn các dòng mới, nếu không để fetchMore lo
+        if self.loaded == old_count:
+            self.beginInsertRows(QModelIndex(), old_count, len(self.rows) - 1)
+            self.loaded = len(self.rows)
+            self.endInsertRows()
+
+    # sửa giá trị một cột của dòng (record là namedtuple nên được thay bằng bản sao) và vẽ lại ô đó
+    def set_value(self, row: int, column, value):
+        if isinstance(column, int):
+            column = self.columns[column]
+        data = self.rows[row]
+        if hasattr(data, "_replace"):
+            self.rows[row] = data._replace(**{column: value})
+        else:
+            self.rows[row] = {**data, column: value}
+        if row < self.loaded and column in self.columns:
+            index = self.index(row, self.columns.index(column))
+            self.dataChanged.emit(index, index)
+
+    def clear(self):
+        self.set_rows([])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        if self.loaded < len(self.rows):
+            return True
+        return self.has_more and not self.fetching and self.fetch_page is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        last = min(len(self.rows), self.loaded + self.batch_size) - 1
+        if last < self.loaded:
+            if self.has_more and not self.fetching and self.fetch_page is not None:
+                self.fetching = True
+                self.fetch_page()
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, last)
+        self.loaded = last + 1
+        self.endInsertRows()
+
+    def value(self, row: int, column):
+        if isinstance(column, int):
+            column = self.columns[column]
+        data = self.rows[row]
+        return data.get(column) if hasattr(data, "get") else None
+
+    def text(self, row: int, column) -> str:
+        if isinstance(column, int):
+            column = self.columns[column]
+        formatter = self.formatters.get(column, format_value)
+        return formatter(self.value(row, column))
+
+    # {tiêu đề cột: chuỗi hiển thị} của một dòng, giống nội dung các ô trên bảng
+    def row_texts(self, row: int) -> dict:
+        headers = self.headers or self.columns
+        return {headers[i]: self.text(row, column) for i, column in enumerate(self.columns)}
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        if role == Qt.DisplayRole:
+            return self.text(index.row(), column)
+        if role == Qt.TextAlignmentRole:
+            return self.alignments.get(column, self.alignment)
+        if role == Qt.ForegroundRole and self.foreground is not None:
+            return self.foreground(column, self.value(index.row(), column))
+        if role == Qt.FontRole and self.font is not None:
+            return self.font(column, self.value(index.row(), column))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            headers = self.headers or self.columns
+            return headers[section] if section < len(headers) else None
+        return str(section + 1)
@@ -0,0 +1,119 @@
+from PySide6.QtCore import QObject, QTimer
+from UI.TaskRunner import TaskRunner
+
+
+class SearchController(QObject):
+    """Tìm kiếm khi gõ phím: chờ người dùng ngừng gõ (debounce), chạy truy vấn trên
+    thread nền và chỉ đưa kết quả của lần gõ mới nhất lên bảng.
+
+    run(*args) chạy trên thread nền; on_result(rows) và on_error(e) chạy trên thread GUI.
+    Nếu có oracle_exec, truy vấn cũ còn đang chạy sẽ bị huỷ qua OracleExec.interrupt().
+
+    Có model (RowTableModel) thì run là hàm phân trang run(*args, cursor=None) -> (rows, cursor):
+    on_result nhận trang đầu, các trang sau được tải khi view cuộn tới cuối và nối vào model.
+    Tải trang sau lỗi thì model ngừng tự tải thêm; on_page_error(e, retry) cho phép người dùng
+    chủ động gọi retry() để thử lại đúng trang đó.
+    """
+
+    def __init__(self, run, on_result, on_error=None, delay_ms=300, oracle_exec=None, parent=None,
+                 model=None, on_page_error=None):
+        super().__init__(parent)
+        self.run = run
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_page_error = on_page_error
+        self.model = model
+        self.generation = 0
+        self.pending_args = ()
+        self.cursor = None
+        self.in_flight = None
+        self.runner = TaskRunner(oracle_exec, parent=self)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self._start)
+
+    # gọi mỗi khi nội dung ô tìm kiếm thay đổi
+    def trigger(self, *args):
+        self.generation += 1
+        self.pending_args = args
+        self.timer.start()
+
+    # chạy ngay, bỏ qua thời gian chờ (ví dụ khi bấm nút làm mới)
+    def run_now(self, *args):
+        self.generation += 1
+        self.pending_args = args
+        self.timer.stop()
+        self._start()
+
+    # bỏ mọi lần tìm kiếm đang chờ hoặc đang chạy (ví dụ khi bảng được tải lại)
+    def cancel(self):
+        self.generation += 1
+        self.timer.stop()
+        self._cancel_in_flight()
+
+    def _start(self):
+        self._cancel_in_flight()
+        generation = self.generation
+        self.in_flight = self.runner.submit(self.run, *self.pending_args,
+                                            on_result=lambda rows: self._handle_finished(generation, rows),
+                                            on_error=lambda e: self._handle_failed(generation, e))
+
+    def _cancel_in_flight(self):
+        if self.in_flight is not None:
+            self.in_flight.cancel()
+            self.in_flight = None
+
+    def _handle_finished(self, generation, result):
+        if generation != self.generation:
+            return
+        self.in_flight = None
+        if self.model is None:
+            self.on_result(result)
+            return
+        rows, self.cursor = result
+        self.on_result(rows)
+        self.model.set_more(self.cursor is not None, self.fetch_next_page)
+
+    # gọi bởi model khi view cần thêm dòng; trang cũ về muộn sau một lần tìm kiếm mới thì bỏ
+    def fetch_next_page(self):
+        generation = self.generation
+        self.in_flight = self.runner.submit(self.run, *self.pending_args, cursor=self.cursor,
+                                            on_result=lambda page: self._handle_page(generation, page),
+                                            on_error=lambda e: self._handle_page_failed(generation, e))
+
+    def _handle_page(self, generation, page):
+        if generation != self.generation:
+            return
+        self.in_flight = None
+        rows, self.cursor = page
+        self.model.append_rows(rows)
+        self.model.set_more(self.cursor is not None)
+
+    def _handle_page_failed(self, generation, error):
+        if generation != self.generation:
+            return
+        self.in_flight = None
+        # không bật lại has_more: view sẽ gọi fetchMore ngay và lặp lại lỗi liên tục
+        self.model.set_more(False)
+        if self.on_page_error is not None:
+            self.on_page_error(error, lambda: self.retry_page(generation))
+        elif self.on_error is not None:
+            self.on_error(error)
+
+    # thử lại trang vừa lỗi (cursor giữ nguyên); bỏ qua nếu đã có lần tìm kiếm mới
+    def retry_page(self, generation):
+        if generation != self.generation or self.cursor is None or self.in_flight is not None:
+            return
+        self.model.set_more(True)
+        self.model.fetching = True
+        self.fetch_next_page()
+
+    def _handle_failed(self, generation, error):
+        # lỗi của truy vấn cũ (kể cả lỗi do bị huỷ) thì bỏ qua
+        if generation != self.generation:
+            return
+        self.in_flight = None
+        if self.on_error is not None:
+            self.on_error(error)
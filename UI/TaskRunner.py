@@ -0,0 +1,139 @@
+import logging
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+logger = logging.getLogger("UI.TaskRunner")
+
+
+class TaskSignals(QObject):
+    result = Signal(object, object)
+    error = Signal(object, object)
+    progress = Signal(object, object)
+    finished = Signal(object)
+
+
+class Task(QRunnable):
+    """Một lời gọi BAL chạy trên thread nền.
+
+    Nếu có oracle_exec, task giữ riêng một kết nối (session) trong suốt thời gian chạy,
+    nên mỗi kết nối chỉ được một thread dùng tại một thời điểm và cancel() có thể
+    ngắt đúng câu lệnh của task này qua OracleExec.interrupt() (chỉ khi đang có lệnh chạy).
+    """
+
+    def __init__(self, fn, args, kwargs, signals, oracle_exec=None, with_progress=False):
+        super().__init__()
+        # Python giữ vòng đời task (TaskRunner.callbacks), không để QThreadPool tự xoá
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+        self.oracle_exec = oracle_exec
+        self.with_progress = with_progress
+        self.cancelled = False
+        # kết nối đang được task giữ; chỉ đọc/ghi khi giữ self.lock
+        self.conn = None
+        self.lock = threading.Lock()
+
+    # fn có thể gọi progress(value) để gửi kết quả từng phần về thread GUI
+    def progress(self, value):
+        if not self.cancelled:
+            self._emit(self.signals.progress, self, value)
+
+    # form chứa runner có thể đã đóng khi task chạy xong
+    def _emit(self, signal, *args):
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            if self.conn is not None:
+                self.oracle_exec.interrupt(self.conn)
+
+    def run(self):
+        if self.cancelled:
+            self._emit(self.signals.finished, self)
+            return
+        kwargs = dict(self.kwargs)
+        if self.with_progress:
+            kwargs["progress"] = self.progress
+        try:
+            if self.oracle_exec is None:
+                result = self.fn(*self.args, **kwargs)
+            else:
+                with self.oracle_exec.session() as conn:
+                    with self.lock:
+                        self.conn = conn
+                    try:
+                        result = self.fn(*self.args, **kwargs)
+                    finally:
+                        with self.lock:
+                            self.conn = None
+        except Exception as e:
+            if not self.cancelled:
+                self._emit(self.signals.error, self, e)
+        else:
+            if not self.cancelled:
+                self._emit(self.signals.result, self, result)
+        finally:
+            self._emit(self.signals.finished, self)
+
+
+class TaskRunner(QObject):
+    """Chạy lời gọi BAL trên QThreadPool và trả kết quả về thread GUI qua callback.
+
+    runner.submit(service.load, arg, on_result=..., on_error=..., on_progress=...)
+    Callback chỉ được gọi khi runner (và widget cha) còn tồn tại; cancel_all() khi đóng form.
+    """
+
+    def __init__(self, oracle_exec=None, parent=None, pool: QThreadPool = None):
+        super().__init__(parent)
+        self.oracle_exec = oracle_exec
+        self.pool = pool or QThreadPool.globalInstance()
+        self.callbacks = {}
+        self.signals = TaskSignals()
+        self.signals.result.connect(self._handle_result)
+        self.signals.error.connect(self._handle_error)
+        self.signals.progress.connect(self._handle_progress)
+        self.signals.finished.connect(self._handle_finished)
+
+    def submit(self, fn, *args, on_result=None, on_error=None, on_progress=None,
+               on_finished=None, **kwargs) -> Task:
+        task = Task(fn, args, kwargs, self.signals, self.oracle_exec,
+                    with_progress=on_progress is not None)
+        self.callbacks[task] = (on_result, on_error, on_progress, on_finished)
+        self.pool.start(task)
+        return task
+
+    def cancel_all(self):
+        for task in list(self.callbacks):
+            task.cancel()
+
+    def _callback(self, task, index):
+        callbacks = self.callbacks.get(task)
+        return callbacks[index] if callbacks else None
+
+    def _handle_result(self, task, value):
+        callback = self._callback(task, 0)
+        if callback is not None:
+            callback(value)
+
+    def _handle_error(self, task, error):
+        callback = self._callback(task, 1)
+        if callback is not None:
+            callback(error)
+        else:
+            logger.error("Task error: %s", error)
+
+    def _handle_progress(self, task, value):
+        callback = self._callback(task, 2)
+        if callback is not None:
+            callback(value)
+
+    def _handle_finished(self, task):
+        callbacks = self.callbacks.pop(task, None)
+        if callbacks and callbacks[3] is not None:
+            callbacks[3]()